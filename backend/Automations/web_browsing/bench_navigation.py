@@ -0,0 +1,101 @@
+# bench_navigation.py
+# Navigation profiles against a local page with heavy assets, headless.
+#
+#   python bench_navigation.py [--runs 5] [--images 30] [--asset-delay-ms 150]
+#
+# The fixture page has its text in the DOM right away but pulls in many
+# slow images, a web font, a video poster and a "tracker" script, all
+# cacheable. Each profile loads the page --runs times in its own session:
+# the first load is cold, the rest are served partly from the HTTP cache
+# (blocking goes through CDP, so the cache stays on). "fast+selector"
+# returns as soon as #content is in the DOM.
+# Needs a browser for Playwright (`playwright install chromium`).
+
+import argparse
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from browser_engine import BrowserEngine
+
+ASSET = b"\0" * 150_000
+
+
+def make_handler(images, asset_delay):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/":
+                imgs = "".join(f"<img src='/img/{i}.png' width=40>" for i in range(images))
+                body = (f"<html><head><title>Heavy fixture</title>"
+                        f"<style>@font-face {{font-family: F; src: url('/font.woff2')}} body {{font-family: F}}</style>"
+                        f"<script async src='/tracker.js'></script></head>"
+                        f"<body><div id='content'>Hello</div><video poster='/poster.jpg'></video>{imgs}</body></html>"
+                        ).encode()
+                return self._send(body, "text/html", cache=False)
+            time.sleep(asset_delay)
+            kind = "application/javascript" if path.endswith(".js") else "application/octet-stream"
+            self._send(b"" if path.endswith(".js") else ASSET, kind)
+
+        def _send(self, body, content_type, cache=True):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "max-age=3600" if cache else "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FixtureHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark navigation profiles against a heavy local page.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--images", type=int, default=30)
+    parser.add_argument("--asset-delay-ms", type=int, default=150)
+    parser.add_argument("--channel", default="", help='browser channel ("" = bundled Chromium)')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.images, args.asset_delay_ms / 1000))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    cases = [
+        ("full", {"profile": "full"}),
+        ("dom", {"profile": "dom"}),
+        ("fast", {"profile": "fast", "block": ["*tracker.js*"]}),
+        ("fast+selector", {"profile": "fast", "block": ["*tracker.js*"], "selector": "#content"}),
+    ]
+    engine = BrowserEngine(pool_size=len(cases), headless=True, channel=args.channel or None).start()
+    print(f"Fixture {url}: {args.images} images, font, poster, tracker; {args.asset_delay_ms} ms per asset\n")
+    print(f"{'profile':<15} {'cold ms':>8} {'warm ms':>8} {'DOM ms':>7} {'load ms':>8} {'resources':>9}")
+    for name, options in cases:
+        walls, last = [], {}
+        for _ in range(args.runs):
+            result = engine.run({"action": "goto", "target": url, **options}, session=name)
+            if result["status"] != "success":
+                print(f"{name:<15} failed: {result['reply']}")
+                break
+            last = result["timings"]
+            walls.append(last["wall_ms"])
+        if not walls:
+            continue
+        warm = statistics.median(walls[1:]) if len(walls) > 1 else float("nan")
+        print(f"{name:<15} {walls[0]:8.0f} {warm:8.0f} {last.get('dom_ms') or 0:7.0f} "
+              f"{last.get('load_ms') or 0:8.0f} {last.get('resources', 0):9d}")
+
+    print(f"\nengine stats: {engine.stats()['navigation']}")
+    engine.stop()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
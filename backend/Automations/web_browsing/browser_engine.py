@@ -0,0 +1,624 @@
+# browser_engine.py
+# Async Playwright behind a small synchronous API, used by playwright_service.py.
+#
+# One Chromium process, a pool of pages that each live in their own browser
+# context, and a scheduler that routes every command to a page by session
+# (or tab) id. Commands for different sessions run concurrently on the
+# engine's event loop; commands for the same session run in order. Pages
+# are health-checked before use and recycled instead of failing with
+# "page is not available".
+
+import asyncio
+import threading
+import time
+
+from playwright.async_api import async_playwright
+
+DEFAULT_SESSION = "default"
+
+# URL patterns for Network.setBlockedURLs, by resource kind
+BLOCK_PATTERNS = {
+    "images": ("*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"),
+    "media": ("*.mp4*", "*.webm*", "*.m4a*", "*.mp3*", "*.ogg*", "*.m3u8*", "*.ts?*"),
+    "fonts": ("*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"),
+    "trackers": ("*doubleclick.net*", "*googlesyndication.com*", "*google-analytics.com*",
+                 "*googletagmanager.com*", "*googletagservices.com*", "*adservice.google.*",
+                 "*facebook.net*", "*connect.facebook.*", "*scorecardresearch.com*", "*hotjar.com*",
+                 "*segment.io*", "*amazon-adsystem.com*", "*taboola.com*", "*outbrain.com*"),
+}
+
+# How `goto` navigates. "full" is the old behaviour (wait for every
+# resource); the others return once the DOM is ready (or "selector" is on
+# the page) and can skip heavy or useless resources. Blocking goes through
+# CDP rather than page.route(), so the HTTP cache stays on.
+NAV_PROFILES = {
+    "full": {"wait_until": "load", "block": ()},
+    "dom": {"wait_until": "domcontentloaded", "block": ()},
+    "fast": {"wait_until": "domcontentloaded", "block": ("images", "media", "fonts", "trackers")},
+}
+
+NAVIGATION_TIMING_JS = """() => {
+    const nav = performance.getEntriesByType("navigation")[0];
+    if (!nav) return null;
+    return {ttfb_ms: nav.responseStart, dom_ms: nav.domContentLoadedEventEnd,
+            load_ms: nav.loadEventEnd || null, transfer_bytes: nav.transferSize,
+            resources: performance.getEntriesByType("resource").length};
+}"""
+
+# Errors that mean the page/context/browser is gone rather than the command being wrong
+DEAD_PAGE_ERRORS = ("has been closed", "Target closed", "Target page, context or browser has been closed",
+                    "Browser has been closed", "disconnected")
+
+
+class CommandError(Exception):
+    """A command that can't run as given (unknown action, missing field)."""
+
+
+class PageSlot:
+    """One page in its own context, plus the lock that keeps its commands in order."""
+
+    def __init__(self, slot_id):
+        self.id = slot_id
+        self.context = None
+        self.page = None
+        self.session = None
+        self.lock = asyncio.Lock()
+        self.cdp = None
+        self.blocked = ()
+        self.last_used = 0.0
+        self.commands = 0
+        self.recycles = 0
+
+    @property
+    def busy(self):
+        return self.lock.locked()
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "session": self.session,
+            "busy": self.busy,
+            "url": self.page.url if self.page and not self.page.is_closed() else None,
+            "commands": self.commands,
+            "recycles": self.recycles,
+        }
+
+
+# --- Actions: async (engine, page, command) -> reply text, or (reply, extra result fields) ---
+
+def _require(command, *fields):
+    missing = [f for f in fields if not command.get(f)]
+    if missing:
+        raise CommandError(f"Missing {', '.join(missing)} for {command.get('action')}")
+
+
+async def _goto(engine, page, command):
+    """
+    Navigate with a profile ("profile": full/dom/fast, default
+    engine.default_profile). "selector" waits for that element instead of a
+    load state; "block" adds URL patterns to the profile's blocklist;
+    "front" brings the tab to the front.
+    """
+    _require(command, "target")
+    url = command["target"]
+    if not url.startswith("http"):
+        url = "https://" + url
+    profile_name = command.get("profile") or engine.default_profile
+    profile = NAV_PROFILES.get(profile_name)
+    if profile is None:
+        raise CommandError(f"Unknown navigation profile: {profile_name}")
+
+    patterns = [p for kind in profile["block"] for p in BLOCK_PATTERNS[kind]] + list(command.get("block", ()))
+    await engine.set_blocked_urls(page, patterns)
+    started = time.perf_counter()
+    async with engine.navigations:
+        selector = command.get("selector")
+        await page.goto(url, wait_until="commit" if selector else profile["wait_until"])
+        if selector:
+            await page.locator(selector).first.wait_for(state="attached")
+        elif profile["wait_until"] == "load":
+            await page.wait_for_load_state("load", timeout=5000)
+    timings = {"profile": profile_name, "wall_ms": round((time.perf_counter() - started) * 1000, 1)}
+    try:
+        timings.update(await page.evaluate(NAVIGATION_TIMING_JS) or {})
+    except Exception:
+        pass
+    engine.record_navigation(timings)
+    if command.get("front"):
+        await page.bring_to_front()  # user-facing: show this tab
+    return f"Navigated to {await page.title()}", {"timings": timings}
+
+
+async def _fill(engine, page, command):
+    _require(command, "selector")
+    await page.locator(command["selector"]).fill(command.get("content", ""))
+    return f"Filled '{command['selector']}'"
+
+
+async def _click(engine, page, command):
+    _require(command, "selector")
+    await page.locator(command["selector"]).click()
+    return f"Clicked '{command['selector']}'"
+
+
+async def _press(engine, page, command):
+    _require(command, "selector", "key")
+    await page.locator(command["selector"]).press(command["key"])
+    return f"Pressed '{command['key']}' on '{command['selector']}'"
+
+
+async def _scroll(engine, page, command):
+    direction = command.get("direction", "down")
+    scroll_amount = "window.innerHeight * 0.8"
+    if direction == "up":
+        scroll_amount = f"-{scroll_amount}"
+    await page.evaluate(f"window.scrollBy(0, {scroll_amount})")
+    return f"Scrolled {direction}"
+
+
+async def _click_first_google_result(engine, page, command):
+    # The clickable 'h3' link in a Google search
+    await page.locator("div[id='search'] h3 a").first.click()
+    return "Clicked the first Google result."
+
+
+async def _click_first_youtube_video(engine, page, command):
+    await page.locator("a#video-title").first.click()
+    return "Clicked the first YouTube video."
+
+
+async def _get_title(engine, page, command):
+    return await page.title()
+
+
+async def _wait_for(engine, page, command):
+    _require(command, "selector")
+    await page.locator(command["selector"]).first.wait_for(state=command.get("state", "visible"))
+    return f"'{command['selector']}' is {command.get('state', 'visible')}"
+
+
+async def _wait_for_url(engine, page, command):
+    _require(command, "pattern")
+    await page.wait_for_url(command["pattern"])
+    return f"At {page.url}"
+
+
+async def _adopt(engine, page, command):
+    """Hand this page (e.g. one loaded speculatively) over to session "target" and show it."""
+    _require(command, "target")
+    engine.rename_session(page, command["target"])
+    await page.bring_to_front()
+    return f"Showing {await page.title()}"
+
+
+async def _discard(engine, page, command):
+    """Blank the page and give it back to the pool (undoes a speculative load)."""
+    await page.goto("about:blank")
+    engine.rename_session(page, None)
+    return "Discarded"
+
+
+ACTIONS = {
+    "goto": _goto,
+    "fill": _fill,
+    "click": _click,
+    "press": _press,
+    "scroll": _scroll,
+    "click_first_google_result": _click_first_google_result,
+    "click_first_youtube_video": _click_first_youtube_video,
+    "get_title": _get_title,
+    "wait_for": _wait_for,
+    "wait_for_url": _wait_for_url,
+    "adopt": _adopt,
+    "discard": _discard,
+}
+# Actions on a page the session already has; on any other page they would
+# blank or rename another session's tab
+OWNED_PAGE_ACTIONS = {"adopt", "discard"}
+
+
+def _positive_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def batch_error(steps, deadline=None):
+    """
+    What's wrong with a batch request -> (message, index of the bad step or
+    None), or None if it can run.
+    """
+    if not isinstance(steps, list) or not steps:
+        return "Expected a non-empty 'steps' list", None
+    if deadline is not None and not _positive_number(deadline):
+        return "'deadline' must be a positive number of seconds", None
+    for index, step in enumerate(steps):
+        if not isinstance(step, dict):
+            return f"Step {index} must be an object with an 'action'", index
+        if step.get("action") not in ACTIONS:
+            return f"Unknown action {step.get('action')!r} in step {index}", index
+        if "timeout" in step and not _positive_number(step["timeout"]):
+            return f"Step {index} 'timeout' must be a positive number of seconds", index
+    return None
+
+
+class BrowserEngine:
+    """
+    Async Playwright on a dedicated event-loop thread.
+
+    - `pool_size` pages, each in its own context (created lazily, with the
+      saved login state from `storage_state`).
+    - A session keeps its page until the pool runs out; then the least
+      recently used idle page is handed to the new session.
+    - At most `max_navigations` page loads run at once, so a burst of gotos
+      doesn't starve the commands that only click or type.
+    - A page that is closed, crashed or unresponsive is recycled (new
+      context and page) before the command runs; a command that dies with
+      the page is retried once on a fresh one.
+    - With `user_data_dir`, the pages share one persistent context instead,
+      so logins and the HTTP disk cache survive restarts.
+    - `goto` uses NAV_PROFILES (`default_profile` unless the command picks
+      one) and reports navigation timings.
+
+    Synchronous callers (Flask threads) use `run()`; coroutines can await
+    `execute()` on `engine.loop`.
+    """
+
+    def __init__(self, pool_size=3, max_navigations=2, headless=False, channel="chrome",
+                 storage_state=None, health_check_after=30.0, command_timeout=30.0,
+                 user_data_dir=None, default_profile="full"):
+        self.pool_size = pool_size
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self.channel = channel
+        self.storage_state = storage_state
+        self.health_check_after = health_check_after
+        self.command_timeout = command_timeout
+        self.user_data_dir = user_data_dir
+        self.default_profile = default_profile
+
+        self.loop = None
+        self._thread = None
+        self._playwright = None
+        self.browser = None
+        self.persistent = None      # the shared context when user_data_dir is set
+        self._persistent_closed = False
+        self.slots = []
+        self.navigations = None
+        self._slot_freed = None
+        self._stats = {"commands": 0, "errors": 0, "recycles": 0, "retries": 0, "relaunches": 0}
+        self._navigation_stats = {}  # profile -> {"count", "wall_ms", "dom_ms"}
+
+    # --- Lifecycle (call from any thread) ---
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="browser-engine")
+        self._thread.start()
+        self.call(self._start())
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        try:
+            self.call(self._stop(), timeout=10)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def call(self, coro, timeout=None):
+        """Run a coroutine on the engine loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def run(self, command, session=None):
+        """Execute one command from a synchronous caller. Returns the result dict."""
+        return self.call(self.execute(command, session), timeout=self.command_timeout + 5)
+
+    def run_batch(self, steps, session=None, deadline=None):
+        """Execute a list of steps from a synchronous caller (see execute_batch)."""
+        error = batch_error(steps, deadline)
+        if error:
+            return self._batch_rejected(error)
+        budget = deadline or sum(step.get("timeout", self.command_timeout) for step in steps)
+        return self.call(self.execute_batch(steps, session, deadline), timeout=budget + 5)
+
+    # --- Engine loop ---
+
+    async def _start(self):
+        self.navigations = asyncio.Semaphore(self.max_navigations)
+        self._slot_freed = asyncio.Condition()
+        self.slots = [PageSlot(i) for i in range(self.pool_size)]
+        self._playwright = await async_playwright().start()
+        await self._launch()
+
+    async def _launch(self):
+        options = {"headless": self.headless}
+        if self.channel:
+            options["channel"] = self.channel
+        if self.user_data_dir:
+            self.persistent = await self._playwright.chromium.launch_persistent_context(
+                self.user_data_dir, **options)
+            self._persistent_closed = False
+            self.persistent.on("close", lambda _: setattr(self, "_persistent_closed", True))
+        else:
+            self.browser = await self._playwright.chromium.launch(**options)
+        print(f"[browser_engine]: 🚀 Browser up ({self.pool_size} pages, "
+              f"{self.max_navigations} concurrent navigations, headless={self.headless})")
+
+    async def _stop(self):
+        for slot in self.slots:
+            await self._close_slot(slot)
+        if self.persistent is not None:
+            await self.persistent.close()
+        if self.browser is not None:
+            await self.browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    async def execute(self, command, session=None):
+        """Run `command` on the page for `session`; returns {"status", "reply", ...}."""
+        session = self._session(command, session)
+        if command.get("action") not in ACTIONS:
+            return {"status": "error", "reply": f"Unknown action: {command.get('action')}", "code": 400}
+
+        started = time.perf_counter()
+        slot = await self._acquire(session, owned_only=command["action"] in OWNED_PAGE_ACTIONS)
+        if slot is None:
+            return self._no_page(command, session)
+        try:
+            status, code, reply, extra = await self._run_action(slot, command)
+        finally:
+            await self._release(slot)
+        return {"status": status, "reply": reply, "code": code, "session": session, "page": slot.id,
+                "ms": round((time.perf_counter() - started) * 1000, 1), **extra}
+
+    @staticmethod
+    def _batch_rejected(error):
+        message, index = error
+        return {"status": "error", "code": 400, "steps": [], "reply": message, "step": index}
+
+    async def execute_batch(self, steps, session=None, deadline=None):
+        """
+        Run `steps` in order on one page, holding it for the whole batch.
+
+        Each step is a command plus optional keys:
+          "timeout"    seconds for this step (default: command_timeout)
+          "wait_for"   selector that must be visible before the step runs
+          "if_present" selector; the step is skipped unless it is on the page now
+          "optional"   a failure is recorded but doesn't abort the batch
+        The batch stops at the first failed non-optional step, or when
+        `deadline` seconds have passed. Returns per-step results and timings.
+        """
+        error = batch_error(steps, deadline)
+        if error:
+            return self._batch_rejected(error)
+        session = self._session({}, session)
+
+        started = time.perf_counter()
+        deadline_at = time.monotonic() + deadline if deadline else None
+        results, status = [], "success"
+        slot = await self._acquire(session, owned_only=steps[0].get("action") in OWNED_PAGE_ACTIONS)
+        if slot is None:
+            return {**self._no_page(steps[0], session), "steps": []}
+        try:
+            for index, step in enumerate(steps):
+                step_started = time.perf_counter()
+                timeout = step.get("timeout", self.command_timeout)
+                if deadline_at is not None:
+                    timeout = min(timeout, deadline_at - time.monotonic())
+                    if timeout <= 0:
+                        status = "aborted"
+                        results.append(self._step_result(index, step, "skipped", "Batch deadline reached",
+                                                         step_started))
+                        break
+
+                if step.get("if_present") and not await self._present(slot, step["if_present"]):
+                    results.append(self._step_result(index, step, "skipped",
+                                                     f"'{step['if_present']}' not on the page", step_started))
+                    continue
+
+                step_status, reply, extra = "success", None, {}
+                if step.get("wait_for"):
+                    step_status, _, reply, _ = await self._run_action(
+                        slot, {"action": "wait_for", "selector": step["wait_for"]}, timeout)
+                if step_status == "success":
+                    remaining = timeout - (time.perf_counter() - step_started)
+                    step_status, _, reply, extra = await self._run_action(slot, step, max(remaining, 0.001))
+                results.append({**self._step_result(index, step, step_status, reply, step_started), **extra})
+                if step_status != "success" and not step.get("optional"):
+                    status = "aborted"
+                    break
+        finally:
+            await self._release(slot)
+
+        # The failing step's message if aborted, else the last thing that happened
+        replies = [r["reply"] for r in results if r["status"] == "success"]
+        reply = results[-1]["reply"] if status == "aborted" or not replies else replies[-1]
+        return {"status": status, "code": 200, "session": session, "page": slot.id, "steps": results,
+                "reply": reply,
+                "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    async def _run_action(self, slot, command, timeout=None):
+        """(status, code, reply, extra) for one command on a locked slot; retried once if the page dies."""
+        self._stats["commands"] += 1
+        action = ACTIONS[command["action"]]
+        try:
+            for attempt in range(2):
+                try:
+                    page = await self._ensure_page(slot)
+                    reply = await asyncio.wait_for(action(self, page, command), timeout or self.command_timeout)
+                    reply, extra = reply if isinstance(reply, tuple) else (reply, {})
+                    return "success", 200, reply, extra
+                except CommandError as e:
+                    self._stats["errors"] += 1
+                    return "error", 400, str(e), {}
+                except Exception as e:
+                    if attempt == 0 and self._is_dead_page(e):
+                        print(f"[browser_engine]: ♻️ Page {slot.id} died mid-command; retrying on a fresh one")
+                        self._stats["retries"] += 1
+                        await self._recycle(slot)
+                        continue
+                    self._stats["errors"] += 1
+                    if isinstance(e, asyncio.TimeoutError):
+                        reply = f"Action timed out after {timeout or self.command_timeout:.1f}s"
+                    elif "Timeout" in str(e):
+                        reply = "Action failed: Could not find element. (Timeout)"
+                    else:
+                        reply = str(e)
+                    print(f"[browser_engine]: ❌ Error: {reply}")
+                    return "error", 500, reply, {}
+        finally:
+            slot.commands += 1
+            slot.last_used = time.monotonic()
+
+    async def _present(self, slot, selector):
+        try:
+            page = await self._ensure_page(slot)
+            return await page.locator(selector).count() > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    def _session(command, session):
+        return str(session or command.get("session") or command.get("tab") or DEFAULT_SESSION)
+
+    @staticmethod
+    def _no_page(command, session):
+        return {"status": "error", "code": 409, "session": session,
+                "reply": f"Session '{session}' has no page to {command.get('action')} (it was reused)"}
+
+    @staticmethod
+    def _step_result(index, step, status, reply, started):
+        return {"index": index, "action": step.get("action"), "status": status, "reply": reply,
+                "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    # --- Scheduling ---
+
+    async def _acquire(self, session, owned_only=False):
+        """
+        Lock the page for `session`, waiting for it (or for any free page) if
+        needed. With `owned_only`, None when the session has no page of its
+        own (it lost it to another session) instead of taking another one.
+        """
+        async with self._slot_freed:
+            while True:
+                if owned_only and not any(s.session == session for s in self.slots):
+                    return None
+                slot = self._route(session)
+                if slot is not None and not slot.busy:
+                    await slot.lock.acquire()
+                    slot.session = session
+                    return slot
+                await self._slot_freed.wait()
+
+    def _route(self, session):
+        """The session's own page, else an unused one, else the least recently used idle one."""
+        for slot in self.slots:
+            if slot.session == session:
+                return slot
+        unused = [s for s in self.slots if s.session is None]
+        if unused:
+            return unused[0]
+        idle = [s for s in self.slots if not s.busy]
+        return min(idle, key=lambda s: s.last_used) if idle else None
+
+    def rename_session(self, page, session):
+        """Route `session` to the slot showing `page` (None: the slot becomes unused)."""
+        for slot in self.slots:
+            if slot.page is page:
+                slot.session = session
+            elif session is not None and slot.session == session:
+                slot.session = None  # the session's old page goes back to the pool
+
+    async def _release(self, slot):
+        slot.lock.release()
+        async with self._slot_freed:
+            self._slot_freed.notify_all()
+
+    # --- Navigation ---
+
+    async def set_blocked_urls(self, page, patterns):
+        """Block `patterns` on this page via CDP (unlike page.route(), keeps the HTTP cache)."""
+        slot = next(s for s in self.slots if s.page is page)
+        patterns = tuple(patterns)
+        if patterns == slot.blocked:
+            return
+        if slot.cdp is None:
+            slot.cdp = await slot.page.context.new_cdp_session(slot.page)
+            await slot.cdp.send("Network.enable")
+        await slot.cdp.send("Network.setBlockedURLs", {"urls": list(patterns)})
+        slot.blocked = patterns
+
+    def record_navigation(self, timings):
+        entry = self._navigation_stats.setdefault(timings["profile"], {"count": 0, "wall_ms": 0.0, "dom_ms": 0.0})
+        entry["count"] += 1
+        entry["wall_ms"] += timings["wall_ms"]
+        entry["dom_ms"] += timings.get("dom_ms") or 0.0
+
+    # --- Health ---
+
+    @property
+    def connected(self):
+        if self.user_data_dir:
+            return self.persistent is not None and not self._persistent_closed
+        return self.browser is not None and self.browser.is_connected()
+
+    async def _ensure_page(self, slot):
+        """A usable page for the slot, recycling it (or the browser) if it isn't."""
+        if not self.connected:
+            await self._relaunch()
+        if slot.page is None or slot.page.is_closed():
+            await self._recycle(slot)
+        elif time.monotonic() - slot.last_used > self.health_check_after:
+            try:
+                await asyncio.wait_for(slot.page.evaluate("1"), 2.0)
+            except Exception as e:
+                print(f"[browser_engine]: ⚠️ Page {slot.id} failed its health check ({e})")
+                await self._recycle(slot)
+        return slot.page
+
+    async def _recycle(self, slot):
+        if not self.connected:
+            await self._relaunch()
+        if slot.page is not None:
+            slot.recycles += 1
+            self._stats["recycles"] += 1
+        await self._close_slot(slot)
+        if self.persistent is not None:
+            slot.context = self.persistent
+        else:
+            slot.context = await self.browser.new_context(storage_state=self.storage_state)
+        slot.page = await slot.context.new_page()
+
+    async def _relaunch(self):
+        print("[browser_engine]: ⚠️ Browser disconnected; relaunching")
+        self._stats["relaunches"] += 1
+        for slot in self.slots:
+            slot.context = slot.page = slot.cdp = None
+            slot.blocked = ()
+        await self._launch()
+
+    async def _close_slot(self, slot):
+        """Close the slot's context, or just its page when the context is the shared persistent one."""
+        target = slot.page if slot.context is self.persistent else slot.context
+        if target is not None:
+            try:
+                await target.close()
+            except Exception:
+                pass
+        slot.context = slot.page = slot.cdp = None
+        slot.blocked = ()
+
+    @staticmethod
+    def _is_dead_page(error):
+        return any(marker in str(error) for marker in DEAD_PAGE_ERRORS)
+
+    def stats(self):
+        navigation = {
+            profile: {"count": e["count"], "avg_wall_ms": round(e["wall_ms"] / e["count"], 1),
+                      "avg_dom_ms": round(e["dom_ms"] / e["count"], 1)}
+            for profile, e in self._navigation_stats.items()
+        }
+        return {**self._stats, "navigation": navigation, "pages": [slot.snapshot() for slot in self.slots]}
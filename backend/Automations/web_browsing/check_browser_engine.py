@@ -0,0 +1,124 @@
+# check_browser_engine.py
+# Headless check of the browser engine against a local static HTTP server.
+#
+#   python check_browser_engine.py [--pages 3] [--navigations 2] [--channel chrome]
+#
+# The fixture server answers /slow?ms=N after N milliseconds. The check
+#   1. loads a slow page in several sessions at once and compares the wall
+#      time with running the same loads one after another,
+#   2. runs a quick command in one session while another is stuck in a slow
+#      navigation (it should not wait for it),
+#   3. closes a page behind the engine's back and checks that the next
+#      command on that session recycles it instead of failing,
+#   4. runs a multi-step batch with an optional failing step, a skipped
+#      conditional step and a failing step that aborts the rest.
+# Needs a browser for Playwright (`playwright install chromium`, then
+# --channel "" for the bundled one).
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from browser_engine import BrowserEngine
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        delay_ms = int(parse_qs(url.query).get("ms", ["0"])[0]) if url.path == "/slow" else 0
+        time.sleep(delay_ms / 1000)
+        body = (f"<html><head><title>{url.path} {delay_ms}ms</title></head>"
+                f"<body><input id='q'><button id='go' onclick=\"document.title='clicked'\">go</button>"
+                f"</body></html>").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fixture():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the async browser engine headless.")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--navigations", type=int, default=2)
+    parser.add_argument("--channel", default="", help='browser channel ("" = bundled Chromium)')
+    parser.add_argument("--slow-ms", type=int, default=800)
+    args = parser.parse_args()
+
+    server, base = start_fixture()
+    engine = BrowserEngine(pool_size=args.pages, max_navigations=args.navigations, headless=True,
+                           channel=args.channel or None).start()
+    ok = True
+    slow = {"action": "goto", "target": f"{base}/slow?ms={args.slow_ms}"}
+
+    # 1. Concurrent navigations across sessions vs. one after another
+    sessions = [f"s{i}" for i in range(args.pages)]
+    _, serial_ms = timed(lambda: [engine.run(slow, session=s) for s in sessions])
+    with ThreadPoolExecutor(len(sessions)) as pool:
+        results, parallel_ms = timed(lambda: list(pool.map(lambda s: engine.run(slow, session=s), sessions)))
+    ok &= all(r["status"] == "success" for r in results)
+    print(f"{len(sessions)} slow loads: serial {serial_ms:.0f} ms, concurrent {parallel_ms:.0f} ms "
+          f"(navigation limit {args.navigations}), pages used {sorted({r['page'] for r in results})}")
+
+    # 2. A quick command isn't held up by another session's slow navigation
+    with ThreadPoolExecutor(2) as pool:
+        stuck = pool.submit(engine.run, {"action": "goto", "target": f"{base}/slow?ms=3000"}, "stuck")
+        time.sleep(0.2)
+        quick, quick_ms = timed(engine.run, {"action": "click", "selector": "#go"}, sessions[0])
+        stuck.result()
+    ok &= quick["status"] == "success" and quick_ms < 1000
+    print(f"click during another session's 3 s load: {quick_ms:.0f} ms ({quick['status']})")
+
+    # 3. A page closed behind the engine's back is recycled, not reported as gone
+    slot = next(s for s in engine.slots if s.session == sessions[0])
+    engine.call(slot.page.close())
+    result, ms = timed(engine.run, {"action": "goto", "target": f"{base}/fast"}, sessions[0])
+    ok &= result["status"] == "success"
+    print(f"command after the page was closed: {result['status']} in {ms:.0f} ms "
+          f"({engine.stats()['recycles']} recycle(s))")
+
+    # 4. A multi-step batch in one call; a missing element aborts it at its step timeout
+    batch = engine.run_batch([
+        {"action": "goto", "target": f"{base}/form"},
+        {"action": "fill", "selector": "#q", "content": "lofi", "wait_for": "#q"},
+        {"action": "click", "selector": "#missing", "timeout": 0.5, "optional": True},
+        {"action": "click", "selector": "#cookie-banner", "if_present": "#cookie-banner"},
+        {"action": "click", "selector": "#go"},
+        {"action": "get_title"},
+        {"action": "click", "selector": "#also-missing", "timeout": 0.5},
+        {"action": "get_title"},
+    ], session="batch")
+    for step in batch["steps"]:
+        print(f"  step {step['index']} {step['action']:<10} {step['status']:<8} {step['ms']:7.1f} ms  {step['reply']}")
+    ok &= (batch["status"] == "aborted" and len(batch["steps"]) == 7
+           and batch["steps"][5]["reply"] == "clicked" and batch["steps"][3]["status"] == "skipped")
+    print(f"batch: {batch['status']} after {len(batch['steps'])} steps in {batch['ms']:.0f} ms")
+
+    engine.stop()
+    server.shutdown()
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
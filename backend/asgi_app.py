@@ -0,0 +1,380 @@
+import asyncio
+import json
+import queue
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+# In-flight calls allowed per resource (override with "asgi_limits" in config.json)
+DEFAULT_LIMITS = {
+    "mic": 1,      # one command/wake recording at a time
+    "stt": 2,      # speech-to-text model (CPU bound)
+    "speaker": 2,  # speaker encoder (CPU bound)
+    "llm": 8,      # network-bound LLM calls
+    "desktop": 1,  # keyboard/window automation must not interleave
+    "stream": 4,   # streamed commands being segmented/verified as they arrive
+}
+
+
+class ResourcePool:
+    """
+    A dedicated thread pool for one kind of blocking work, plus a semaphore
+    bounding how much of it runs at once. Requests over the limit wait on the
+    event loop without holding a thread, and a slow resource (the mic, say)
+    never starves the others.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self._executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"asgi-{name}")
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak = 0
+        self.completed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    async def run(self, fn, *args):
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.wait_seconds += started - queued
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.busy_seconds += time.perf_counter() - started
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak": self.peak,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.wait_seconds / max(self.completed, 1) * 1000, 1),
+            "avg_busy_ms": round(self.busy_seconds / max(self.completed, 1) * 1000, 1),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class BodyStream:
+    """
+    File-like view of a request body that is still arriving. The event loop
+    push()es each ASGI body chunk; read() (on a pool thread) blocks until
+    some data is there and returns b"" once the body has ended.
+    """
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self._buffer = b""
+        self._ended = False
+
+    def push(self, data):
+        self._chunks.put(data)
+
+    def end(self):
+        self._chunks.put(None)
+
+    def read(self, n=-1):
+        while not self._buffer and not self._ended:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._ended = True
+            else:
+                self._buffer += chunk
+        if n is None or n < 0:
+            n = len(self._buffer)
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.scope = scope
+        self.body = body
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        self.args = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+
+    def data(self):
+        """JSON or form body as a dict ({} when empty or unparsable)."""
+        content_type = self.headers.get("content-type", "")
+        try:
+            if "application/json" in content_type:
+                return json.loads(self.body or b"{}")
+            if "application/x-www-form-urlencoded" in content_type:
+                return {k: v[-1] for k, v in parse_qs(self.body.decode("utf-8")).items()}
+        except (ValueError, UnicodeDecodeError):
+            pass
+        return {}
+
+
+def flag(value):
+    """Form fields arrive as strings, JSON as booleans."""
+    if isinstance(value, str):
+        return value.lower() == "true"
+    return bool(value)
+
+
+class AsgiApp:
+    """
+    ASGI front end for the backend. `/listen`, `/listen-voice` and
+    `/wakeword` are handled by coroutines that hand each blocking step (mic
+    capture, STT, speaker check, LLM, desktop automation) to its own
+    ResourcePool. `/listen-voice/stream` gets the body chunk by chunk as it
+    arrives (WSGI would buffer the whole upload first). Every other route,
+    and CORS preflights, fall through to the Flask app over WSGI.
+
+    `backend` provides the blocking steps; in production it is the main
+    module, in the load test a stub.
+    """
+
+    def __init__(self, backend, wsgi_app=None, limits=None, wsgi_workers=8):
+        self.backend = backend
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.pools = {name: ResourcePool(name, limit) for name, limit in limits.items()}
+        self.wsgi = WSGIMiddleware(wsgi_app, workers=wsgi_workers) if wsgi_app is not None else None
+        self.routes = {
+            ("POST", "/listen"): self.listen,
+            ("POST", "/listen-voice"): self.listen_voice,
+            ("POST", "/wakeword"): self.wakeword,
+            ("GET", "/stats/asgi"): self.stats,
+        }
+        # Handlers that read the body themselves, as it arrives
+        self.stream_routes = {
+            ("POST", "/listen-voice/stream"): self.listen_voice_stream,
+        }
+        self.started = time.time()
+        self.served = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        route = (scope.get("method"), scope.get("path"))
+        handler = self.routes.get(route)
+        stream_handler = self.stream_routes.get(route)
+        if handler is None and stream_handler is None:
+            if self.wsgi is not None:
+                return await self.wsgi(scope, receive, send)
+            return await self._send_json(scope, send, {"error": "Not found"}, 404)
+
+        try:
+            if stream_handler is not None:
+                payload, status = await stream_handler(Request(scope, None), receive)
+            else:
+                payload, status = await handler(Request(scope, await self._read_body(receive)))
+        except Exception as e:
+            print("Full backend error:\n", traceback.format_exc())
+            payload, status = {"error": f"Internal server error: {str(e)}"}, 500
+        self.served[scope["path"]] = self.served.get(scope["path"], 0) + 1
+        await self._send_json(scope, send, payload, status)
+
+    # --- Routes ---
+
+    async def listen(self, request):
+        user_text = str(request.data().get("text", "")).strip()
+        if not user_text:
+            return {"reply": "⚠️ I didn’t catch that. Could you repeat?"}, 200
+
+        print(f"💬 Text command: {user_text}")
+        decision, reply_text = await self._act(user_text)
+        if reply_text is None:
+            reply_text = decision.get("reply", "") or "I'm here and listening."
+        return {"reply": reply_text}, 200
+
+    async def listen_voice(self, request):
+        backend = self.backend
+        data = request.data()
+        verify_voice = flag(data.get("verify_voice", False))
+        username = data.get("username") or backend.DEFAULT_SPEAKER
+
+        if backend.needs_enrollment(verify_voice, flag(data.get("enroll", False))):
+            refusal = await self.pools["mic"].run(
+                backend.authorize_enrollment, username, flag(data.get("overwrite", False)))
+            if refusal is not None:
+                return refusal
+            audio = await self.pools["mic"].run(backend.record_enrollment, username)
+            try:
+                return await self.pools["speaker"].run(backend.enroll_speaker, audio, username), 200
+            except Exception as e:
+                print("Enrollment failed:", e)
+                return {"error": "Voice enrollment failed.", "details": str(e)}, 500
+
+        audio, verifier, speculation = await self.pools["mic"].run(backend.capture_command, verify_voice)
+        if verifier is not None and verifier.decision == "reject":
+            return {"error": "Voice not recognized"}, 403
+        if audio is None:
+            return {"error": "No speech detected. Please try again."}, 400
+        return await self._process_voice(audio, verify_voice, verifier, speculation)
+
+    async def listen_voice_stream(self, request, receive):
+        backend = self.backend
+        args = request.args
+        verify_voice = flag(args.get("verify_voice", "false"))
+        enroll = flag(args.get("enroll", "false"))
+        username = args.get("username") or backend.DEFAULT_SPEAKER
+
+        # Segmentation reads the body on a pool thread while the loop keeps
+        # receiving it, so end of speech is found before the upload finishes
+        body = BodyStream()
+        pump = asyncio.ensure_future(self._pump_body(receive, body))
+        try:
+            audio, verifier, speculation, info, error = await self.pools["stream"].run(
+                backend.capture_stream, body, verify_voice, enroll, int(args.get("sample_rate", 16000)))
+        finally:
+            pump.cancel()
+        if error is not None:
+            return error
+
+        if backend.needs_enrollment(verify_voice, enroll):
+            refusal = await self.pools["speaker"].run(
+                backend.authorize_enrollment, username, flag(args.get("overwrite", "false")), audio)
+            if refusal is not None:
+                return refusal
+            try:
+                return await self.pools["speaker"].run(backend.enroll_speaker, audio, username), 200
+            except Exception as e:
+                print("Enrollment failed:", e)
+                return {"error": "Voice enrollment failed.", "details": str(e)}, 500
+
+        return await self._process_voice(audio, verify_voice, verifier, speculation, extra={"stream": info})
+
+    async def _process_voice(self, audio, verify_voice, verifier, speculation=None, extra=None):
+        """Verify (optionally), transcribe and act on one captured utterance."""
+        backend = self.backend
+        transcription = asyncio.ensure_future(self.pools["stt"].run(backend.transcribe_audio, audio))
+        speaker = None
+        if verify_voice:
+            speaker, _ = await self.pools["speaker"].run(backend.verify_speaker, audio, verifier)
+            if speaker is None:
+                transcription.cancel()
+                backend.settle_speculation(speculation)
+                return {"error": "Voice not recognized"}, 403
+
+        try:
+            user_text = await transcription
+        except backend.TranscriptionError as e:
+            print(f"❌ Speech recognition service error: {e}")
+            backend.settle_speculation(speculation)
+            return {"error": "Speech recognition service unavailable. Check your internet connection."}, 503
+        if not user_text:
+            backend.settle_speculation(speculation)
+            return {"error": "Sorry, I couldn’t understand what you said. Please try again."}, 400
+        print(f"🗣️ You said: {user_text}")
+
+        decision, reply_text = await self._act(user_text, speculation)
+        reply = decision.get("reply", "")
+        if reply_text is None:
+            reply_text = reply if reply and reply.strip() else "I'm not sure what to do yet."
+        result = {"text": user_text, "reply": reply_text, "action": str(decision.get("action", "none")).lower()}
+        if speaker:
+            result["speaker"] = speaker
+        if extra:
+            result.update(extra)
+        return result, 200
+
+    async def wakeword(self, request):
+        backend = self.backend
+        try:
+            audio = await self.pools["mic"].run(backend.capture_wake_phrase)
+            if audio is None:
+                return {"wakeword_detected": False, "error": "no speech detected"}, 200
+            text = (await self.pools["stt"].run(backend.transcribe_audio, audio)).lower()
+            if not text:
+                return {"wakeword_detected": False, "error": "no speech detected"}, 200
+            print(f"🗣️ Heard → {text}")
+
+            decision, unsure = backend.classify_wake(text)
+            if unsure:
+                decision = await self.pools["llm"].run(backend.ask_gemini_for_wake, text) or decision
+            return {"wakeword_detected": decision["wake"], "text": text, "reason": decision["reason"]}, 200
+        except Exception as e:
+            print("❌ Wakeword detection failed:", e)
+            return {"wakeword_detected": False, "error": str(e)}, 200
+
+    async def stats(self, request):
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "served": self.served,
+            "pools": {name: pool.stats() for name, pool in self.pools.items()},
+        }, 200
+
+    async def _act(self, user_text, speculation=None):
+        """Decide (LLM pool) and run (desktop pool) -> (decision, reply text or None)."""
+        decision = await self.pools["llm"].run(self.backend.decide_action, user_text)
+        # A plain chat reply has nothing to automate, but dispatch_action still
+        # has to settle any speculative prep, so it runs outside the desktop pool
+        pool = "llm" if str(decision.get("action", "none")).lower() == "none" else "desktop"
+        reply_text = await self.pools[pool].run(self.backend.dispatch_action, decision, speculation)
+        return decision, reply_text
+
+    # --- ASGI plumbing ---
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for pool in self.pools.values():
+                    pool.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _pump_body(receive, body):
+        """Hand body chunks to `body` as they arrive, until it ends or the client goes away."""
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                if message.get("body"):
+                    body.push(message["body"])
+                if not message.get("more_body", False):
+                    return
+        finally:
+            body.end()
+
+    @staticmethod
+    async def _read_body(receive):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                return body
+
+    @staticmethod
+    async def _send_json(scope, send, payload, status):
+        body = json.dumps(payload).encode("utf-8")
+        origin = next((v for k, v in scope.get("headers", []) if k.lower() == b"origin"), b"*")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                # Same policy as flask_cors in main.py
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"vary", b"Origin"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,110 @@
+# bench_llm_client.py
+# Tail-latency and failover check for the LLM client against the local stub.
+#
+#   python bench_llm_client.py --calls 200 --outlier-rate 0.05
+#
+# 1. Latency: the same workload (base latency plus rare multi-second
+#    outliers) with hedging off and on; prints p50/p95/p99/max.
+# 2. Streaming: time to first chunk and to the complete JSON decision.
+# 3. Outage: the stub fails every request; the circuit breaker should open
+#    after a few calls and later calls should be refused in microseconds,
+#    then close again once the stub recovers.
+
+import argparse
+import statistics
+import time
+
+from json_stream import IncrementalJSONParser
+from llm_client import GeminiClient, CircuitBreaker, LLMError, LLMUnavailable
+from llm_stub_server import start_in_thread
+
+PROMPT = "You are VocalAI...\n\nUser: what's the weather like"
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+    return (f"p50 {statistics.median(ordered) * 1000:6.0f} ms  p95 {pick(95):6.0f} ms  "
+            f"p99 {pick(99):6.0f} ms  max {ordered[-1] * 1000:6.0f} ms")
+
+
+def make_client(base_url, **options):
+    return GeminiClient("stub-key", base_url=base_url, **options)
+
+
+def run_calls(client, calls):
+    latencies, failures = [], 0
+    for _ in range(calls):
+        started = time.perf_counter()
+        try:
+            client.generate(PROMPT)
+            latencies.append(time.perf_counter() - started)
+        except LLMError:
+            failures += 1
+    return latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM client against the local stub.")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--outlier-rate", type=float, default=0.05)
+    parser.add_argument("--outlier-latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server = start_in_thread(latency=args.latency, jitter=args.latency * 0.2,
+                             outlier_rate=args.outlier_rate, outlier_latency=args.outlier_latency)
+    base_url = f"http://127.0.0.1:{server.server_port}/v1beta"
+    print(f"Stub at {base_url}: {args.latency * 1000:.0f} ms base, "
+          f"{args.outlier_rate:.0%} outliers at {args.outlier_latency:.1f}s\n")
+
+    print("== Latency (generate) ==")
+    for hedge in (False, True):
+        client = make_client(base_url, hedge=hedge, deadline=10.0)
+        latencies, failures = run_calls(client, args.calls)
+        stats = client.stats()
+        print(f"hedge {'on ' if hedge else 'off'}  {percentiles(latencies)}  failures {failures}  "
+              f"hedged {stats['hedged']} (won {stats['hedge_wins']})")
+
+    print("\n== Streaming ==")
+    client = make_client(base_url)
+    first, full = [], []
+    for _ in range(min(args.calls, 50)):
+        started = time.perf_counter()
+        parser_ = IncrementalJSONParser()
+        got_first = False
+        for chunk in client.stream("User: write a paragraph about the weather"):
+            if not got_first:
+                first.append(time.perf_counter() - started)
+                got_first = True
+            parser_.feed(chunk)
+        assert parser_.complete, parser_.buffer
+        full.append(time.perf_counter() - started)
+    print(f"first chunk   {percentiles(first)}")
+    print(f"full decision {percentiles(full)}")
+
+    print("\n== Outage and recovery ==")
+    server.state.config.update(fail_rate=1.0, latency=0.05, outlier_rate=0.0)
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=1.0)
+    client = make_client(base_url, breaker=breaker, hedge=False)
+    for i in range(6):
+        started = time.perf_counter()
+        try:
+            client.generate(PROMPT)
+            outcome = "ok"
+        except LLMUnavailable as e:
+            outcome = f"unavailable ({e})"
+        except LLMError as e:
+            outcome = f"error ({str(e)[:30]})"
+        print(f"call {i + 1}: {outcome:<45} {(time.perf_counter() - started) * 1000:7.1f} ms  "
+              f"breaker {breaker.state}")
+
+    server.state.config.update(fail_rate=0.0)
+    time.sleep(breaker.reset_seconds)
+    client.generate(PROMPT)
+    print(f"after recovery: breaker {breaker.state} ({breaker.trips} trip(s))")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
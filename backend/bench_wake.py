@@ -0,0 +1,117 @@
+# bench_wake.py
+# CPU-usage and detection-latency benchmark for the local wake-word spotter.
+#
+#   python bench_wake.py fixtures/wake
+#
+# Every *.wav in the folder (16 kHz mono) is replayed through WakeWordSpotter
+# in 30 ms frames. Files are expected to contain the wake word if their name
+# contains "wake"; an optional labels.json ({"file.wav": {"wake": true,
+# "wake_end": 1.42}}) gives the time the wake word ends for latency numbers.
+# A synthetic stretch of room noise measures the idle (VAD-gated) cost.
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import numpy as np
+import soundfile as sf
+
+from settings import load_settings, ROOT_DIR
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+from stt_engine import create_engine
+from wake_spotter import WakeWordSpotter
+
+FRAME = 480
+
+
+def replay(spotter, audio):
+    """Feed audio frame by frame. Returns (detections, cpu_seconds)."""
+    detections = []
+    cpu_start = time.process_time()
+    for i in range(0, len(audio), FRAME):
+        detection = spotter.feed(audio[i:i + FRAME])
+        if detection:
+            detections.append(detection)
+    return detections, time.process_time() - cpu_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local wake-word spotter.")
+    parser.add_argument("fixtures", help="Folder of 16 kHz mono WAV files")
+    parser.add_argument("--model", default=None, help="faster-whisper model (default: wake_model or tiny.en)")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--idle-seconds", type=float, default=60.0)
+    args = parser.parse_args()
+
+    settings = load_settings()
+    wake_word = settings.get("wake_word", "friday")
+    engine = create_engine({
+        **settings,
+        "stt_engine": "faster_whisper",
+        "stt_model": args.model or settings.get("wake_model", "tiny.en"),
+        "stt_cpu_threads": args.threads or settings.get("wake_cpu_threads", 2),
+    })
+    engine.load()
+
+    labels_path = os.path.join(args.fixtures, "labels.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = json.load(f)
+
+    def new_spotter():
+        return WakeWordSpotter(wake_word, engine, end_pause=settings.get("wake_pause", 0.7))
+
+    # --- Idle cost: quiet room noise should never reach the decoder ---
+    rng = np.random.default_rng(0)
+    idle = (rng.standard_normal(int(args.idle_seconds * 16000)) * 0.002).astype(np.float32)
+    spotter = new_spotter()
+    _, cpu = replay(spotter, idle)
+    print(f"Idle {args.idle_seconds:.0f}s: CPU {cpu:.3f}s ({100 * cpu / args.idle_seconds:.2f}% of one core), "
+          f"{spotter.decodes} decodes")
+
+    # --- Fixtures ---
+    print(f"\n{'file':30} {'expected':>8} {'detected':>8} {'latency_ms':>10} {'decode_ms':>9} {'cpu%':>6}")
+    hits = misses = false_alarms = 0
+    latencies = []
+    for path in sorted(glob.glob(os.path.join(args.fixtures, "*.wav"))):
+        name = os.path.basename(path)
+        audio, rate = sf.read(path, dtype="float32")
+        if rate != 16000 or audio.ndim != 1:
+            print(f"{name:30} skipped (needs 16 kHz mono)")
+            continue
+
+        label = labels.get(name, {})
+        expected = label.get("wake", "wake" in name.lower())
+        spotter = new_spotter()
+        detections, cpu = replay(spotter, audio)
+        detected = bool(detections)
+
+        latency = ""
+        if detected and "wake_end" in label:
+            first = detections[0]
+            latency_ms = (first["stream_time"] - label["wake_end"]) * 1000 + first["decode_ms"]
+            latencies.append(latency_ms)
+            latency = f"{latency_ms:.0f}"
+        decode = f"{detections[0]['decode_ms']:.0f}" if detected else ""
+
+        if expected and detected:
+            hits += 1
+        elif expected:
+            misses += 1
+        elif detected:
+            false_alarms += 1
+
+        duration = len(audio) / rate
+        print(f"{name:30} {str(expected):>8} {str(detected):>8} {latency:>10} {decode:>9} "
+              f"{100 * cpu / duration:>6.1f}")
+
+    print(f"\nHits {hits}, misses {misses}, false alarms {false_alarms}")
+    if latencies:
+        print(f"Detection latency: median {np.median(latencies):.0f} ms, max {max(latencies):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
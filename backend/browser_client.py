@@ -0,0 +1,126 @@
+import itertools
+import time
+import urllib.parse
+
+import requests
+
+from llm_client import CircuitBreaker
+
+DEFAULT_SERVICE_URL = "http://127.0.0.1:5001"
+
+
+class BrowserServiceError(Exception):
+    """The service was reached but the command failed or didn't answer in time."""
+
+
+def gmail_compose_url(to, subject, body):
+    return (
+        f"https://mail.google.com/mail/?view=cm&fs=1"
+        f"&to={urllib.parse.quote(to or '')}&su={urllib.parse.quote(subject or '')}"
+        f"&body={urllib.parse.quote(body or '')}"
+    )
+
+
+def tab_session(url):
+    """One tab per site: opening the same site again reuses its tab."""
+    host = urllib.parse.urlparse(url if "://" in url else "https://" + url).hostname or url
+    return "web:" + host.removeprefix("www.")
+
+
+class BrowserServiceClient:
+    """
+    Sends browser actions to the Playwright service (playwright_service.py),
+    whose Chromium is already running and logged in, instead of starting a
+    browser process per command.
+
+    Every method returns the service's reply text, or None when the service
+    can't be reached (connection refused or connect timeout), in which case
+    the caller uses its old path. Once the service has the command it may
+    already have shown the page, so a reply timeout or a failed command
+    raises BrowserServiceError instead: opening the page a second time
+    elsewhere would duplicate it. A breaker stops trying an unreachable
+    service for `retry_after` seconds, so the fallback costs one fast
+    refused connection, not a timeout per command.
+    """
+
+    def __init__(self, base_url=DEFAULT_SERVICE_URL, timeout=10.0, connect_timeout=0.3,
+                 retry_after=30.0, profile="dom"):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.profile = profile
+        self.session = requests.Session()
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=retry_after)
+        self._prefetches = itertools.count(1)  # keeps concurrent prefetches of one site apart
+        self._stats = {"calls": 0, "served": 0, "fallbacks": 0, "errors": 0, "ms": 0.0}
+
+    def open_tab(self, url, session=None):
+        """Show `url` in the service's browser (in the site's tab, brought to the front)."""
+        return self.execute({"action": "goto", "target": url, "profile": self.profile, "front": True},
+                            session or tab_session(url))
+
+    def prefetch_tab(self, url):
+        """
+        Load `url` in a background tab of its own. Returns that tab's session
+        for adopt_tab() / discard_tab(), or None.
+        """
+        session = f"speculative:{next(self._prefetches)}:{tab_session(url)}"
+        try:
+            reply = self.execute({"action": "goto", "target": url, "profile": self.profile}, session)
+        except BrowserServiceError:
+            return None  # only a head start; the real command loads it normally
+        return session if reply is not None else None
+
+    def adopt_tab(self, prefetched, url):
+        """Show a prefetched tab; it becomes the site's tab from now on."""
+        return self.execute({"action": "adopt", "target": tab_session(url)}, prefetched)
+
+    def discard_tab(self, prefetched):
+        return self.execute({"action": "discard"}, prefetched)
+
+    def compose_email(self, to, subject, body):
+        reply = self.open_tab(gmail_compose_url(to, subject, body), session="email")
+        return reply and f"📨 Composing an email to {to or 'recipient'} in your browser."
+
+    def execute(self, command, session=None):
+        """Reply text; None if the service can't be reached. Raises BrowserServiceError."""
+        self._stats["calls"] += 1
+        if not self.breaker.allow():
+            self._stats["fallbacks"] += 1
+            return None
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/execute", json={**command, "session": session},
+                timeout=(self.connect_timeout, self.timeout),
+            )
+        except requests.ConnectionError as e:  # includes ConnectTimeout
+            print(f"⚠️ Browser service unavailable ({type(e).__name__}); using the fallback")
+            self.breaker.record_failure()
+            self._stats["fallbacks"] += 1
+            return None
+        except requests.RequestException as e:
+            # Read timeout: the service is up and may still be carrying the command out
+            self._stats["errors"] += 1
+            raise BrowserServiceError(f"no reply within {self.timeout:.0f}s ({type(e).__name__})") from e
+
+        self.breaker.record_success()
+        try:
+            result = response.json()
+        except ValueError as e:
+            self._stats["errors"] += 1
+            raise BrowserServiceError(f"unreadable reply (HTTP {response.status_code})") from e
+        if result.get("status") != "success":
+            self._stats["errors"] += 1
+            raise BrowserServiceError(f"couldn't {command.get('action')}: {result.get('reply')}")
+        self._stats["served"] += 1
+        self._stats["ms"] += (time.perf_counter() - started) * 1000
+        return result.get("reply", "")
+
+    def stats(self):
+        return {
+            **self._stats,
+            "ms": round(self._stats["ms"], 1),
+            "avg_ms": round(self._stats["ms"] / max(self._stats["served"], 1), 1),
+            "breaker": self.breaker.snapshot(),
+        }
@@ -0,0 +1,110 @@
+# check_llm_contract.py
+# Runs the same prompts through every LLM backend and checks each reply
+# against the JSON action contract in prompts.py.
+#
+#   python check_llm_contract.py                      # both backends vs. the local stub
+#   python check_llm_contract.py --ollama-host http://127.0.0.1:11434 --ollama-model llama3.2:3b
+#
+# By default both clients talk to llm_stub_server (Gemini and Ollama
+# endpoints on one port), so the check needs no credentials or network.
+# Pointing --ollama-host at a real Ollama server checks a real local model
+# against the same contract. Exits non-zero if any reply breaks it.
+
+import argparse
+import sys
+import time
+
+from json_stream import IncrementalJSONParser
+from llm_client import GeminiClient, OllamaClient, LLMError
+from llm_stub_server import start_in_thread
+from prompts import (ACTION_SYSTEM_PROMPT, WAKE_SYSTEM_PROMPT, action_prompt, wake_prompt,
+                     contract_errors, wake_contract_errors)
+
+WINDOWS = ["Untitled - Notepad", "Inbox - Mail"]
+
+ACTION_CASES = [
+    ("open youtube", "open_browser"),
+    ("open calculator", "open_app"),
+    ("write a paragraph about the weather in notepad", "write_text"),
+    ("send an email to my professor about my project", "compose_email"),
+    ("what time is it", None),  # any valid action
+]
+
+WAKE_CASES = [("hey computer", True), ("the weather is nice today", False)]
+
+
+def parse(text):
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.result() if parser.complete else None
+
+
+def check_backend(name, client, strict_actions):
+    failures = 0
+    for utterance, expected in ACTION_CASES:
+        for mode in ("generate", "stream"):
+            prompt = action_prompt(utterance, WINDOWS)
+            started = time.perf_counter()
+            try:
+                if mode == "generate":
+                    text = client.generate(prompt, system=ACTION_SYSTEM_PROMPT)
+                else:
+                    text = "".join(client.stream(prompt, system=ACTION_SYSTEM_PROMPT))
+            except LLMError as e:
+                errors = [f"request failed: {e}"]
+                decision = None
+            else:
+                decision = parse(text)
+                errors = contract_errors(decision) if decision is not None else ["no complete JSON object"]
+                if not errors and strict_actions and expected and decision["action"] != expected:
+                    errors = [f"expected {expected}, got {decision['action']}"]
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            failures += bool(errors)
+            status = "ok  " if not errors else "FAIL"
+            action = decision.get("action") if isinstance(decision, dict) else "-"
+            print(f"  {status} {mode:<8} {utterance[:40]:<42} → {action:<14} {elapsed_ms:6.0f} ms"
+                  + (f"  {'; '.join(errors)}" if errors else ""))
+
+    for utterance, expected in WAKE_CASES:
+        try:
+            decision = parse(client.generate(wake_prompt(utterance), system=WAKE_SYSTEM_PROMPT))
+            errors = wake_contract_errors(decision)
+            if not errors and strict_actions and decision["wake"] != expected:
+                errors = [f"expected wake={expected}"]
+        except LLMError as e:
+            errors = [f"request failed: {e}"]
+        failures += bool(errors)
+        print(f"  {'ok  ' if not errors else 'FAIL'} wake     {utterance:<42}"
+              + (f"  {'; '.join(errors)}" if errors else ""))
+    print(f"{name}: {failures} failure(s)\n")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every LLM backend against the JSON action contract.")
+    parser.add_argument("--ollama-host", help="real Ollama server (default: the local stub)")
+    parser.add_argument("--ollama-model", default="llama3.2:3b")
+    parser.add_argument("--fences", action="store_true", help="stub wraps replies in ```json fences")
+    args = parser.parse_args()
+
+    server = start_in_thread(latency=0.05, jitter=0.01, chunk_delay=0.005, fences=args.fences)
+    stub = f"http://127.0.0.1:{server.server_port}"
+    print(f"LLM stub at {stub}\n")
+
+    backends = [
+        ("gemini (stub)", GeminiClient("stub-key", base_url=stub + "/v1beta", deadline=5.0), True),
+        (f"ollama ({args.ollama_host or 'stub'})",
+         OllamaClient(args.ollama_model, host=args.ollama_host or stub, deadline=60.0 if args.ollama_host else 5.0),
+         # a real model may pick a different (still valid) action
+         args.ollama_host is None),
+    ]
+    failures = 0
+    for name, client, strict in backends:
+        print(f"== {name} ==")
+        failures += check_backend(name, client, strict)
+    server.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# check_wake_classifier.py
+# Runs the local wake-phrase classifier over labelled transcripts.
+#
+#   python check_wake_classifier.py
+#
+# Each case is scored the way /wakeword does (anchored transcript) and the
+# way WakeWordSpotter does (a rolling window that can start mid-sentence,
+# no bare greetings, confidence >= its match_threshold). The negatives are
+# everyday words that share the wake word's Soundex code (F630 for
+# "friday"). Exits non-zero if any case is decided the wrong way.
+
+import sys
+
+from wake_classifier import WakePhraseClassifier
+
+WAKE_WORD = "friday"
+SPOTTER_THRESHOLD = 0.75  # WakeWordSpotter's default match_threshold
+
+# (transcript, should wake for /wakeword, should wake for the spotter)
+CASES = [
+    ("friday", True, True),
+    ("hey friday", True, True),
+    ("friday open notepad", True, True),
+    ("fryday open chrome", True, True),
+    ("firday are you there", True, True),
+    ("hello computer", True, True),
+    ("hello", True, False),
+    ("so anyway friday can you open chrome", True, True),
+    ("forty five minutes", False, False),
+    ("fired up", False, False),
+    ("ford focus", False, False),
+    ("fried chicken", False, False),
+    ("freddy said hi", False, False),
+    ("for the record", False, False),
+    ("first day of school", False, False),
+    ("open the folder", False, False),
+]
+
+
+def main():
+    route = WakePhraseClassifier(WAKE_WORD)
+    spotter = WakePhraseClassifier(WAKE_WORD, allow_bare_greeting=False)
+
+    failures = 0
+    for text, route_expected, spotter_expected in CASES:
+        routed = route.classify(text)
+        spotted = spotter.classify(text, anchored=False)
+        spotter_wake = spotted["wake"] and spotted["confidence"] >= SPOTTER_THRESHOLD
+        ok = routed["wake"] == route_expected and spotter_wake == spotter_expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {text!r:42} /wakeword {str(routed['wake']):5} "
+              f"({routed['confidence']:.3f})  spotter {str(spotter_wake):5} ({spotted['confidence']:.3f})")
+
+    print(f"\n{len(CASES) - failures}/{len(CASES)} cases decided as expected")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
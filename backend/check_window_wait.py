@@ -0,0 +1,59 @@
+# check_window_wait.py
+# Runs the window waits against scripted windows (no desktop needed).
+#
+#   python check_window_wait.py
+#
+# Each scenario scripts when the target window appears and gets focus with
+# FakeWindowProvider, then waits for it the way prepare_app_window does.
+# Prints how long each wait took and how many enumerations it needed, next
+# to what the old fixed sleeps would have cost. Exits non-zero if a wait
+# finds the wrong thing or misses its deadline by more than one poll.
+
+import sys
+
+from window_context import WindowIndex, FakeWindowProvider
+from window_wait import WindowWaiter
+
+TARGET = "notepad"
+TITLE = "Untitled - Notepad"
+
+# (name, how the windows behave, should find it, old fixed-sleep cost in ms)
+SCENARIOS = [
+    ("already open + focused", lambda p: p.open(TITLE), True, 1000),
+    ("open, focus after 150 ms", lambda p: p.open(TITLE, focus=False).focus(TITLE, after=0.15), True, 1000),
+    ("launched, appears after 800 ms", lambda p: p.open(TITLE, after=0.8), True, 4000),
+    ("launched, appears after 3.2 s", lambda p: p.open(TITLE, after=3.2), True, 4500),
+    ("never appears", lambda p: None, False, 9500),
+]
+
+
+def run(name, script, should_find, old_ms, launch_timeout=5.0):
+    provider = FakeWindowProvider()
+    provider.open("Inbox - Mail")
+    script(provider)
+    index = WindowIndex(provider)
+    waiter = WindowWaiter(index)
+
+    found = waiter.window(TARGET, timeout=0)
+    if found.found is None:
+        found = waiter.window(TARGET, timeout=launch_timeout)
+    focus = waiter.focus(TARGET, timeout=2.0) if found.found else None
+
+    total = found.waited_ms + (focus.waited_ms if focus else 0)
+    ok = (found.found is not None) == should_find and (focus is None or focus.found is not None)
+    if not should_find:
+        # A timeout may overshoot by at most the last backoff interval
+        ok = ok and launch_timeout * 1000 <= total <= launch_timeout * 1000 + waiter.max_interval * 1000 + 50
+    focus_ms = f"{focus.waited_ms:6.0f} ms" if focus else "     -   "
+    print(f"{'ok  ' if ok else 'FAIL'} {name:<32} window {found.waited_ms:6.0f} ms  focus {focus_ms}  "
+          f"total {total:6.0f} ms (old ≈ {old_ms} ms)  enumerations {provider.calls}")
+    return ok
+
+
+def main():
+    results = [run(*scenario) for scenario in SCENARIOS]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
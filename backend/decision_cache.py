@@ -0,0 +1,147 @@
+import atexit
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Actions whose payload is freshly generated text; caching them would replay
+# the same email/paragraph/chat reply every time.
+DEFAULT_BYPASS_ACTIONS = ("write_text", "append_text", "compose_email", "none")
+
+
+class DecisionCache:
+    """
+    LRU + TTL cache for LLM action decisions.
+
+    Keys are the normalized transcript plus a digest of the context the prompt
+    was built from (e.g. the open-window list), so the same words in a
+    different situation still go to the model. Optionally persisted to a JSON
+    file so repeat commands stay fast across restarts.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=6 * 3600, path=None,
+                 bypass_actions=DEFAULT_BYPASS_ACTIONS, save_interval=5.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.bypass_actions = set(bypass_actions)
+        self.save_interval = save_interval
+
+        self._entries = OrderedDict()  # key -> (stored_at, decision)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "bypassed": 0}
+
+        if self.path:
+            self._load()
+            atexit.register(self.save)
+
+    # --- Keys ---
+
+    @staticmethod
+    def normalize(text):
+        text = re.sub(r"[^\w@.\s]+", " ", text.lower())
+        return re.sub(r"\s+", " ", text).strip(" .")
+
+    @staticmethod
+    def context_digest(context):
+        """Order-insensitive digest of a list of context strings (window titles...)."""
+        blob = json.dumps(sorted(set(context or [])), ensure_ascii=False)
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+    def make_key(self, text, context=None):
+        return f"{self.normalize(text)}|{self.context_digest(context)}"
+
+    # --- Lookup / store ---
+
+    def get(self, text, context=None):
+        key = self.make_key(text, context)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            stored_at, decision = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._dirty = True
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return copy.deepcopy(decision)
+
+    def put(self, text, context, decision):
+        action = str(decision.get("action", "none")).lower()
+        if action in self.bypass_actions:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return False
+
+        key = self.make_key(text, context)
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(decision))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._dirty = True
+            should_save = self.path and time.time() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+        self.save()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+    # --- Persistence ---
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not read decision cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, stored_at, decision in rows[-self.max_entries:]:
+            if now - stored_at <= self.ttl_seconds:
+                self._entries[key] = (stored_at, decision)
+        print(f"💾 Loaded {len(self._entries)} cached decisions.")
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [[key, stored_at, decision] for key, (stored_at, decision) in self._entries.items()]
+            self._dirty = False
+            self._last_save = time.time()
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ Could not write decision cache {self.path}: {e}")
@@ -0,0 +1,173 @@
+import glob
+import json
+import os
+import pickle
+import threading
+import time
+import numpy as np
+
+INDEX_FILE = "speakers.json"
+
+
+class EmbeddingStore:
+    """
+    All enrolled speakers in one L2-normalized float32 matrix.
+
+    On disk: `speakers.json` (names, per-user thresholds and the current
+    matrix file) plus `embeddings-<version>.npy`, memory-mapped read-only.
+    Adding or removing a user writes a new matrix file and then atomically
+    replaces the index, so readers (and a crash mid-write) only ever see the
+    old or the new set of users. Identification is one matrix-vector
+    product, whatever the number of users.
+    """
+
+    def __init__(self, profile_dir="voice_profiles", default_threshold=0.65):
+        self.profile_dir = profile_dir
+        self.default_threshold = default_threshold
+        os.makedirs(self.profile_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # (names, matrix, thresholds) swapped as one object so readers never mix versions
+        self._state = ([], np.zeros((0, 0), dtype=np.float32), {})
+        self._matrix_file = None
+        self._load()
+
+    # --- Persistence ---
+
+    def _index_path(self):
+        return os.path.join(self.profile_dir, INDEX_FILE)
+
+    def _load(self):
+        path = self._index_path()
+        if not os.path.exists(path):
+            self._migrate_pickles()
+            return
+        with open(path, "r") as f:
+            index = json.load(f)
+        matrix_path = os.path.join(self.profile_dir, index["matrix"])
+        self._state = (index["names"], np.load(matrix_path, mmap_mode="r"), index.get("thresholds", {}))
+        self._matrix_file = index["matrix"]
+        print(f"Loaded {len(index['names'])} enrolled speaker(s) from {path}")
+
+    def _migrate_pickles(self):
+        """One-time import of the old one-pickle-per-user profiles."""
+        legacy = sorted(glob.glob(os.path.join(self.profile_dir, "*.pkl")))
+        if not legacy:
+            return
+        names, vectors = [], []
+        for pkl_path in legacy:
+            with open(pkl_path, "rb") as f:
+                vectors.append(np.asarray(pickle.load(f), dtype=np.float32))
+            names.append(os.path.splitext(os.path.basename(pkl_path))[0])
+        self._commit(names, np.stack(vectors), {})
+        print(f"Migrated {len(names)} pickle profile(s) into {self._index_path()}")
+
+    def _commit(self, names, matrix, thresholds):
+        """Write a new matrix version, then swap the index in with os.replace."""
+        matrix = self._normalize(matrix)
+        matrix_file = f"embeddings-{time.time_ns()}.npy"
+        np.save(os.path.join(self.profile_dir, matrix_file), matrix)
+
+        index = {"names": names, "thresholds": thresholds, "matrix": matrix_file,
+                 "dim": int(matrix.shape[1]) if matrix.size else 0}
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self._index_path())
+
+        old_file = self._matrix_file
+        mapped = np.load(os.path.join(self.profile_dir, matrix_file), mmap_mode="r")
+        self._state = (list(names), mapped, dict(thresholds))
+        self._matrix_file = matrix_file
+        if old_file and old_file != matrix_file:
+            try:
+                os.remove(os.path.join(self.profile_dir, old_file))
+            except OSError:
+                pass  # still mapped on Windows; harmless leftover
+
+    @staticmethod
+    def _normalize(matrix):
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+        if matrix.size == 0:
+            return matrix
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-10)
+
+    # --- Enrollment ---
+
+    @property
+    def names(self):
+        return list(self._state[0])
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def __contains__(self, name):
+        return name in self._state[0]
+
+    def add(self, name, embedding, threshold=None):
+        """Enroll (or re-enroll) `name`."""
+        with self._lock:
+            names, matrix, thresholds = self._state
+            vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+            names = list(names)
+            rows = np.array(matrix, dtype=np.float32) if names else np.zeros((0, vector.shape[1]), np.float32)
+            if name in names:
+                rows[names.index(name)] = self._normalize(vector)[0]
+            else:
+                names.append(name)
+                rows = np.vstack((rows, vector))
+            thresholds = dict(thresholds)
+            if threshold is not None:
+                thresholds[name] = threshold
+            self._commit(names, rows, thresholds)
+
+    def remove(self, name):
+        with self._lock:
+            names, matrix, thresholds = self._state
+            if name not in names:
+                return False
+            i = names.index(name)
+            rows = np.delete(np.array(matrix), i, axis=0)
+            thresholds = {k: v for k, v in thresholds.items() if k != name}
+            self._commit(names[:i] + names[i + 1:], rows, thresholds)
+            return True
+
+    def set_threshold(self, name, threshold):
+        with self._lock:
+            names, matrix, thresholds = self._state
+            self._commit(names, np.array(matrix), dict(thresholds, **{name: threshold}))
+
+    def threshold(self, name):
+        return self._state[2].get(name, self.default_threshold)
+
+    def get(self, name):
+        names, matrix, _ = self._state
+        if name not in names:
+            return None
+        return np.array(matrix[names.index(name)])
+
+    # --- Lookup ---
+
+    def identify(self, embedding, k=3):
+        """Top-k (name, cosine similarity) over every enrolled speaker."""
+        names, matrix, _ = self._state  # consistent snapshot
+        if not names:
+            return []
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query = query / max(np.linalg.norm(query), 1e-10)
+        scores = matrix @ query
+        k = min(k, len(names))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(names[i], float(scores[i])) for i in top]
+
+    def best_match(self, embedding):
+        """(name, score) of the best speaker if above their threshold, else (None, best score)."""
+        matches = self.identify(embedding, k=1)
+        if not matches:
+            return None, 0.0
+        name, score = matches[0]
+        if score > self.threshold(name):
+            return name, score
+        return None, score
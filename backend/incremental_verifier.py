@@ -0,0 +1,145 @@
+import time
+import numpy as np
+import torch
+from resemblyzer.audio import normalize_volume, wav_to_mel_spectrogram
+from resemblyzer.hparams import (
+    audio_norm_target_dBFS, mel_window_step, partials_n_frames, sampling_rate,
+)
+
+SAMPLES_PER_FRAME = int(sampling_rate * mel_window_step / 1000)
+PARTIAL_SAMPLES = partials_n_frames * SAMPLES_PER_FRAME  # 1.6 s
+
+
+class IncrementalVerifier:
+    """
+    Speaker verification that runs while the utterance is still arriving.
+
+    Audio is cut into overlapping 1.6 s partial windows (the same partials
+    `embed_utterance` averages) as soon as each window is complete. Every
+    new batch of partials goes through the encoder once and is folded into a
+    running mean embedding, which is matched against the EmbeddingStore.
+    After `min_partials` the verifier commits to "accept" or "reject" once
+    the running score is clearly above or below the best speaker's threshold,
+    and stops embedding. At end of speech only the tail partial, if any, is
+    left to compute.
+
+    With a `noise_floor`, windows that are mostly silence are skipped.
+    """
+
+    def __init__(self, encoder, store, sample_rate=16000, hop=0.8, min_partials=2,
+                 accept_margin=0.08, reject_margin=0.1, min_coverage=0.75,
+                 noise_floor=None, min_voiced=0.3):
+        if sample_rate != sampling_rate:
+            raise ValueError(f"Speaker encoder expects {sampling_rate} Hz audio, got {sample_rate}")
+        self.encoder = encoder
+        self.store = store
+        self.hop_samples = int(hop * sample_rate)
+        self.min_partials = min_partials
+        self.accept_margin = accept_margin
+        self.reject_margin = reject_margin
+        self.min_coverage = min_coverage
+        self.noise_floor = noise_floor
+        self.min_voiced = min_voiced
+        self.frame_size = int(0.03 * sample_rate)
+
+        self._buffer = np.zeros(0, dtype=np.float32)  # audio from the next window start on
+        self._sum = None
+        self.partials = 0
+        self.skipped = 0
+        self.speaker = None
+        self.score = 0.0
+        self.decision = None  # None until confident: "accept" / "reject"
+        self.decided_at = None  # seconds of audio seen when the decision was made
+        self.samples_seen = 0
+        self.embed_seconds = 0.0
+
+    # --- Streaming ---
+
+    def feed(self, samples):
+        """Add float32 audio. Returns the decision so far ("accept", "reject" or None)."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        self.samples_seen += len(samples)
+        if self.decision is not None:
+            return self.decision
+
+        self._buffer = np.concatenate((self._buffer, samples))
+        windows = []
+        while len(self._buffer) >= PARTIAL_SAMPLES:
+            window = self._buffer[:PARTIAL_SAMPLES]
+            if self._is_voiced(window):
+                windows.append(window)
+            else:
+                self.skipped += 1
+            self._buffer = self._buffer[self.hop_samples:]
+
+        if windows:
+            self._add(self._embed(windows))
+        return self.decision
+
+    def finish(self):
+        """
+        Final verdict for the utterance -> (username or None, similarity).
+        Embeds the trailing partial when it has enough coverage (or when the
+        whole utterance was shorter than one partial).
+        """
+        if self.decision is None and len(self._buffer):
+            coverage = len(self._buffer) / PARTIAL_SAMPLES
+            if coverage >= self.min_coverage or self.partials == 0:
+                tail = np.pad(self._buffer, (0, PARTIAL_SAMPLES - len(self._buffer)))
+                self._add(self._embed([tail]))
+            self._buffer = np.zeros(0, dtype=np.float32)
+
+        speaker = self.speaker if self.speaker and self.score > self.store.threshold(self.speaker) else None
+        print(f"Incremental verification: {speaker or 'unknown'} ({self.score:.3f}) "
+              f"from {self.partials} partial(s), {self.embed_seconds * 1000:.0f} ms encoding"
+              + (f", decided after {self.decided_at:.2f}s" if self.decided_at is not None else ""))
+        return speaker, self.score
+
+    @property
+    def embedding(self):
+        if self._sum is None:
+            return None
+        return self._sum / max(np.linalg.norm(self._sum), 1e-10)
+
+    # --- Internals ---
+
+    def _is_voiced(self, window):
+        if self.noise_floor is None:
+            return True
+        n_frames = len(window) // self.frame_size
+        frames = window[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        return np.mean(rms > self.noise_floor.threshold) >= self.min_voiced
+
+    def _embed(self, windows):
+        """One encoder forward pass for a batch of partial windows."""
+        started = time.perf_counter()
+        mels = np.array([
+            wav_to_mel_spectrogram(normalize_volume(w, audio_norm_target_dBFS, increase_only=True))[:partials_n_frames]
+            for w in windows
+        ])
+        with torch.no_grad():
+            embeddings = self.encoder(torch.from_numpy(mels).to(self.encoder.device)).cpu().numpy()
+        self.embed_seconds += time.perf_counter() - started
+        return embeddings
+
+    def _add(self, embeddings):
+        total = embeddings.sum(axis=0)
+        self._sum = total if self._sum is None else self._sum + total
+        self.partials += len(embeddings)
+
+        matches = self.store.identify(self.embedding, k=1)
+        if not matches:
+            self.speaker, self.score = None, 0.0
+            return
+        self.speaker, self.score = matches[0]
+        if self.partials < self.min_partials:
+            return
+
+        threshold = self.store.threshold(self.speaker)
+        if self.score >= threshold + self.accept_margin:
+            self.decision = "accept"
+        elif self.score < threshold - self.reject_margin:
+            self.decision = "reject"
+        if self.decision:
+            self.decided_at = self.samples_seen / sampling_rate
@@ -0,0 +1,149 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+DEFAULT_GRAMMAR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "command_grammar.json")
+
+DOMAIN_RE = re.compile(r"^(?P<scheme>https?://)?(?P<www>www\.)?[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?P<tld>[a-z]{2,})(?:/\S*)?$")
+# Used when the grammar file has no "url_tlds"; "notes.txt" or "setup.exe" are files, not sites
+DEFAULT_URL_TLDS = ("com", "org", "net", "io", "dev", "edu", "gov", "ai", "app", "co", "uk", "de", "in", "me", "tv")
+SPOKEN_EMAIL_RE = re.compile(r"\b([\w.+-]+) at ([\w-]+) dot ([a-z]{2,})\b")
+SUBJECT_RE = re.compile(r"^(?P<to>\S+)(?:\s+(?:with subject|with the subject|subject)\s+(?P<subject>.+))?$")
+
+
+class IntentRouter:
+    """
+    Local fast path for simple commands ("open youtube", "launch notepad",
+    "email bob@example.com"). Matches a configurable grammar and returns the
+    same action dicts Gemini would, or None so the caller falls back to the LLM.
+    """
+
+    def __init__(self, grammar_file=DEFAULT_GRAMMAR_FILE):
+        with open(grammar_file, "r") as f:
+            grammar = json.load(f)
+
+        self.fillers = sorted(grammar.get("fillers", []), key=len, reverse=True)
+        self.open_verbs = sorted(grammar.get("open_verbs", []), key=len, reverse=True)
+        self.browse_verbs = sorted(grammar.get("browse_verbs", []), key=len, reverse=True)
+        self.email_verbs = sorted(grammar.get("email_verbs", []), key=len, reverse=True)
+        self.apps = {k.lower(): v for k, v in grammar.get("apps", {}).items()}
+        self.sites = {k.lower(): v for k, v in grammar.get("sites", {}).items()}
+        # A bare "name.ext" is only a URL with one of these endings (or a scheme / www.)
+        self.url_tlds = {t.lower().lstrip(".") for t in grammar.get("url_tlds", DEFAULT_URL_TLDS)}
+
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    # --- Matching ---
+
+    @staticmethod
+    def normalize(text):
+        text = text.lower().strip()
+        text = SPOKEN_EMAIL_RE.sub(r"\1@\2.\3", text)
+        text = re.sub(r"[^\w@./:+-]+", " ", text)
+        return re.sub(r"\s+", " ", text).strip(" .")
+
+    def _strip_fillers(self, text):
+        changed = True
+        while changed and text:
+            changed = False
+            for filler in self.fillers:
+                if text == filler:
+                    return ""
+                if text.startswith(filler + " "):
+                    text = text[len(filler) + 1:]
+                    changed = True
+                elif text.endswith(" " + filler):
+                    text = text[:-len(filler) - 1]
+                    changed = True
+        return text
+
+    @staticmethod
+    def _split_verb(text, verbs):
+        for verb in verbs:
+            if text.startswith(verb + " "):
+                return text[len(verb) + 1:]
+        return None
+
+    def _as_url(self, obj):
+        match = DOMAIN_RE.match(obj)
+        if not match:
+            return None
+        if not (match.group("scheme") or match.group("www") or match.group("tld") in self.url_tlds):
+            return None  # most likely a file name; let the LLM decide
+        return obj if match.group("scheme") else "https://" + obj
+
+    def _match(self, text):
+        """Returns (route_name, action_dict); action_dict is None when unmatched."""
+        text = self._strip_fillers(self.normalize(text))
+        if not text:
+            return "fallthrough", None
+
+        rest = self._split_verb(text, self.email_verbs)
+        if rest is not None:
+            match = SUBJECT_RE.match(rest)
+            if not match:
+                return "fallthrough", None
+            return "compose_email", {
+                "action": "compose_email",
+                "to": match.group("to"),
+                "subject": (match.group("subject") or "").capitalize(),
+                "body": "",
+            }
+
+        rest = self._split_verb(text, self.browse_verbs)
+        if rest is not None:
+            obj = self._strip_fillers(rest)
+            url = self.sites.get(obj) or self._as_url(obj)
+            if url:
+                return "open_site", {"action": "open_browser", "target": url}
+            return "fallthrough", None
+
+        rest = self._split_verb(text, self.open_verbs)
+        if rest is not None:
+            obj = self._strip_fillers(rest)
+            app_name = self.apps.get(obj)
+            site = self.sites.get(obj)
+            if app_name and site:
+                return "ambiguous", None
+            if app_name:
+                return "open_app", {"action": "open_app", "target": app_name}
+            if site:
+                return "open_site", {"action": "open_browser", "target": site}
+            url = self._as_url(obj)
+            if url:
+                return "open_url", {"action": "open_browser", "target": url}
+
+        return "fallthrough", None
+
+    def route(self, text):
+        route_name, decision = self._match(text)
+        with self._lock:
+            self._counts[route_name] += 1
+            self._counts["total"] += 1
+        if decision:
+            print(f"⚡ Intent router [{route_name}] → {decision}")
+        return decision
+
+    def peek(self, text):
+        """Like route(), but for partial transcripts: no counting, no logging."""
+        return self._match(text)[1]
+
+    # --- Stats ---
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts.pop("total", 0)
+        routed = sum(n for name, n in counts.items() if name not in ("fallthrough", "ambiguous"))
+        return {
+            "total": total,
+            "routed": routed,
+            "hit_rate": round(routed / total, 3) if total else 0.0,
+            "routes": {
+                name: {"hits": n, "rate": round(n / total, 3)}
+                for name, n in sorted(counts.items())
+            },
+        }
@@ -0,0 +1,143 @@
+import json
+
+WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object out of streamed LLM text, one chunk at a time.
+
+    Anything before the first '{' (a ```json fence, a stray sentence) and
+    anything after the matching '}' is ignored. Top-level fields are
+    reported the moment their value is complete, so a caller can act on
+    `action`/`target` while a long `content` is still arriving. If a
+    candidate object turns out to be malformed, parsing restarts at the
+    next '{'; if the stream ends mid-object, `result()` still returns the
+    fields that did complete.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.complete = False
+        self._pos = 0
+        self._start = None
+        self._state = "seek"
+        self._key = None
+        self._token_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """Add text. Returns the (key, value) pairs completed by this chunk."""
+        self.buffer += chunk
+        completed = []
+        while self._pos < len(self.buffer) and not self.complete:
+            if self._step(self.buffer[self._pos], completed):
+                self._pos += 1
+        return completed
+
+    def result(self):
+        """The parsed object, the fields recovered from a truncated one, or None."""
+        if self.complete or self.fields:
+            return dict(self.fields)
+        return None
+
+    def _step(self, c, completed):
+        """Consume one character. Returns False to look at the same character again."""
+        state = self._state
+        if state == "seek":
+            if c == "{":
+                self._start = self._pos
+                self._state = "key_or_end"
+        elif state in ("key_or_end", "colon", "value", "after_value"):
+            if c in WHITESPACE:
+                return True
+            if state == "key_or_end":
+                if c == '"':
+                    self._begin_string("key")
+                elif c == "}":
+                    self.complete = True
+                else:
+                    self._restart()
+            elif state == "colon":
+                if c == ":":
+                    self._state = "value"
+                else:
+                    self._restart()
+            elif state == "value":
+                self._token_start = self._pos
+                if c == '"':
+                    self._begin_string("string")
+                elif c in "{[":
+                    self._depth = 1
+                    self._in_string = False
+                    self._state = "nested"
+                else:
+                    self._state = "literal"
+            else:  # after_value
+                if c == ",":
+                    self._state = "key_or_end"
+                elif c == "}":
+                    self.complete = True
+                else:
+                    self._restart()
+        elif state in ("key", "string"):
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                raw = self.buffer[self._token_start:self._pos + 1]
+                if state == "key":
+                    try:
+                        self._key = json.loads(raw)
+                        self._state = "colon"
+                    except ValueError:
+                        self._restart()
+                else:
+                    self._finish_value(raw, completed)
+        elif state == "nested":
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value(self.buffer[self._token_start:self._pos + 1], completed)
+        elif state == "literal":
+            if c in WHITESPACE or c in ",}":
+                self._finish_value(self.buffer[self._token_start:self._pos], completed)
+                return self._state == "seek"  # re-read the delimiter unless we restarted
+        return True
+
+    def _begin_string(self, state):
+        self._token_start = self._pos
+        self._escape = False
+        self._state = state
+
+    def _finish_value(self, raw, completed):
+        try:
+            # strict=False: models often put raw newlines inside strings
+            value = json.loads(raw, strict=False)
+        except ValueError:
+            self._restart()
+            return
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+        self._state = "after_value"
+
+    def _restart(self):
+        """Malformed object: forget it and look for the next '{' after its start."""
+        self.fields = {}
+        self._pos = self._start
+        self._state = "seek"
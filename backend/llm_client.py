@@ -0,0 +1,453 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+
+class LLMError(Exception):
+    """The LLM call failed (HTTP error, bad payload, broken stream)."""
+
+
+class LLMUnavailable(LLMError):
+    """No answer within the deadline, or the circuit breaker is open: use a local fallback."""
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker. `failure_threshold`
+    consecutive failures (errors or blown deadlines) open it; while open
+    every call is refused immediately. After `reset_seconds` one trial call
+    is let through, and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=3, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                return True  # the single trial call
+            if self.state == "closed":
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_abandoned(self):
+        """
+        A call ended with no outcome (e.g. its stream was closed early). A
+        half-open trial re-opens the breaker so a later call gets the next
+        trial; otherwise nothing changes.
+        """
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        return {"state": self.state, "failures": self.failures, "trips": self.trips, "rejected": self.rejected}
+
+
+class LatencyTracker:
+    """Recent call latencies; the hedge delay is their p95."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            if len(self._samples) > self.window:
+                del self._samples[0]
+
+    def percentile(self, p, default=None):
+        with self._lock:
+            if len(self._samples) < 10:
+                return default
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class GeminiClient:
+    """
+    Gemini over its REST API with one pooled `requests.Session`, so calls
+    reuse warm TLS connections.
+
+    Every call has a deadline. For `stream()` it bounds the wait for the
+    first chunk and then each gap between chunks, while `stream_limit` caps
+    the whole generation, so a long reply that keeps streaming isn't cut at
+    `deadline`. With `hedge` on, a duplicate request is sent
+    if the first hasn't answered (or, when streaming, produced its first
+    chunk) after the p95 of recent latencies, and whichever answers first
+    wins; this cuts the outliers that dominate tail latency for at most one
+    extra request. Failures and blown deadlines feed a CircuitBreaker;
+    while it is open calls raise LLMUnavailable at once so callers can fall
+    back to a local route. A stream that has produced its first chunk
+    counts as a success: if it stalls or breaks later, LLMError is raised
+    without touching the breaker.
+    """
+
+    def __init__(self, api_key, model="gemini-2.0-flash", base_url=GEMINI_BASE_URL,
+                 deadline=8.0, stream_limit=60.0, connect_timeout=2.0, hedge=True, hedge_after=1.5,
+                 hedge_min=0.3, hedge_max=3.0, breaker=None, session=None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.deadline = deadline
+        self.stream_limit = stream_limit
+        self.connect_timeout = connect_timeout
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.breaker = breaker or CircuitBreaker()
+        self.session = session or requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.latency = LatencyTracker()        # full response, generate()
+        self.first_chunk = LatencyTracker()    # time to first chunk, stream()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm")
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "errors": 0, "cut_off": 0}
+        # usageMetadata of the latest reply (promptTokenCount, cachedContentTokenCount...)
+        self.last_usage = {}
+
+    # --- Public API ---
+
+    def warm(self):
+        """Open (or refresh) a pooled connection with a cheap metadata request."""
+        try:
+            self.session.get(f"{self.base_url}/models/{self.model}",
+                             headers={"x-goog-api-key": self.api_key},
+                             timeout=(self.connect_timeout, self.connect_timeout))
+        except requests.RequestException as e:
+            print(f"⚠️ Gemini warm-up failed: {type(e).__name__}")
+
+    def generate(self, prompt, deadline=None, system=None):
+        """Full response text. Raises LLMUnavailable / LLMError."""
+        started, deadline_at = self._begin(deadline)
+        attempts = [self._pool.submit(self._post, prompt, system, deadline_at)]
+        hedge_at = started + self._hedge_delay(self.latency) if self.hedge else None
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline_at:
+                return self._timed_out()
+            wake_at = min(deadline_at, hedge_at) if hedge_at and len(attempts) == 1 else deadline_at
+            wait([a for a in attempts if not a.done()], timeout=max(0.0, wake_at - now),
+                 return_when=FIRST_COMPLETED)
+
+            for i, attempt in enumerate(attempts):
+                if attempt.done() and attempt.exception() is None:
+                    return self._succeeded(started, attempt.result(), winner=i)
+            failed = all(a.done() for a in attempts)
+            if hedge_at and len(attempts) == 1 and (failed or time.monotonic() >= hedge_at):
+                # Slow first attempt -> hedge; failed one -> the hedge doubles as a retry
+                self._stats["hedged"] += 1
+                attempts.append(self._pool.submit(self._post, prompt, system, deadline_at))
+            elif failed:
+                return self._failed(attempts[-1].exception())
+
+    def stream(self, prompt, deadline=None, system=None):
+        """
+        Yield text chunks as they arrive. `deadline` applies to the first
+        chunk and to each gap between chunks. Raises LLMUnavailable / LLMError.
+        """
+        started, first_chunk_at = self._begin(deadline)
+        gap = deadline or self.deadline
+        total_at = started + max(self.stream_limit, gap)
+        events = queue.Queue()
+        cancelled = threading.Event()
+        self._pool.submit(self._stream_attempt, 0, prompt, system, total_at, events, cancelled)
+        attempts, failed, winner, last_chunk = 1, 0, None, started
+        settled = False  # the breaker has been told how this call went
+        hedge_at = started + self._hedge_delay(self.first_chunk) if self.hedge else None
+
+        def launch_hedge():
+            self._stats["hedged"] += 1
+            self._pool.submit(self._stream_attempt, 1, prompt, system, total_at, events, cancelled)
+            return 2
+
+        try:
+            while True:
+                now = time.monotonic()
+                limit_at = first_chunk_at if winner is None else min(last_chunk + gap, total_at)
+                if now >= limit_at:
+                    settled = True
+                    if winner is None:
+                        return self._timed_out()
+                    stalled = limit_at < total_at
+                    return self._cut_off(f"no chunk for {gap:.1f}s" if stalled
+                                         else f"still generating after {self.stream_limit:.0f}s")
+                can_hedge = winner is None and hedge_at is not None and attempts == 1
+                wake_at = min(limit_at, hedge_at) if can_hedge else limit_at
+                try:
+                    attempt, kind, payload = events.get(timeout=max(0.0, wake_at - now))
+                except queue.Empty:
+                    if can_hedge and time.monotonic() >= hedge_at:
+                        attempts = launch_hedge()
+                    continue
+
+                if winner is not None and attempt != winner:
+                    continue  # the losing hedge
+                if kind == "error":
+                    failed += 1
+                    if winner is not None:
+                        return self._cut_off(payload)
+                    if can_hedge:
+                        attempts = launch_hedge()  # retry in place of the hedge
+                    elif failed == attempts:
+                        settled = True
+                        return self._failed(payload)
+                    continue
+                last_chunk = time.monotonic()
+                if winner is None:
+                    # First chunk decides which attempt we follow, and shows the backend is up
+                    winner = attempt
+                    self.first_chunk.add(last_chunk - started)
+                    if attempt == 1:
+                        self._stats["hedge_wins"] += 1
+                    settled = True
+                    self.breaker.record_success()
+                if kind == "done":
+                    return
+                yield payload
+        finally:
+            cancelled.set()
+            if not settled:
+                # Closed early by the consumer: don't leave a half-open trial pending forever
+                self.breaker.record_abandoned()
+
+    def stats(self):
+        return {
+            **self._stats,
+            "p95_ms": round((self.latency.percentile(95) or 0) * 1000, 1),
+            "p95_first_chunk_ms": round((self.first_chunk.percentile(95) or 0) * 1000, 1),
+            "breaker": self.breaker.snapshot(),
+            "last_usage": self.last_usage,
+        }
+
+    # --- Internals ---
+
+    def _begin(self, deadline):
+        if not self.breaker.allow():
+            raise LLMUnavailable("circuit breaker open")
+        self._stats["calls"] += 1
+        started = time.monotonic()
+        return started, started + (deadline or self.deadline)
+
+    def _hedge_delay(self, tracker):
+        delay = tracker.percentile(95, default=self.hedge_after)
+        return min(self.hedge_max, max(self.hedge_min, delay))
+
+    def _succeeded(self, started, result, winner=0):
+        self.latency.add(time.monotonic() - started)
+        if winner:
+            self._stats["hedge_wins"] += 1
+        self.breaker.record_success()
+        return result
+
+    def _timed_out(self):
+        self._stats["timeouts"] += 1
+        self.breaker.record_failure()
+        raise LLMUnavailable("deadline exceeded")
+
+    def _cut_off(self, reason):
+        """A stream that was already answering broke off; not a breaker failure."""
+        self._stats["cut_off"] += 1
+        raise LLMError(f"stream cut off: {reason}")
+
+    def _failed(self, error):
+        self._stats["errors"] += 1
+        self.breaker.record_failure()
+        if isinstance(error, LLMError):
+            raise error
+        raise LLMError(str(error))
+
+    def _request(self, method, prompt, system, deadline_at, **kwargs):
+        timeout = (self.connect_timeout, max(0.1, deadline_at - time.monotonic()))
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": system}]}
+        try:
+            response = self.session.post(
+                f"{self.base_url}/models/{self.model}:{method}",
+                json=body, headers={"x-goog-api-key": self.api_key}, timeout=timeout, **kwargs,
+            )
+        except requests.Timeout as e:
+            raise LLMUnavailable(f"request timed out: {e}")
+        except requests.RequestException as e:
+            raise LLMError(f"request failed: {e}")
+        if response.status_code != 200:
+            response.close()
+            raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+        return response
+
+    def _post(self, prompt, system, deadline_at):
+        response = self._request("generateContent", prompt, system, deadline_at)
+        payload = response.json()
+        self.last_usage = payload.get("usageMetadata", self.last_usage)
+        return self._candidate_text(payload)
+
+    def _stream_attempt(self, attempt, prompt, system, deadline_at, events, cancelled):
+        try:
+            response = self._request("streamGenerateContent", prompt, system, deadline_at,
+                                     params={"alt": "sse"}, stream=True)
+            with response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if cancelled.is_set():
+                        return
+                    if line and line.startswith("data:"):
+                        payload = json.loads(line[5:])
+                        self.last_usage = payload.get("usageMetadata", self.last_usage)
+                        text = self._candidate_text(payload)
+                        if text:
+                            events.put((attempt, "chunk", text))
+            events.put((attempt, "done", None))
+        except Exception as e:
+            events.put((attempt, "error", e))
+
+    @staticmethod
+    def _candidate_text(payload):
+        try:
+            parts = payload["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError):
+            return ""
+        return "".join(part.get("text", "") for part in parts)
+
+
+class OllamaClient:
+    """
+    A local model served by Ollama (or anything speaking its API), with the
+    same generate/stream interface as GeminiClient.
+
+    - keep_alive keeps the model loaded between commands (`warm()` loads it
+      at startup), so no request pays the model load.
+    - The static `system` prompt is always sent as the first chat message;
+      Ollama reuses the cached prefix and only processes the per-request part.
+    - At most `max_concurrent` requests run at once; more would just thrash
+      one local GPU/CPU. Waiting for a slot counts against the deadline.
+    """
+
+    def __init__(self, model, host="http://127.0.0.1:11434", deadline=20.0,
+                 keep_alive="30m", max_concurrent=2, options=None):
+        import ollama
+
+        self.model = model
+        self.host = host.rstrip("/")
+        self.deadline = deadline
+        self.keep_alive = keep_alive
+        self.options = options or {}
+        self.client = ollama.Client(host=self.host, timeout=deadline)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._stats = {"calls": 0, "timeouts": 0, "errors": 0, "waited_ms": 0.0}
+
+    def warm(self):
+        """Load the model now instead of on the first command."""
+        try:
+            self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+            print(f"🏠 Local model '{self.model}' loaded (keep_alive {self.keep_alive})")
+        except Exception as e:
+            print(f"⚠️ Could not preload local model '{self.model}': {e}")
+
+    def generate(self, prompt, deadline=None, system=None):
+        return "".join(self.stream(prompt, deadline, system))
+
+    def stream(self, prompt, deadline=None, system=None):
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        self._acquire(deadline_at)
+        self._stats["calls"] += 1
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        try:
+            for part in self.client.chat(model=self.model, messages=messages, stream=True, format="json",
+                                         options=self.options, keep_alive=self.keep_alive):
+                if time.monotonic() > deadline_at:
+                    self._stats["timeouts"] += 1
+                    raise LLMUnavailable("deadline exceeded")
+                text = part["message"]["content"]
+                if text:
+                    yield text
+        except LLMError:
+            raise
+        except Exception as e:
+            self._stats["errors"] += 1
+            if "timed out" in str(e).lower() or "timeout" in type(e).__name__.lower():
+                raise LLMUnavailable(f"Ollama timed out: {e}")
+            raise LLMError(f"Ollama request failed: {e}")
+        finally:
+            self._slots.release()
+
+    def _acquire(self, deadline_at):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=max(0.0, deadline_at - started)):
+            self._stats["timeouts"] += 1
+            raise LLMUnavailable("local model busy")
+        self._stats["waited_ms"] += (time.monotonic() - started) * 1000
+
+    def stats(self):
+        return dict(self._stats, model=self.model)
+
+
+def create_llm(settings, api_key=None):
+    """
+    (primary, fallback) clients from config.json: llm_backend "gemini"
+    (default) or "ollama"; llm_fallback_model adds a local Ollama model as
+    the fallback behind Gemini.
+    """
+    ollama_host = settings.get("ollama_host", "http://127.0.0.1:11434")
+    if settings.get("llm_backend", "gemini") == "ollama":
+        primary = OllamaClient(
+            settings.get("ollama_model", settings.get("llm_fallback_model") or "llama3.2:3b"),
+            host=ollama_host,
+            deadline=settings.get("llm_deadline", 20.0),
+            keep_alive=settings.get("ollama_keep_alive", "30m"),
+            max_concurrent=settings.get("ollama_max_concurrent", 2),
+        )
+        return primary, None
+
+    if not api_key:
+        raise EnvironmentError("❌ Missing GOOGLE_API_KEY in .env file! (or set \"llm_backend\": \"ollama\")")
+    primary = GeminiClient(
+        api_key,
+        model=settings.get("llm_model", "gemini-2.0-flash"),
+        base_url=settings.get("gemini_base_url", GEMINI_BASE_URL),
+        deadline=settings.get("llm_deadline", 8.0),
+        stream_limit=settings.get("llm_stream_limit", 60.0),
+        hedge=settings.get("llm_hedge", True),
+    )
+    fallback = None
+    if settings.get("llm_fallback_model"):
+        fallback = OllamaClient(settings["llm_fallback_model"], host=ollama_host,
+                                keep_alive=settings.get("ollama_keep_alive", "30m"))
+    return primary, fallback
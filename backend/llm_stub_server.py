@@ -0,0 +1,230 @@
+# llm_stub_server.py
+# Local stand-in for the LLM APIs, with injectable latency and failures.
+#
+#   python llm_stub_server.py --port 8765 --latency 0.3 --outlier-rate 0.05 --outlier-latency 4
+#
+# Serves Gemini-style endpoints (/v1beta/models/<model>:generateContent and
+# :streamGenerateContent?alt=sse) and Ollama-style ones (/api/generate,
+# /api/chat), answering with the JSON action contract the backend expects.
+# The replies are canned from the "User: ..." line of the prompt. Latency,
+# outliers and failures can be changed at runtime with POST /stub/config
+# (same keys as the CLI flags, e.g. {"fail_rate": 1.0}); GET /stub/stats
+# returns request counts.
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "latency": 0.3,          # seconds before the first byte
+    "jitter": 0.1,           # +/- uniform jitter on top of latency
+    "outlier_rate": 0.0,     # fraction of requests that are very slow
+    "outlier_latency": 4.0,
+    "fail_rate": 0.0,        # fraction answered with HTTP 503
+    "chunk_delay": 0.05,     # seconds between streamed chunks
+    "chunk_size": 12,        # characters per streamed chunk
+    "fences": False,         # wrap JSON replies in ```json fences
+}
+
+
+def canned_reply(prompt):
+    """A plausible JSON decision for the prompt's last "User:" line."""
+    if "trying to wake up or greet you" in prompt:
+        said = re.search(r'User said: "(.*)"', prompt)
+        text = said.group(1).lower() if said else ""
+        wake = any(w in text for w in ("hey", "hello", "hi ", "wake"))
+        return {"wake": wake, "reason": "greeting detected" if wake else "not a wake phrase"}
+
+    lines = [line for line in prompt.splitlines() if line.startswith("User:")]
+    text = lines[-1][5:].strip().lower() if lines else ""
+    opened = re.match(r"(?:open|launch|start) (.+)", text)
+    if "email" in text:
+        return {"action": "compose_email", "to": "professor", "subject": "Project update",
+                "body": "Dear Professor, here is a short update on my project. " * 8}
+    if text.startswith("write") or text.startswith("type"):
+        return {"action": "write_text", "target": "notepad",
+                "content": "This is a stub paragraph of generated text. " * 10}
+    if opened:
+        name = opened.group(1)
+        if "." in name or name in ("youtube", "google", "github"):
+            return {"action": "open_browser", "target": name}
+        return {"action": "open_app", "target": name}
+    return {"action": "none", "reply": f"Stub reply to: {text}"}
+
+
+class StubState:
+    def __init__(self, **overrides):
+        self.config = {**DEFAULT_CONFIG, **overrides}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def delay(self):
+        config = self.config
+        if random.random() < config["outlier_rate"]:
+            return config["outlier_latency"]
+        return max(0.0, config["latency"] + random.uniform(-config["jitter"], config["jitter"]))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status, payload, content_type="application/json"):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, content_type, pieces):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(self.state.config["chunk_delay"])
+                data = piece.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client hung up (e.g. a cancelled hedge)
+
+    def _reply_text(self, prompt):
+        text = json.dumps(canned_reply(prompt))
+        if self.state.config["fences"]:
+            text = f"```json\n{text}\n```"
+        return text
+
+    def _chunks(self, text):
+        size = self.state.config["chunk_size"]
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _inject(self):
+        """Sleep the configured latency; True if this request should fail."""
+        time.sleep(self.state.delay())
+        if random.random() < self.state.config["fail_rate"]:
+            self._send(503, {"error": {"code": 503, "message": "stub overloaded"}})
+            return True
+        return False
+
+    def do_GET(self):
+        if self.path == "/stub/stats":
+            return self._send(200, {"counts": self.state.counts, "config": self.state.config})
+        if self.path == "/api/version":
+            return self._send(200, {"version": "stub"})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        body = self._json_body()
+        if path == "/stub/config":
+            self.state.config.update(body)
+            return self._send(200, self.state.config)
+
+        gemini = re.match(r"/v1beta/models/([^:]+):(generateContent|streamGenerateContent)$", path)
+        if gemini:
+            self.state.count(gemini.group(2))
+            if self._inject():
+                return
+            system = "".join(p.get("text", "") for p in body.get("systemInstruction", {}).get("parts", []))
+            prompt = system + "\n" + "".join(
+                p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+            text = self._reply_text(prompt)
+            usage = {"promptTokenCount": (len(prompt) + 3) // 4, "candidatesTokenCount": (len(text) + 3) // 4}
+            if gemini.group(2) == "generateContent":
+                return self._send(200, gemini_payload(text, usage))
+            return self._send_stream("text/event-stream", [
+                f"data: {json.dumps(gemini_payload(chunk, usage))}\r\n\r\n" for chunk in self._chunks(text)
+            ])
+
+        if path in ("/api/generate", "/api/chat"):
+            self.state.count(path)
+            if self._inject():
+                return
+            if path == "/api/chat":
+                prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            else:
+                prompt = body.get("system", "") + "\n" + body.get("prompt", "")
+            text = self._reply_text(prompt)
+            model = body.get("model", "stub")
+            if not body.get("stream", True):
+                return self._send(200, ollama_payload(path, model, text, done=True))
+            pieces = [json.dumps(ollama_payload(path, model, chunk, done=False)) + "\n"
+                      for chunk in self._chunks(text)]
+            pieces.append(json.dumps(ollama_payload(path, model, "", done=True)) + "\n")
+            return self._send_stream("application/x-ndjson", pieces)
+
+        self._send(404, {"error": "not found"})
+
+
+def gemini_payload(text, usage=None):
+    payload = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+    if usage:
+        payload["usageMetadata"] = usage
+    return payload
+
+
+def ollama_payload(path, model, text, done):
+    payload = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+    if path == "/api/chat":
+        payload["message"] = {"role": "assistant", "content": text}
+    else:
+        payload["response"] = text
+    return payload
+
+
+def make_server(host="127.0.0.1", port=0, **config):
+    """A ready-to-serve stub; port 0 picks a free one (see server.server_port)."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"state": StubState(**config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = handler.state
+    return server
+
+
+def start_in_thread(**config):
+    server = make_server(**config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local LLM stand-in with injectable latency.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for key, value in DEFAULT_CONFIG.items():
+        flag = "--" + key.replace("_", "-")
+        if isinstance(value, bool):
+            parser.add_argument(flag, action="store_true")
+        else:
+            parser.add_argument(flag, type=type(value), default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    server = make_server(host, port, **args)
+    print(f"LLM stub listening on http://{host}:{server.server_port} "
+          f"(Gemini base: http://{host}:{server.server_port}/v1beta, Ollama host: http://{host}:{server.server_port})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# load_test_asgi.py
+# Concurrency load test for the ASGI serving mode, with stubbed STT/LLM.
+#
+#   python load_test_asgi.py --text-clients 50 --voice-clients 4 --duration 20
+#
+# Starts AsgiApp on a local port with a stub backend whose mic, STT, speaker
+# and LLM steps just sleep for configurable times (no models, mic or API
+# key needed), then runs concurrent text (/listen) and voice (/listen-voice)
+# clients against it. Reports per-route throughput and latency plus the
+# resource pool counters, so you can see how many concurrent requests one
+# backend sustains and that slow voice requests don't hold up text commands.
+
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+from flask import Flask, jsonify
+
+from asgi_app import AsgiApp
+
+
+class StubTranscriptionError(Exception):
+    pass
+
+
+class StubBackend:
+    """Same blocking steps AsgiApp expects from main.py, with fixed delays."""
+
+    DEFAULT_SPEAKER = "default_user"
+    TranscriptionError = StubTranscriptionError
+
+    def __init__(self, mic=1.5, stt=0.3, speaker=0.1, llm=0.8, desktop=0.05):
+        self.delays = {"mic": mic, "stt": stt, "speaker": speaker, "llm": llm, "desktop": desktop}
+
+    def needs_enrollment(self, verify_voice, enroll):
+        return enroll
+
+    def authorize_enrollment(self, username, overwrite):
+        return None
+
+    def record_enrollment(self, username):
+        time.sleep(self.delays["mic"])
+        return b"audio"
+
+    def enroll_speaker(self, audio, username):
+        time.sleep(self.delays["speaker"])
+        return {"enroll_required": True, "speaker": username}
+
+    def capture_command(self, verify_voice):
+        time.sleep(self.delays["mic"])
+        return b"audio", None, None
+
+    def settle_speculation(self, speculation):
+        pass
+
+    def capture_wake_phrase(self):
+        time.sleep(self.delays["mic"])
+        return b"audio"
+
+    def transcribe_audio(self, audio):
+        time.sleep(self.delays["stt"])
+        return "open notepad"
+
+    def verify_speaker(self, audio, verifier=None):
+        time.sleep(self.delays["speaker"])
+        return self.DEFAULT_SPEAKER, 0.9
+
+    def decide_action(self, text):
+        time.sleep(self.delays["llm"])
+        return {"action": "none", "reply": f"Stub reply to: {text}"}
+
+    def dispatch_action(self, decision, speculation=None):
+        time.sleep(self.delays["desktop"])
+        return None
+
+    def classify_wake(self, text):
+        return {"wake": True, "confidence": 0.9, "reason": "stub"}, False
+
+    def ask_gemini_for_wake(self, text):
+        time.sleep(self.delays["llm"])
+        return {"wake": True, "reason": "stub"}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def client(http, path, payload, deadline, results):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await http.post(path, json=payload)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        results.append((time.perf_counter() - started, ok))
+
+
+def summarize(name, results, duration):
+    latencies = sorted(latency for latency, ok in results if ok)
+    errors = sum(1 for _, ok in results if not ok)
+    if not latencies:
+        print(f"{name:<14} no successful requests ({errors} errors)")
+        return
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<14} {len(latencies):>6} ok {errors:>4} err  {len(latencies) / duration:7.1f} req/s  "
+          f"p50 {statistics.median(latencies) * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  "
+          f"max {latencies[-1] * 1000:7.0f} ms")
+
+
+async def run_load(base_url, args):
+    deadline = time.perf_counter() + args.duration
+    text_results, voice_results = [], []
+    limits = httpx.Limits(max_connections=args.text_clients + args.voice_clients + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as http:
+        tasks = [client(http, "/listen", {"text": "what's the weather like"}, deadline, text_results)
+                 for _ in range(args.text_clients)]
+        tasks += [client(http, "/listen-voice", {"verify_voice": True}, deadline, voice_results)
+                  for _ in range(args.voice_clients)]
+        await asyncio.gather(*tasks)
+
+        stats = (await http.get("/stats/asgi")).json()
+        bridged = (await http.get("/stats")).status_code
+    return text_results, voice_results, stats, bridged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the ASGI backend with stubbed STT/LLM.")
+    parser.add_argument("--text-clients", type=int, default=50)
+    parser.add_argument("--voice-clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--mic", type=float, default=1.5, help="stub capture time (s)")
+    parser.add_argument("--stt", type=float, default=0.3, help="stub STT time (s)")
+    parser.add_argument("--llm", type=float, default=0.8, help="stub LLM time (s)")
+    parser.add_argument("--llm-limit", type=int, default=None, help="override the llm pool size")
+    args = parser.parse_args()
+
+    # Fallthrough routes are still served by Flask over WSGI
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule("/stats", "stats", lambda: jsonify({"ok": True}))
+
+    limits = {"llm": args.llm_limit} if args.llm_limit else None
+    backend = StubBackend(mic=args.mic, stt=args.stt, llm=args.llm)
+    port = free_port()
+    server, thread = start_server(AsgiApp(backend, flask_app, limits=limits), port)
+
+    print(f"Load test: {args.text_clients} text + {args.voice_clients} voice clients for {args.duration:.0f}s "
+          f"(stub mic {args.mic}s, stt {args.stt}s, llm {args.llm}s)")
+    text_results, voice_results, stats, bridged = asyncio.run(run_load(f"http://127.0.0.1:{port}", args))
+
+    summarize("/listen", text_results, args.duration)
+    summarize("/listen-voice", voice_results, args.duration)
+    print(f"WSGI fallthrough /stats -> HTTP {bridged}")
+    for name, pool in stats["pools"].items():
+        print(f"  {name:<8} limit {pool['limit']:>2}  peak {pool['peak']:>2}  done {pool['completed']:>6}  "
+              f"avg wait {pool['avg_wait_ms']:>8} ms  avg busy {pool['avg_busy_ms']:>7} ms")
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,6 @@ from dotenv import load_dotenv
 from flask_cors import CORS
 import speech_recognition as sr
 import time
-import google.generativeai as genai
 import os
 import subprocess
 import platform
@@ -20,6 +19,9 @@ import traceback
 import re  # ✅ Needed for regex parsing
 import threading
 import sys
+import shutil
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 from dotenv import load_dotenv
@@ -31,6 +33,27 @@ import numpy as np
 from stt import VoiceSignature
 
 from real_time_stt import AudioToTextRecorder
+from settings import load_settings, ROOT_DIR
+from intent_router import IntentRouter, DEFAULT_GRAMMAR_FILE
+from decision_cache import DecisionCache, DEFAULT_BYPASS_ACTIONS
+from json_stream import IncrementalJSONParser
+from llm_client import create_llm, LLMError
+from prompts import (ACTION_SYSTEM_PROMPT, WAKE_SYSTEM_PROMPT, MAX_CONTEXT_WINDOWS, action_prompt, wake_prompt,
+                     estimate_tokens)
+from window_context import WindowIndex
+from window_wait import WindowWaiter
+from text_injection import TextInjector
+from browser_client import BrowserServiceClient, BrowserServiceError, DEFAULT_SERVICE_URL, gmail_compose_url
+from speculation import Speculator, PartialTranscriber
+
+# Shared audio helpers live in src/ (appended so backend modules win on name clashes)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+from segmenter import SpeechSegmenter, PCMStreamReader, float32_to_pcm16
+from audio_hub import get_hub
+from noise_floor import NoiseFloorEstimator
+from stt_engine import get_engine, create_engine, resample, TranscriptionError
+from wake_spotter import WakeWordSpotter
+from wake_classifier import WakePhraseClassifier
 
 
 
@@ -42,30 +65,118 @@ CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 # === Voice Setup (placeholders) ===
 stt = AudioToTextRecorder()
 vs = VoiceSignature()
-username = "default_user"
-enrolled_embedding = vs.load_embedding(username)
+DEFAULT_SPEAKER = "default_user"
+settings = load_settings()
 
 # ✅ Load .env file
 load_dotenv()
 
-# ✅ Retrieve the key from environment
+# ✅ Retrieve the key from environment (only needed for the Gemini backend)
 api_key = os.getenv("GOOGLE_API_KEY")
 
-if not api_key:
-    raise EnvironmentError("❌ Missing GOOGLE_API_KEY in .env file!")
-
-# ✅ Configure Gemini safely
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel("gemini-2.0-flash")
-
-print("Gemini connected successfully!")
+# ✅ LLM backend ("llm_backend" in config.json): Gemini over REST with
+# deadlines, hedging and a circuit breaker, or a local Ollama model. With
+# Gemini, "llm_fallback_model" adds a local model for when it is down.
+llm_client, fallback_llm = create_llm(settings, api_key)
+if settings.get("llm_backend", "gemini") == "ollama":
+    llm_client.warm()
+
+print(f"LLM client ready ({type(llm_client).__name__})!")
+
+# One always-open mic stream; every route/listener reads from it with its own cursor
+audio_hub = get_hub(16000)
+COMMAND_PRE_ROLL = 0.5  # seconds of audio from before the request to keep
+
+# Speech-to-text engine ("stt_*" keys in config.json), loaded + warmed up once here
+speech_engine = get_engine(settings)
+print(f"🗣️ STT engine ready: {speech_engine.name}")
+
+# Local wake-phrase decision for /wakeword (fuzzy + phonetic match on the wake word)
+wake_classifier = WakePhraseClassifier(settings.get("wake_word", "friday"))
+
+# Simple commands are matched locally; everything else goes to Gemini
+intent_router = IntentRouter(settings.get("intent_grammar", DEFAULT_GRAMMAR_FILE))
+
+# Repeat commands reuse Gemini's earlier decision ("decision_cache" in config.json)
+cache_settings = settings.get("decision_cache", {})
+# Open windows, re-enumerated in the background so requests read a snapshot
+window_index = WindowIndex(refresh_interval=settings.get("window_refresh_interval", 1.0)).start()
+# Waits for launched/activated windows by polling that index with backoff
+window_waiter = WindowWaiter(window_index)
+
+# Browser actions go to the running Playwright service when it's up
+# ("browser_service" in config.json; "enabled": false always spawns a browser)
+browser_settings = settings.get("browser_service", {})
+browser_service = None
+if browser_settings.get("enabled", True):
+    if browser_settings.get("autostart", False):
+        # Start playwright_service.py alongside us (it opens its own Chromium window)
+        service_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Automations", "web_browsing")
+        subprocess.Popen([sys.executable, "playwright_service.py"], cwd=service_dir)
+    browser_service = BrowserServiceClient(
+        browser_settings.get("url", DEFAULT_SERVICE_URL),
+        timeout=browser_settings.get("timeout", 10.0),
+        profile=browser_settings.get("profile", "dom"),
+    )
 
-recognizer = sr.Recognizer()
+# Pastes/bulk-types generated text ("text_injection" in config.json)
+injection_settings = settings.get("text_injection", {})
+text_injector = TextInjector(
+    paste_threshold=injection_settings.get("paste_threshold", 256),
+    chunk_size=injection_settings.get("chunk_size", 64),
+    confirm_timeout=injection_settings.get("confirm_timeout", 0.5),
+    no_paste_apps=injection_settings.get("no_paste_apps", []),
+    per_char_apps=injection_settings.get("per_char_apps", []),
+)
+
+decision_cache = DecisionCache(
+    max_entries=cache_settings.get("max_entries", 256),
+    ttl_seconds=cache_settings.get("ttl_seconds", 6 * 3600),
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "decision_cache.json")
+    if cache_settings.get("persist", True) else None,
+    bypass_actions=cache_settings.get("bypass_actions", DEFAULT_BYPASS_ACTIONS),
+)
+
+# While a command is spoken, partial transcripts start reversible prep for
+# the action it is heading for ("speculation" in config.json). Partials cost
+# extra decodes, so it's on by default only for a local STT engine.
+speculation_settings = settings.get("speculation", {})
+speculator = None
+if speculation_settings.get("enabled", speech_engine.name == "faster_whisper"):
+    preparers = {"open_app": lambda d: resolve_app_command(d["target"])}
+    rollbacks = {}
+    if browser_service:
+        preparers["open_browser"] = lambda d: browser_service.prefetch_tab(d["target"])
+        rollbacks["open_browser"] = lambda d, prefetched: browser_service.discard_tab(prefetched)
+    speculator = Speculator(intent_router, preparers, rollbacks, warm_llm=getattr(llm_client, "warm", None))
+
+# Verification and transcription of the same utterance run side by side here
+voice_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="voice")
 
 # === Helper functions ===
 
-def open_browser(target):
-    """Open URL in system default browser (NEW TAB)."""
+def open_browser(target, prefetched=None):
+    """
+    Open URL in the warm Playwright browser, else the system default browser (NEW TAB).
+    The default browser is only used when the service can't be reached; if the
+    service got the command but failed, the page may be open already.
+    """
+    reply = None
+    try:
+        if prefetched is not None:
+            # Loaded in the background while the command was still being spoken
+            try:
+                reply = browser_service.adopt_tab(prefetched, target)
+            except BrowserServiceError as e:
+                print(f"⚠️ Couldn't adopt the prefetched tab ({e}); loading {target} again")
+        if reply is None and browser_service:
+            reply = browser_service.open_tab(target)
+    except BrowserServiceError as e:
+        print(f"❌ Browser service failed to open {target}: {e}")
+        return f"❌ Couldn't open {target} in the browser: {e}"
+    if reply is not None:
+        print(f"🌐 Opened {target} in the browser service: {reply}")
+        return f"Opening {target}."
     try:
         print(f"🌐 Opening NEW tab: {target}")
         webbrowser.open(target)
@@ -90,75 +201,73 @@ def wav_to_numpy(wav_bytes):
     return audio_np.astype(np.float32) / np.iinfo(dtype).max  # normalize to flo
 
 
+APP_PATHS = {
+    "chrome": r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    "google chrome": r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    "notepad": "notepad.exe",
+    "vscode": r"C:\Users\%USERNAME%\AppData\Local\Programs\Microsoft VS Code\Code.exe",
+    "visual studio code": r"C:\Users\%USERNAME%\AppData\Local\Programs\Microsoft VS Code\Code.exe",
+    "cmd": "cmd.exe",
+    "calculator": "calc.exe",
+    "explorer": "explorer.exe",
+    "word": r"C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE"
+}
+
+
+@lru_cache(maxsize=64)
+def resolve_app_command(app_name):
+    """How to launch `app_name` on this OS -> (argv or shell string, use shell). Cached."""
+    system = platform.system().lower()
+    if system == "windows":
+        exe_path = APP_PATHS.get(app_name.lower())
+        if exe_path:
+            return os.path.expandvars(exe_path), False
+        return f'start {app_name}', True
+    elif system == "darwin":  # macOS
+        return ["open", "-a", app_name], False
+    elif system == "linux":
+        return [shutil.which(app_name) or app_name], False
+    raise Exception("Unsupported OS")
+
+
 def open_local_app(app_name):
-    # ... (This function is unchanged) ...
     try:
-        system = platform.system().lower()
         print(f"🖥️ Launching app: {app_name}")
+        command, shell = resolve_app_command(app_name)
+        subprocess.Popen(command, shell=shell)
 
+        system = platform.system().lower()
         if system == "windows":
-            app_paths = {
-                "chrome": r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-                "google chrome": r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-                "notepad": "notepad.exe",
-                "vscode": r"C:\Users\%USERNAME%\AppData\Local\Programs\Microsoft VS Code\Code.exe",
-                "visual studio code": r"C:\Users\%USERNAME%\AppData\Local\Programs\Microsoft VS Code\Code.exe",
-                "cmd": "cmd.exe",
-                "calculator": "calc.exe",
-                "explorer": "explorer.exe",
-                "word": r"C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE"
-            }
-            exe_path = app_paths.get(app_name.lower())
-            if exe_path:
-                exe_path = os.path.expandvars(exe_path)
-                subprocess.Popen(exe_path)
-                return f"Launching {app_name.title()}."
-            else:
-                subprocess.Popen(f'start {app_name}', shell=True)
+            if shell:
                 return f"Trying to launch {app_name}..."
-        
-        elif system == "darwin":  # macOS
-            subprocess.Popen(["open", "-a", app_name])
+            return f"Launching {app_name.title()}."
+        elif system == "darwin":
             return f"Opening {app_name} on macOS."
-        
-        elif system == "linux":
-            subprocess.Popen([app_name])
-            return f"Launching {app_name} on Linux."
-        
-        else:
-            raise Exception("Unsupported OS")
-    
+        return f"Launching {app_name} on Linux."
+
     except Exception as e:
         print(f"❌ Failed to open {app_name}: {e}")
         return f"Sorry, I couldn’t open {app_name}."
 
 
-def write_to_app(app_name, content):
-    """Focus the app window and type content reliably (Windows-safe)."""
-    import pyautogui, pygetwindow as gw, subprocess, time, platform
-
-    try:
-        system = platform.system().lower()
-        target = app_name.lower()
-        print(f"✍️ Preparing to write into {target}...")
-
-        wins = [w for w in gw.getAllWindows() if target in w.title.lower()]
-        if not wins:
-            print(f"⚠️ {app_name} not open, launching...")
-            open_local_app(app_name)
-            time.sleep(3)
-
-        for _ in range(12):
-            wins = [w for w in gw.getAllWindows() if target in w.title.lower()]
-            if wins:
-                break
-            time.sleep(0.5)
-
-        if not wins:
-            return f"❌ Could not find {app_name} window."
-        win = wins[0]
-        print(f"🪟 Found: {win.title}")
-
+def prepare_app_window(app_name):
+    """Launch the app if needed and bring its window to the front. Returns the window or None."""
+    system = platform.system().lower()
+    target = app_name.lower()
+    print(f"✍️ Preparing to write into {target}...")
+
+    # Already open -> one enumeration; otherwise launch and wait for it to appear
+    waited = window_waiter.window(target, timeout=0)
+    if waited.found is None:
+        print(f"⚠️ {app_name} not open, launching...")
+        open_local_app(app_name)
+        waited = window_waiter.window(target, timeout=settings.get("window_launch_timeout", 8.0))
+    if waited.found is None:
+        return None
+    win = waited.found
+    print(f"🪟 Found: {win.title} ({waited.waited_ms:.0f} ms)")
+
+    if window_waiter.focus(target, timeout=0).found is None:
         if system == "windows":
             subprocess.run(
                 ["powershell", "-Command",
@@ -166,20 +275,27 @@ def write_to_app(app_name, content):
                 capture_output=True, text=True
             )
         else:
-            win.activate()
-        time.sleep(1.0)
-
-        # 4️⃣ Confirm active window
-        for _ in range(5):
-            active = gw.getActiveWindow()
-            if active and target in active.title.lower():
-                print("✅ Window confirmed active.")
-                break
-            time.sleep(0.5)
+            for w in gw.getWindowsWithTitle(win.title)[:1]:
+                w.activate()
+
+    # Confirm active window
+    focused = window_waiter.focus(target, timeout=settings.get("window_focus_timeout", 3.0))
+    if focused.found is not None:
+        print(f"✅ Window confirmed active ({focused.waited_ms:.0f} ms).")
+    else:
+        print(f"⚠️ {win.title} did not report focus within {focused.waited_ms:.0f} ms; typing anyway")
+    return win
+
+
+def write_to_app(app_name, content):
+    """Focus the app window and type content reliably (Windows-safe)."""
+    try:
+        if prepare_app_window(app_name) is None:
+            return f"❌ Could not find {app_name} window."
 
         print(f"⌨️ Typing:\n{content}")
-        pyautogui.typewrite(content, interval=0.04)
-        print("✅ Typing done.")
+        result = text_injector.inject(content, app=app_name)
+        print(f"✅ Typing done ({result.strategy}, {result.chars} chars in {result.elapsed_ms:.0f} ms).")
         return f"✅ Wrote your text into {app_name}."
     except Exception as e:
         print(f"❌ Failed to write: {e}")
@@ -187,16 +303,16 @@ def write_to_app(app_name, content):
 
 
 def compose_email(to, subject, body):
-    # ... (This function is unchanged) ...
+    """Gmail compose in the warm, logged-in Playwright browser; else (service unreachable) spawn a browser for it."""
+    try:
+        reply = browser_service.compose_email(to, subject, body) if browser_service else None
+    except BrowserServiceError as e:
+        print(f"❌ Browser service failed to open Gmail compose: {e}")
+        return f"❌ Failed to open Gmail compose — {e}"
+    if reply is not None:
+        return reply
     try:
-        import urllib.parse
-        to_encoded = urllib.parse.quote(to or "")
-        subject_encoded = urllib.parse.quote(subject or "")
-        body_encoded = urllib.parse.quote(body or "")
-        gmail_url = (
-            f"https://mail.google.com/mail/?view=cm&fs=1"
-            f"&to={to_encoded}&su={subject_encoded}&body={body_encoded}"
-        )
+        gmail_url = gmail_compose_url(to, subject, body)
         print(f"📧 Redirecting to Gmail compose for: {to}")
         system = platform.system().lower()
         if system == "windows":
@@ -219,220 +335,559 @@ def compose_email(to, subject, body):
         return f"❌ Failed to open Gmail compose — {e}"
 
 def get_open_windows():
-    system = platform.system().lower()
-    if system == "windows":
-        return [w.title for w in gw.getAllWindows() if w.title]
-    else:
-        # On macOS/Linux, cannot enumerate windows with pygetwindow
-        return []
+    """Window titles, most recently focused first (from the background index)."""
+    return window_index.titles()
     
 
+def samples_to_audio_data(samples, sample_rate=16000):
+    """Wrap float32 samples (e.g. from the audio hub) as speech_recognition AudioData."""
+    return sr.AudioData(float32_to_pcm16(samples), sample_rate, 2)
+
+
 def numpy_to_wav_bytes(audio_np, sample_rate=16000):
     buf = io.BytesIO()
     sf.write(buf, audio_np, sample_rate, format='WAV')
     buf.seek(0)
     return buf
 
+# === Early dispatch while Gemini is still streaming ===
+action_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="early-action")
+
+# action -> (fields it needs, what to start once they're complete,
+#            whether that already is the whole action)
+EARLY_ACTIONS = {
+    "open_browser": (("target",), lambda d: open_browser(d["target"]), True),
+    "open_app": (("target",), lambda d: open_local_app(d["target"]), True),
+    # Launch/focus the app while the text to type is still being generated
+    "write_text": (("target",), lambda d: prepare_app_window(d["target"]), False),
+}
+stream_stats = {"replies": 0, "early_actions": 0, "early_mismatches": 0, "first_action_ms": 0.0,
+                "full_reply_ms": 0.0}
+# Estimated action-prompt sizes: the static prefix vs. the per-request suffix
+prompt_stats = {"requests": 0, "prefix_tokens": estimate_tokens(ACTION_SYSTEM_PROMPT), "suffix_tokens": 0}
+
+
+def early_key(fields):
+    """The action and the fields its early step uses, to match against the final decision."""
+    action = str(fields.get("action", "")).lower()
+    spec = EARLY_ACTIONS.get(action)
+    return (action,) + tuple(fields.get(name) for name in spec[0]) if spec else (action,)
+
+
+def start_early_action(fields, started):
+    """
+    Submit the action's first step once the fields it needs have streamed in.
+    Returns (early_key of those fields, future), or None.
+    """
+    action = str(fields.get("action", "")).lower()
+    spec = EARLY_ACTIONS.get(action)
+    if spec is None or not all(fields.get(name) for name in spec[0]):
+        return None
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stream_stats["early_actions"] += 1
+    stream_stats["first_action_ms"] += elapsed_ms
+    print(f"⚡ Starting {action} early, {elapsed_ms:.0f} ms into Gemini's reply")
+    return early_key(fields), action_pool.submit(spec[1], dict(fields))
+
+
+def local_fallback_decision(prompt):
+    """When the LLM is unavailable: the local fallback model if configured, else an honest reply."""
+    if fallback_llm is not None:
+        try:
+            parser = IncrementalJSONParser()
+            parser.feed(fallback_llm.generate(prompt, system=ACTION_SYSTEM_PROMPT))
+            if parser.result():
+                print(f"🏠 Local model decision: {parser.result()}")
+                return parser.result()
+        except LLMError as e:
+            print(f"⚠️ Local fallback model failed: {e}")
+    return {
+        "action": "none",
+        "reply": "I can't reach my language model right now. Simple commands like 'open notepad' still work.",
+    }
+
+
 # === Ask Gemini for actions ===
 def ask_gemini_for_action(user_text):
     """Ask Gemini to interpret the user's intent and return a safe structured action."""
-    open_windows = [w.title for w in gw.getAllWindows() if w.title]
-    context = f"Currently open windows: {open_windows[:5]}"
+    open_windows = window_index.titles(MAX_CONTEXT_WINDOWS)
+
+    cached = decision_cache.get(user_text, open_windows)
+    if cached is not None:
+        print(f"💾 Cached decision: {cached}")
+        return cached
+
+    print("🧠 Asking Gemini to interpret + generate meaningful content...")
+    # Static system prompt (cacheable prefix) + a short per-request suffix
+    prompt = action_prompt(user_text, open_windows)
+    prompt_stats["requests"] += 1
+    prompt_stats["suffix_tokens"] += estimate_tokens(prompt)
+    print(f"📏 Prompt ≈ {prompt_stats['prefix_tokens']} static + {estimate_tokens(prompt)} per-request tokens")
+    # Streamed: fences/prose around the JSON are skipped by the parser, and
+    # the action starts as soon as its leading fields are complete
+    started = time.perf_counter()
+    parser = IncrementalJSONParser()
+    early = None
+    interrupted = False
+    try:
+        for chunk in llm_client.stream(prompt, system=ACTION_SYSTEM_PROMPT):
+            parser.feed(chunk)
+            if early is None:
+                early = start_early_action(parser.fields, started)
+    except LLMError as e:
+        print(f"❌ Gemini interpretation failed: {e}")
+        if parser.result() is None:
+            # The intent router already had its go, so this is the last local option
+            return local_fallback_decision(prompt)
+        interrupted = True
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stream_stats["replies"] += 1
+    stream_stats["full_reply_ms"] += elapsed_ms
+    text = parser.buffer.strip()
+    print(f"🤖 Gemini raw output ({elapsed_ms:.0f} ms): {text}")
+    usage = getattr(llm_client, "last_usage", None)
+    if usage:
+        print(f"📏 Billed prompt tokens: {usage.get('promptTokenCount')} "
+              f"({usage.get('cachedContentTokenCount', 0)} cached)")
+
+    decision = parser.result()
+    if decision is None:
+        print("⚠️ No JSON object in Gemini's reply")
+        return {"action": "none", "reply": text}
+    if interrupted and not parser.complete:
+        # The stream broke mid-object; the missing fields may be the ones the action needs
+        print("⚠️ Gemini's reply was cut off mid-stream; not acting on the partial decision")
+        if early is not None:
+            return {"action": "none",
+                    "reply": f"I started {early[0][0]}, but the rest of my answer got cut off. Please try again."}
+        return {"action": "none", "reply": "My answer got cut off before it was complete. Please try again."}
+    if parser.complete:
+        decision_cache.put(user_text, open_windows, decision)
+    else:
+        print("⚠️ Gemini's JSON was cut off; using the fields that completed")
+    if early is not None:
+        started_for, future = early
+        if early_key(decision) == started_for:
+            decision["_early"] = future
+        else:
+            # The parser restarted on a different object; what already ran can't be undone
+            stream_stats["early_mismatches"] += 1
+            print(f"⚠️ Started {started_for} early, but the final decision is {early_key(decision)}; "
+                  f"running the final one normally")
+    return decision
 
-    system_prompt = """
-You are VocalAI, a desktop AI assistant that translates user speech into JSON commands.
-You can control a web browser and local applications.
 
-Always reply **only in valid JSON** using one of the following structures:
+def decide_action(user_text):
+    """Local intent router first; unmatched or ambiguous commands fall through to Gemini."""
+    decision = intent_router.route(user_text)
+    if decision is None:
+        decision = ask_gemini_for_action(user_text)
+    return decision
 
-- {{ "action": "open_browser", "target": "<url or website name>" }}
-- {{ "action": "open_app", "target": "<local application name>" }}
-- {{ "action": "write_text", "target": "<app name>", "content": "<the text to write>" }}
-- {{ "action": "append_text", "target": "<app name>", "content": "<text to add>" }}
-- {{ "action": "compose_email", "to": "<recipient email or name>", "subject": "<subject line>", "body": "<email body text>" }}
-- {{ "action": "none", "reply": "<textual reply>" }}
 
-Example:
-User: "Send an email to my professor about my project progress."
-→ {{ "action": "compose_email", "to": "professor", "subject": "Project Progress Update", "body": "Dear Professor, I wanted to update you on my current project progress..." }}
+# ==============================================================
+# 🎙️ Voice Route
+# ==============================================================
 
-Be concise, structured, and strictly output JSON.
-Context:
-{}
-""".format(context)
+def needs_enrollment(verify_voice, enroll):
+    """Enroll when explicitly asked, or when verifying with nobody enrolled yet."""
+    return enroll or (verify_voice and len(vs.store) == 0)
 
-    print("🧠 Asking Gemini to interpret + generate meaningful content...")
-    response = model.generate_content(f"{system_prompt}\n\nUser: {user_text}")
-    text = (response.text or "").strip()
-    print(f"🤖 Gemini raw output: {text}")
 
-    # ✅ Strip Markdown fences if present
-    if text.startswith("```"):
-        text = text.replace("```json", "").replace("```", "").strip()
+def record_enrollment(username):
+    print(f"Recording 8s for voice enrollment of '{username}' (speak normally)...")
+    return samples_to_audio_data(audio_hub.record_seconds(8))
 
-    # ✅ Try parsing safely
+
+def record_confirmation():
+    """A short utterance from the mic for an enrolled speaker to confirm a change (None if silent)."""
+    print("🔐 An enrolled speaker has to confirm this change: say something...")
+    segmenter = audio_hub.record_utterance(
+        pre_roll=COMMAND_PRE_ROLL,
+        pause=settings.get("command_pause", 0.7),
+        max_duration=5.0,
+        start_timeout=5.0,
+    )
+    if not segmenter.speech_started:
+        return None
+    return samples_to_audio_data(segmenter.audio())
+
+
+def confirm_enrolled_speaker(audio=None):
+    """
+    Name of the enrolled speaker heard in `audio` (default: a confirmation
+    recorded from the mic), or None. Changes to the enrolled voices need
+    one, since anyone can reach these routes.
+    """
+    if audio is None:
+        audio = record_confirmation()
+        if audio is None:
+            return None
+    speaker, _ = verify_audio(audio)
+    return speaker
+
+
+def authorize_enrollment(username, overwrite, audio=None):
+    """
+    Whether enrolling `username` may go ahead -> None, or (error payload,
+    status). The first speaker enrolls freely; after that an enrolled
+    speaker must confirm (see confirm_enrolled_speaker), and an enrolled
+    name is only replaced when `overwrite` is set.
+    """
+    if username in vs.store and not overwrite:
+        return {"error": f"'{username}' is already enrolled. Pass overwrite=true to replace their voice."}, 409
+    if len(vs.store) == 0:
+        return None
+    speaker = confirm_enrolled_speaker(audio)
+    if speaker is None:
+        return {"error": "Only an enrolled speaker can enroll voices."}, 403
+    print(f"🔐 Enrollment of '{username}' confirmed by {speaker}.")
+    return None
+
+
+def enroll_speaker(audio, username=DEFAULT_SPEAKER):
+    """Compute and store the speaker embedding for an enrollment recording."""
+    first = len(vs.store) == 0
+    audio_np = wav_to_numpy(audio.get_wav_data())
+    vs.save_embedding(username, vs.get_embedding(audio_np))
+    print(f"Enrollment completed for '{username}'.")
+    if not first:
+        return {"message": f"Enrolled the voice of '{username}'.", "enrolled": True, "speaker": username}
+    return {
+        "error": "No enrolled voice found. Enrolling now.",
+        "enroll_required": True,
+        "speaker": username,
+    }
+
+
+def enroll_from_audio(audio, username=DEFAULT_SPEAKER):
     try:
-        return json.loads(text)
+        return jsonify(enroll_speaker(audio, username)), 200
     except Exception as e:
-        print(f"⚠️ JSON parsing failed: {e}")
-        # Try to extract first valid JSON-looking segment
-        import re
-        match = re.search(r"\{[\s\S]*\}", text)
-        if match:
-            try:
-                return json.loads(match.group(0))
-            except Exception as e2:
-                print(f"⚠️ Fallback parse failed: {e2}")
-        # Final fallback
-        return {"action": "none", "reply": text}
+        print("Enrollment failed:", e)
+        return jsonify({"error": "Voice enrollment failed.", "details": str(e)}), 500
+
+
+def transcribe_audio(audio):
+    """Speech-to-text for one utterance ("" if nothing intelligible was said)."""
+    return speech_engine.transcribe(wav_to_numpy(audio.get_wav_data()), audio.sample_rate)
+
+
+def verify_audio(audio):
+    """Identify the speaker among all enrolled users -> (username or None, similarity)."""
+    audio_np = wav_to_numpy(audio.get_wav_data())
+    return vs.verify_any(audio_np)
+
+
+def verify_speaker(audio, verifier=None):
+    """Like verify_audio, but reuses a verifier that was fed during capture."""
+    if verifier is not None:
+        return verifier.finish()
+    return verify_audio(audio)
+
+
+def start_partials(sample_rate=16000, noise_floor=None):
+    """
+    Partial transcription of the command being recorded, feeding a new
+    speculation for it -> (PartialTranscriber, speculation), (None, None) when off.
+    """
+    if speculator is None:
+        return None, None
+    speculation = speculator.begin()
+    partials = PartialTranscriber(speech_engine.transcribe, partial(speculator.observe, speculation),
+                                  sample_rate=sample_rate, interval=speculation_settings.get("interval", 0.6),
+                                  max_audio=speculation_settings.get("max_audio", 4.0),
+                                  noise_floor=noise_floor or audio_hub.noise_floor)
+    return partials, speculation
+
+
+def settle_speculation(speculation):
+    """The utterance ends without an action: roll back whatever it prepared."""
+    if speculation is not None:
+        speculator.resolve(speculation, None)
+
+
+def capture_command(verify_voice):
+    """
+    Record one spoken command from the shared mic -> (audio or None,
+    verifier, speculation). When verifying, the speaker is checked while
+    they talk; a verifier with decision "reject" means they were cut off
+    early. Pass the speculation on to dispatch_action.
+    """
+    verifier = vs.incremental(noise_floor=audio_hub.noise_floor) if verify_voice else None
+    partials, speculation = start_partials()
+
+    def on_block(block):
+        if partials:
+            partials.feed(block)
+        return verifier is not None and verifier.feed(block) == "reject"
+
+    segmenter = audio_hub.record_utterance(
+        pre_roll=COMMAND_PRE_ROLL,
+        pause=settings.get("command_pause", 0.7),
+        max_duration=10.0,
+        start_timeout=10.0,
+        on_block=on_block if verifier or partials else None,
+    )
+    if partials:
+        partials.close()
+    if verifier and verifier.decision == "reject":
+        print(f"⛔ Voice rejected after {verifier.decided_at:.2f}s (score {verifier.score:.3f})")
+        settle_speculation(speculation)
+        return None, verifier, None
+    if not segmenter.speech_started:
+        settle_speculation(speculation)
+        return None, verifier, None
+    return samples_to_audio_data(segmenter.audio()), verifier, speculation
+
+
+def dispatch_action(decision, speculation=None):
+    """
+    Run the action Gemini chose. Returns the reply text, or None if nothing
+    matched. `speculation` is the spoken command's, from capture.
+    """
+    action = str(decision.get("action", "none")).lower()
+    # Whatever was prepared from partial transcripts: used if it matches, else
+    # undone (also when the action already started early from Gemini's stream)
+    prepared = None
+    if speculation is not None:
+        prepared = speculator.resolve(speculation, None if "_early" in decision else decision)
+    early = decision.pop("_early", None)
+    if early is not None:
+        early_reply = early.result()
+        spec = EARLY_ACTIONS.get(action)
+        if spec is not None and spec[2]:
+            return early_reply
+    target = decision.get("target", "")
+    content = decision.get("content", "")
+    to = decision.get("to", "")
+    subject = decision.get("subject", "")
+    body = decision.get("body", "")
 
-    except Exception as e:
-        print("❌ Gemini interpretation failed:", e)
-        return {"action": "none", "reply": f"Sorry, something went wrong: {e}"}
+    if action == "open_browser" and target:
+        return open_browser(target, prefetched=prepared)
+    elif action == "open_app" and target:
+        return open_local_app(target)
+    elif action == "write_text" and target and content:
+        return write_to_app(target, content)
+    elif action == "compose_email":
+        return compose_email(to, subject, body)
+    return None
+
+
+def process_voice_audio(audio, verify_voice, extra=None, verifier=None, speculation=None):
+    """
+    Verify (optionally), transcribe and act on one recorded utterance.
+
+    Verification and transcription run side by side on `voice_pool` over the
+    same buffer; if the speaker is rejected the transcript is discarded.
+    Dispatch only starts once both have finished. A `verifier` that was fed
+    during capture only has its tail left to finish.
+    """
+    print("Processing your voice...")
+    transcription = voice_pool.submit(transcribe_audio, audio)
+
+    speaker = None
+    if verify_voice:
+        verification = voice_pool.submit(verify_speaker, audio, verifier)
+        speaker, similarity = verification.result()
+        if speaker is None:
+            # Not started yet -> cancelled; already running -> result ignored
+            transcription.cancel()
+            settle_speculation(speculation)
+            return jsonify({"error": "Voice not recognized"}), 403
+        print(f"✅ Voice verified as {speaker}!")
 
+    try:
+        user_text = transcription.result()
+    except TranscriptionError as e:
+        print(f"❌ Speech recognition service error: {e}")
+        settle_speculation(speculation)
+        return jsonify({
+            "error": "Speech recognition service unavailable. Check your internet connection."
+        }), 503
+
+    if not user_text:
+        print("❌ Could not understand audio (speech unintelligible).")
+        settle_speculation(speculation)
+        return jsonify({
+            "error": "Sorry, I couldn’t understand what you said. Please try again."
+        }), 400
+    print(f"🗣️ You said: {user_text}")
+
+    gemini_decision = decide_action(user_text)
+    action = str(gemini_decision.get("action", "none")).lower()
+    reply = gemini_decision.get("reply", "")
+
+    reply_text = dispatch_action(gemini_decision, speculation)
+    if reply_text is None:
+        reply_text = reply if reply and reply.strip() else "I'm not sure what to do yet."
+
+    print(f"✅ Reply: {reply_text}")
+    result = {"text": user_text, "reply": reply_text, "action": action}
+    if speaker:
+        result["speaker"] = speaker
+    if extra:
+        result.update(extra)
+    return jsonify(result)
 
-# ==============================================================
-# 🎙️ Voice Route
-# ==============================================================
 
 @app.route("/listen-voice", methods=["POST"])
 def listen_voice():
     try:
         verify_voice = False
+        enroll = False
         if request.is_json:
-            verify_voice = request.get_json().get("verify_voice", False)
+            data = request.get_json()
+            verify_voice = data.get("verify_voice", False)
+            enroll = data.get("enroll", False)
+            overwrite = data.get("overwrite", False)
+            username = data.get("username") or DEFAULT_SPEAKER
         else:
             verify_voice = request.form.get("verify_voice", "false").lower() == "true"
-
-        global enrolled_embedding
+            enroll = request.form.get("enroll", "false").lower() == "true"
+            overwrite = request.form.get("overwrite", "false").lower() == "true"
+            username = request.form.get("username") or DEFAULT_SPEAKER
 
         # -------- Voice Signature Enrollment Workflow ----------
-        # -------- Voice Signature Enrollment Workflow ----------
-        if verify_voice:
-            if enrolled_embedding is None:
-                print("No enrolled voice found. Recording and enrolling now...")
-                with sr.Microphone() as source:
-                    recognizer.adjust_for_ambient_noise(source, duration=1)
-                    print("Recording 8s for voice enrollment (speak normally)...")
-                    audio = recognizer.listen(source, timeout=8, phrase_time_limit=8)
-                try:
-                    wav = audio.get_wav_data()
-                    audio_np = wav_to_numpy(wav)
-                    enrolled_embedding = vs.get_embedding(audio_np)
-                    vs.save_embedding("default_user", enrolled_embedding)
-                    print("Enrollment completed.")
-                    return jsonify({
-                        "error": "No enrolled voice found. Enrolling now.",
-                        "enroll_required": True
-                    }), 200
-                except Exception as e:
-                    print("Enrollment failed:", e)
-                    return jsonify({"error": "Voice enrollment failed.", "details": str(e)}), 500
+        if needs_enrollment(verify_voice, enroll):
+            refusal = authorize_enrollment(username, overwrite)
+            if refusal is not None:
+                return jsonify(refusal[0]), refusal[1]
+            return enroll_from_audio(record_enrollment(username), username)
 
+        if verify_voice:
             # Record ONCE for both verification and transcription
             print("🎧 Recording for verification and transcription...")
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source, duration=1)
-                recognizer.pause_threshold = 0.7
-                audio = recognizer.listen(source, timeout=10, phrase_time_limit=10)
-            
-            # Verify first
-            wav = audio.get_wav_data()
-            audio_np = wav_to_numpy(wav)
-            verified = vs.verify(enrolled_embedding, audio_np)
-            if not verified:
-                return jsonify({"error": "Voice not recognized"}), 403
-            print("✅ Voice verified!")
         else:
             print("Voice signature verification skipped (toggle off)")
-            # Record for transcription only
             print("Recording and transcribing...")
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source, duration=1)
-                recognizer.pause_threshold = 0.7
-                audio = recognizer.listen(source, timeout=10, phrase_time_limit=10)
-
-        # ---------- Transcription (uses `audio` from above) ----------
-        print("Processing your voice...")
-        try:
-            user_text = recognizer.recognize_google(audio)
-            print(f"You said: {user_text}")
-        except sr.UnknownValueError:
-            print("Could not understand audio (speech unintelligible).")
-            return jsonify({
-                "error": "Sorry, I couldn't understand what you said. Please try again."
-            }), 400
-        except sr.RequestError as e:
-            print(f"Speech recognition service error: {e}")
-            return jsonify({
-                "error": "Speech recognition service unavailable. Check your internet connection."
-            }), 503
+        audio, verifier, speculation = capture_command(verify_voice)
+        if verifier and verifier.decision == "reject":
+            return jsonify({"error": "Voice not recognized"}), 403
+        if audio is None:
+            return jsonify({"error": "No speech detected. Please try again."}), 400
 
-        # ----- Gemini/Action logic -----
-        # ... rest of your code ...
+        return process_voice_audio(audio, verify_voice, verifier=verifier, speculation=speculation)
 
+    except Exception as e:
+        print("Full backend error:\n", traceback.format_exc())
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
-        # ----- Gemini/Action logic like before -----
 
-        print("🧠 Processing your voice...")
+# ==============================================================
+# 🌊 Streaming Voice Route
+# ==============================================================
 
-        try:
-            user_text = recognizer.recognize_google(audio)
-            print(f"🗣️ You said: {user_text}")
-        except sr.UnknownValueError:
-            print("❌ Could not understand audio (speech unintelligible).")
-            return jsonify({
-                "error": "Sorry, I couldn’t understand what you said. Please try again."
-            }), 400
-        except sr.RequestError as e:
-            print(f"❌ Speech recognition service error: {e}")
-            return jsonify({
-                "error": "Speech recognition service unavailable. Check your internet connection."
-            }), 503
-
-
-        gemini_decision = ask_gemini_for_action(user_text)
-        action = str(gemini_decision.get("action", "none")).lower()
-        target = gemini_decision.get("target", "")
-        reply = gemini_decision.get("reply", "")
-
-        # Map action to reply if none
-        if not reply or not reply.strip():
-            if action and target:
-                reply = f"Action: {action} - {target}"
-            else:
-                reply = "[No reply from AI]"
+STREAM_READ_SIZE = 4096  # bytes per read from the request body (~128 ms of 16 kHz PCM16)
 
-        print(f"Reply: {reply}")
-        return jsonify({"text": user_text, "reply": reply, "action": action})
 
-    except Exception as e:
-        print("Full backend error:\n", traceback.format_exc())
-        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
-        content = gemini_decision.get("content", "")
-        to = gemini_decision.get("to", "")
-        subject = gemini_decision.get("subject", "")
-        body = gemini_decision.get("body", "")
-
-        if action == "open_browser" and target:
-            reply_text = open_browser(target)
-        elif action == "open_app" and target:
-            reply_text = open_local_app(target)
-        elif action == "write_text" and target and content:
-            reply_text = write_to_app(target, content)
-        elif action == "compose_email":
-            reply_text = compose_email(to, subject, body)
-        elif action == "none" and reply:
-            reply_text = reply
-        else:
-            reply_text = "I'm not sure what to do yet."
+def capture_stream(stream, verify_voice, enroll, sample_rate=16000):
+    """
+    Segment one command streamed as PCM16 (raw, or a WAV file) from the
+    file-like `stream`, verifying the speaker while it arrives. Stops
+    reading at end of speech. Returns (audio, verifier, speculation, stream
+    stats, error) where error is None or an (error payload, status) to
+    answer with.
 
-        print(f"✅ Reply: {reply_text}")
-        return jsonify({"text": user_text, "reply": reply_text, "action": action})
-    
+    Other rates are resampled to 16 kHz as they arrive, so segmentation,
+    verification and enrollment always see audio at the rate they expect.
+    """
+    reader = PCMStreamReader(stream, sample_rate=sample_rate, block_size=STREAM_READ_SIZE)
+    try:
+        reader.read_header()
+    except ValueError as e:
+        return None, None, None, None, ({"error": str(e)}, 400)
+
+    source_rate = reader.sample_rate
+    sample_rate = vs.sample_rate
+    # The client's mic has its own noise level; track it from the stream itself
+    noise_floor = NoiseFloorEstimator(sample_rate)
+    segmenter = SpeechSegmenter(
+        sample_rate=sample_rate,
+        pause=settings.get("command_pause", 0.7),
+        max_duration=10.0,
+        noise_floor=noise_floor,
+    )
+    verifier = None
+    if verify_voice and not needs_enrollment(verify_voice, enroll):
+        verifier = vs.incremental(sample_rate=sample_rate, noise_floor=noise_floor)
+    partials = speculation = None
+    if not needs_enrollment(verify_voice, enroll):
+        partials, speculation = start_partials(sample_rate, noise_floor)
+    started = time.perf_counter()
+    end_of_speech = False
+    try:
+        for block in reader.blocks():
+            block = resample(block, source_rate, sample_rate)
+            noise_floor.update(block)
+            if verifier and verifier.feed(block) == "reject":
+                print(f"⛔ Streamed voice rejected after {verifier.decided_at:.2f}s")
+                settle_speculation(speculation)
+                return None, verifier, None, None, ({"error": "Voice not recognized"}, 403)
+            if partials:
+                partials.feed(block)
+            if segmenter.feed(block):
+                end_of_speech = True
+                break
+    finally:
+        if partials:
+            partials.close()
+    if not end_of_speech:
+        segmenter.finish()
+    segmented_at = time.perf_counter()
+
+    if not segmenter.speech_started:
+        settle_speculation(speculation)
+        return None, verifier, None, None, ({"error": "No speech detected in stream."}, 400)
+
+    print(f"🌊 Streamed {segmenter.duration:.2f}s of speech "
+          f"({'end of speech' if end_of_speech else 'end of upload'}).")
+    info = {
+        "speech_seconds": round(segmenter.duration, 3),
+        "received_bytes": reader.bytes_read,
+        "end_of_speech": end_of_speech,
+        "segmentation_ms": round((segmented_at - started) * 1000, 1),
+    }
+    return samples_to_audio_data(segmenter.audio(), sample_rate), verifier, speculation, info, None
+
+
+@app.route("/listen-voice/stream", methods=["POST"])
+def listen_voice_stream():
+    """
+    Streaming ingest for the frontend: the client pushes 16 kHz mono PCM16
+    (raw, or a WAV file) as a chunked POST body. Frames are segmented as they
+    arrive and the command is processed as soon as end of speech is detected,
+    without waiting for the upload to finish.
+
+    Query params: verify_voice=true|false, sample_rate (raw PCM only),
+    enroll=true|false and username (enroll the streamed audio instead),
+    overwrite=true|false (replace an enrolled name). Once anyone is enrolled,
+    the streamed enrollment itself must verify as an enrolled speaker.
+    """
+    try:
+        verify_voice = request.args.get("verify_voice", "false").lower() == "true"
+        enroll = request.args.get("enroll", "false").lower() == "true"
+        overwrite = request.args.get("overwrite", "false").lower() == "true"
+        username = request.args.get("username") or DEFAULT_SPEAKER
+        audio, verifier, speculation, info, error = capture_stream(
+            request.stream, verify_voice, enroll, int(request.args.get("sample_rate", 16000)))
+        if error is not None:
+            return jsonify(error[0]), error[1]
+
+        if needs_enrollment(verify_voice, enroll):
+            refusal = authorize_enrollment(username, overwrite, audio)
+            if refusal is not None:
+                return jsonify(refusal[0]), refusal[1]
+            print(f"Enrolling '{username}' from streamed audio...")
+            return enroll_from_audio(audio, username)
+
+        return process_voice_audio(audio, verify_voice, verifier=verifier, speculation=speculation,
+                                   extra={"stream": info})
 
     except Exception as e:
-        print("❌ Full backend error:\n", traceback.format_exc())
+        print("Full backend error:\n", traceback.format_exc())
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 
@@ -451,107 +906,177 @@ def listen_text():
 
     print(f"💬 Text command: {user_text}")
 
-    gemini_decision = ask_gemini_for_action(user_text)
-    action = gemini_decision.get("action", "none")
-    target = gemini_decision.get("target")
-    reply = gemini_decision.get("reply", "")
-    content = gemini_decision.get("content", "")
-    
-    # ✅ You added these lines, which is correct
-    to = gemini_decision.get("to", "")
-    subject = gemini_decision.get("subject", "")
-    body = gemini_decision.get("body", "")
-
-    if action == "open_browser" and target:
-        reply_text = open_browser(target)
-    elif action == "open_app" and target:
-        reply_text = open_local_app(target)
-    elif action == "write_text" and target and content:
-        reply_text = write_to_app(target, content)
-    # 🚨 ADD THIS BLOCK:
-    elif action == "compose_email":
-        reply_text = compose_email(to, subject, body)
-    else:
-        reply_text = reply or "I'm here and listening."
+    gemini_decision = decide_action(user_text)
+    reply_text = dispatch_action(gemini_decision)
+    if reply_text is None:
+        reply_text = gemini_decision.get("reply", "") or "I'm here and listening."
 
     return jsonify({"reply": reply_text})
 
+@app.route("/stats", methods=["GET"])
+def stats():
+    """Runtime counters for the fast paths (hit rates etc.)."""
+    return jsonify({
+        "intent_router": intent_router.stats(),
+        "decision_cache": decision_cache.stats(),
+        "noise_floor": audio_hub.noise_floor.snapshot(),
+        "speakers": len(vs.store),
+        "llm_stream": {
+            "replies": stream_stats["replies"],
+            "early_actions": stream_stats["early_actions"],
+            "early_mismatches": stream_stats["early_mismatches"],
+            "avg_first_action_ms": round(stream_stats["first_action_ms"] / max(stream_stats["early_actions"], 1), 1),
+            "avg_full_reply_ms": round(stream_stats["full_reply_ms"] / max(stream_stats["replies"], 1), 1),
+        },
+        "llm_client": llm_client.stats(),
+        "prompt": {
+            "requests": prompt_stats["requests"],
+            "prefix_tokens": prompt_stats["prefix_tokens"],
+            "avg_suffix_tokens": round(prompt_stats["suffix_tokens"] / max(prompt_stats["requests"], 1), 1),
+        },
+        "window_index": window_index.stats(),
+        "window_waits": window_waiter.stats(),
+        "text_injection": text_injector.stats(),
+        "browser_service": browser_service.stats() if browser_service else None,
+        "speculation": speculator.stats() if speculator else None,
+    })
+
+
+@app.route("/speakers", methods=["GET"])
+def list_speakers():
+    return jsonify({"speakers": [
+        {"username": name, "threshold": vs.store.threshold(name)} for name in vs.store.names
+    ]})
+
+
+@app.route("/speakers/<username>", methods=["DELETE"])
+def remove_speaker(username):
+    """Remove an enrolled voice; an enrolled speaker has to confirm at the mic first."""
+    if username not in vs.store:
+        return jsonify({"error": f"No enrolled speaker '{username}'"}), 404
+    speaker = confirm_enrolled_speaker()
+    if speaker is None:
+        return jsonify({"error": "Only an enrolled speaker can remove voices."}), 403
+    print(f"🔐 Removal of '{username}' confirmed by {speaker}.")
+    if not vs.remove(username):
+        return jsonify({"error": f"No enrolled speaker '{username}'"}), 404
+    return jsonify({"removed": username, "confirmed_by": speaker})
+
 # ==============================================================
 # 💤 Wakeword Detection Route
 # ==============================================================
 
-@app.route("/wakeword", methods=["POST"])
-def wakeword():
+WAKE_LLM_THRESHOLD = settings.get("wake_llm_threshold", 0.6)
+
+
+def ask_gemini_for_wake(text):
+    """LLM check for transcripts the local wake classifier is unsure about (None if unavailable)."""
     try:
-        with sr.Microphone() as source:
-            print("🎤 Listening for possible wake phrase...")
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio = recognizer.listen(source, timeout=3, phrase_time_limit=4)
+        reply = llm_client.generate(wake_prompt(text), deadline=settings.get("wake_llm_deadline", 2.0),
+                                    system=WAKE_SYSTEM_PROMPT).strip()
+    except LLMError as e:
+        print(f"⚠️ LLM wake check unavailable ({e}); keeping the local decision")
+        return None
+
+    match = re.search(r"\{[\s\S]*\}", reply)
+    data = json.loads(match.group(0)) if match else {"wake": False, "reason": "parse error"}
+
+    print(f"🤖 Gemini decision → {data}")
+    return {"wake": bool(data.get("wake", False)), "reason": data.get("reason", "")}
+
+
+def capture_wake_phrase():
+    """Record a short utterance for wake detection (None if nobody spoke)."""
+    print("🎤 Listening for possible wake phrase...")
+    segmenter = audio_hub.record_utterance(
+        pause=settings.get("wake_pause", 0.7),
+        max_duration=4.0,
+        start_timeout=3.0,
+    )
+    if not segmenter.speech_started:
+        return None
+    return samples_to_audio_data(segmenter.audio())
 
-        text = recognizer.recognize_google(audio).lower()
-        print(f"🗣️ Heard → {text}")
 
-        # ✅ Use double braces {{ }} so they render literally
-        prompt = """
-        You are Audient, a voice assistant.
-        Determine if the user is trying to wake up or greet you.
-        If it sounds like 'hey computer', 'hello', 'hi computer', etc., return:
-        { "wake": true, "reason": "greeting detected" }
-        Otherwise return:
-        { "wake": false, "reason": "not a wake phrase" }
-        User said: "<text>"
-        """.replace("<text>", text)
+def classify_wake(text):
+    """Local wake decision; the second value says whether the LLM should double-check."""
+    started = time.perf_counter()
+    decision = wake_classifier.classify(text)
+    print(f"⚡ Local wake decision → {decision} "
+          f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+    # Only unclear cases go to Gemini, and only if enabled in config.json
+    unsure = decision["confidence"] < WAKE_LLM_THRESHOLD and settings.get("wake_llm_fallback", False)
+    return decision, unsure
 
 
-        result = model.generate_content(prompt)
-        reply = result.text.strip()
+@app.route("/wakeword", methods=["POST"])
+def wakeword():
+    try:
+        audio = capture_wake_phrase()
+        if audio is None:
+            return jsonify({"wakeword_detected": False, "error": "no speech detected"})
 
-        match = re.search(r"\{[\s\S]*\}", reply)
-        data = json.loads(match.group(0)) if match else {"wake": False, "reason": "parse error"}
+        text = transcribe_audio(audio).lower()
+        if not text:
+            return jsonify({"wakeword_detected": False, "error": "no speech detected"})
+        print(f"🗣️ Heard → {text}")
 
-        print(f"🤖 Gemini decision → {data}")
+        decision, unsure = classify_wake(text)
+        if unsure:
+            decision = ask_gemini_for_wake(text) or decision
 
         return jsonify({
-            "wakeword_detected": data.get("wake", False),
+            "wakeword_detected": decision["wake"],
             "text": text,
-            "reason": data.get("reason", "")
+            "reason": decision["reason"]
         })
 
-    except sr.UnknownValueError:
-        return jsonify({"wakeword_detected": False, "error": "no speech detected"})
     except Exception as e:
         print("❌ Wakeword detection failed:", e)
         return jsonify({"wakeword_detected": False, "error": str(e)})
 
 
+def create_wake_spotter():
+    """Local wake-word spotter on a small dedicated faster-whisper model."""
+    wake_engine = create_engine({
+        **settings,
+        "stt_engine": "faster_whisper",
+        "stt_model": settings.get("wake_model", "tiny.en"),
+        "stt_cpu_threads": settings.get("wake_cpu_threads", 2),
+    })
+    wake_engine.load()
+    return WakeWordSpotter(
+        settings.get("wake_word", "friday"),
+        wake_engine,
+        end_pause=settings.get("wake_pause", 0.7),
+        noise_floor=audio_hub.noise_floor,
+    )
+
+
 def wakeword_background_listener():
-    """Continuously listens for wake words and triggers main listening flow."""
+    """Continuously listens for the wake word (locally) and triggers main listening flow."""
+    spotter = create_wake_spotter()
+    cursor = audio_hub.cursor()
+    print(f"👂 Passive listening for wake word '{spotter.wake_word}'...")
+
     while True:
         try:
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                print("👂 Passive listening for wake word...")
-                audio = recognizer.listen(source, timeout=4, phrase_time_limit=4)
+            # The spotter copies into its own window, so a view is enough
+            detection = spotter.feed(cursor.read(timeout=1.0, copy=False))
+            if not detection:
+                continue
 
-            text = ""
+            print(f"🎉 Wake word detected ({detection['text']!r}, score {detection['score']}, "
+                  f"decode {detection['decode_ms']} ms)! Activating listening mode...")
+            # Trigger real listening process
             try:
-                text = recognizer.recognize_google(audio).lower()
-                print(f"🗣️ Passive heard: {text}")
-            except sr.UnknownValueError:
-                continue  # just ignore silence
+                with app.test_request_context("/listen-voice", method="POST", json={"trigger": "wake"}):
+                    listen_voice()
             except Exception as e:
-                print("⚠️ Wakeword recognition issue:", e)
-                continue
+                print("⚠️ Wake listener trigger failed:", e)
 
-            # If the user says "hey audient" or "ok audient"
-            if re.search(r"\b(hey|hi|ok)\s+(audient|assistant|computer)\b", text):
-                print("🎉 Wake word detected! Activating listening mode...")
-                # Trigger real listening process
-                try:
-                    with app.test_request_context("/listen-voice", method="POST", json={"trigger": "wake"}):
-                        listen_voice()
-                except Exception as e:
-                    print("⚠️ Wake listener trigger failed:", e)
+            # Don't re-scan the command we just handled
+            cursor.skip_to_now()
         except Exception as e:
             print("⚠️ Wakeword listener loop error:", e)
             time.sleep(1)
@@ -571,6 +1096,14 @@ if __name__ == "__main__":
     wake_thread.start()
     print("🎧 Wakeword listener thread started successfully!")
 
-    # ✅ Run Flask ONCE with reloader disabled to prevent double instances
-    app.run(host="127.0.0.1", port=5000, debug=True, use_reloader=False)
+    if "--asgi" in sys.argv:
+        # Async handlers for the voice/text routes, Flask (over WSGI) for the rest
+        import uvicorn
+        from asgi_app import AsgiApp
+
+        asgi_app = AsgiApp(sys.modules[__name__], app, limits=settings.get("asgi_limits"))
+        uvicorn.run(asgi_app, host="127.0.0.1", port=5000, log_level="warning")
+    else:
+        # ✅ Run Flask ONCE with reloader disabled to prevent double instances
+        app.run(host="127.0.0.1", port=5000, debug=True, use_reloader=False)
     
@@ -0,0 +1,83 @@
+# LLM prompts and the JSON contract their replies must follow. Shared by
+# main.py and check_llm_contract.py so every backend is held to the same rules.
+
+# Static instructions: identical on every call, so backends can reuse the
+# processed prefix (Ollama keeps it in its KV cache between requests)
+ACTION_SYSTEM_PROMPT = """
+You are VocalAI, a desktop AI assistant that translates user speech into JSON commands.
+You can control a web browser and local applications.
+
+Always reply **only in valid JSON** using one of the following structures:
+
+- { "action": "open_browser", "target": "<url or website name>" }
+- { "action": "open_app", "target": "<local application name>" }
+- { "action": "write_text", "target": "<app name>", "content": "<the text to write>" }
+- { "action": "append_text", "target": "<app name>", "content": "<text to add>" }
+- { "action": "compose_email", "to": "<recipient email or name>", "subject": "<subject line>", "body": "<email body text>" }
+- { "action": "none", "reply": "<textual reply>" }
+
+Example:
+User: "Send an email to my professor about my project progress."
+→ { "action": "compose_email", "to": "professor", "subject": "Project Progress Update", "body": "Dear Professor, I wanted to update you on my current project progress..." }
+
+Be concise, structured, and strictly output JSON.
+"""
+
+WAKE_SYSTEM_PROMPT = """
+You are Audient, a voice assistant.
+Determine if the user is trying to wake up or greet you.
+If it sounds like 'hey computer', 'hello', 'hi computer', etc., return:
+{ "wake": true, "reason": "greeting detected" }
+Otherwise return:
+{ "wake": false, "reason": "not a wake phrase" }
+"""
+
+# action -> fields a reply with that action must carry
+ACTION_FIELDS = {
+    "open_browser": ("target",),
+    "open_app": ("target",),
+    "write_text": ("target", "content"),
+    "append_text": ("target", "content"),
+    "compose_email": ("to", "subject", "body"),
+    "none": ("reply",),
+}
+
+
+MAX_CONTEXT_WINDOWS = 5
+MAX_TITLE_CHARS = 60
+
+
+def action_prompt(user_text, open_windows):
+    """
+    The per-request part of the action prompt, sent after the static
+    ACTION_SYSTEM_PROMPT: a few recent window titles and the user's words.
+    """
+    titles = [t if len(t) <= MAX_TITLE_CHARS else t[:MAX_TITLE_CHARS - 1] + "…"
+              for t in open_windows[:MAX_CONTEXT_WINDOWS]]
+    return f"Open windows (most recent first): {' | '.join(titles) or 'none'}\nUser: {user_text}"
+
+
+def wake_prompt(text):
+    return f'User said: "{text}"'
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for logging prompt sizes."""
+    return (len(text) + 3) // 4
+
+
+def contract_errors(decision):
+    """Ways a parsed action reply breaks the contract ([] if it's fine)."""
+    if not isinstance(decision, dict):
+        return ["reply is not a JSON object"]
+    action = decision.get("action")
+    if action not in ACTION_FIELDS:
+        return [f"unknown action {action!r}"]
+    return [f"{action} without {field!r}" for field in ACTION_FIELDS[action]
+            if not isinstance(decision.get(field), str) or not decision[field].strip()]
+
+
+def wake_contract_errors(decision):
+    if not isinstance(decision, dict) or not isinstance(decision.get("wake"), bool):
+        return ["wake reply needs a boolean 'wake'"]
+    return []
@@ -1,27 +1,20 @@
-import sounddevice as sd
-import queue
-import numpy as np
+import os
+import sys
+
+from settings import ROOT_DIR
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+from audio_hub import get_hub
 
 class AudioToTextRecorder:
     def __init__(self, sample_rate=16000, chunk_duration=3):
         self.sample_rate = sample_rate
         self.chunk_duration = chunk_duration
-        self.q = queue.Queue()
-
-    def _callback(self, indata, frames, time, status):
-        if status:
-            print(f"Audio input status: {status}")
-        self.q.put(indata.copy())
+        # Shared capture stream; reading doesn't reopen the device per chunk
+        self.hub = get_hub(sample_rate)
 
     def record_audio_chunk(self):
         print(f"Recording audio chunk for {self.chunk_duration} seconds...")
-        frames = int(self.sample_rate * self.chunk_duration)
-        audio_frames = []
-        with sd.InputStream(samplerate=self.sample_rate, channels=1, callback=self._callback):
-            while sum(len(f) for f in audio_frames) < frames:
-                audio_frames.append(self.q.get())
-
-        audio_np = np.concatenate(audio_frames, axis=0).flatten()
+        audio_np = self.hub.record_seconds(self.chunk_duration)
         print(f"Recorded {len(audio_np)/self.sample_rate:.2f} seconds of audio")
         return audio_np
 
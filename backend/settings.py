@@ -0,0 +1,14 @@
+import json
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CONFIG_FILE = os.path.join(ROOT_DIR, "config.json")
+
+
+def load_settings():
+    """Read the shared config.json (wake word, pause lengths, ...)."""
+    if not os.path.exists(CONFIG_FILE):
+        print(f"⚠️ {CONFIG_FILE} not found, using defaults.")
+        return {}
+    with open(CONFIG_FILE, "r") as f:
+        return json.load(f)
@@ -0,0 +1,231 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class Speculation:
+    """One piece of preparation started from a partial transcript."""
+
+    def __init__(self, key, decision, future, started):
+        self.key = key
+        self.decision = decision
+        self.future = future
+        self.started = started
+        self.finished = None  # monotonic time the preparation completed
+
+
+class Utterance:
+    """Speculation state of one utterance; the handle Speculator.begin() returns."""
+
+    def __init__(self):
+        self.current = None      # the Speculation in progress, if any
+        self.llm_warmed = False
+        self.resolved = False
+        self.started = time.monotonic()
+
+
+class Speculator:
+    """
+    Starts cheap, reversible preparation while the user is still talking.
+
+    Each partial transcript goes through the intent router's `peek()`; if it
+    already names an action (open_app / open_browser...) the matching
+    preparer runs in the background: `preparers[action](decision)` returns a
+    handle, and `rollbacks[action](decision, handle)` undoes it if the final
+    command turns out different. A partial the router can't place is likely
+    headed for the LLM, so `warm_llm()` is called (once per utterance) to
+    have a connection or model ready.
+
+    State is per utterance, so concurrent requests never touch each other's
+    preparation: `begin()` returns an Utterance, `observe(utterance, text)`
+    feeds its partials, and `resolve(utterance, decision)` is called with its
+    final decision. The matching preparation is a hit (its handle is
+    returned so the action can use it, and the preparation time overlapped
+    with speech counts as saved), any other is rolled back. Utterances left
+    unresolved for `stale_after` seconds are rolled back by a later begin().
+    """
+
+    def __init__(self, router, preparers, rollbacks=None, warm_llm=None, min_chars=4, workers=2,
+                 stale_after=60.0):
+        self.router = router
+        self.preparers = preparers
+        self.rollbacks = rollbacks or {}
+        self.warm_llm = warm_llm
+        self.min_chars = min_chars
+        self.stale_after = stale_after
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self._open = set()  # utterances begun but not resolved yet
+        self._stats = {"partials": 0, "started": 0, "hits": 0, "misses": 0, "rolled_back": 0,
+                       "llm_warmups": 0, "saved_ms": 0.0}
+
+    @staticmethod
+    def key(decision):
+        return (decision.get("action"), str(decision.get("target", "")).lower())
+
+    def begin(self):
+        """A new utterance -> its Utterance handle."""
+        utterance = Utterance()
+        with self._lock:
+            stale = [u for u in self._open if utterance.started - u.started > self.stale_after]
+            self._open.add(utterance)
+        for leftover in stale:
+            self.resolve(leftover, None)
+        return utterance
+
+    def observe(self, utterance, partial_text):
+        """Feed a partial transcript of `utterance` (any thread)."""
+        text = (partial_text or "").strip()
+        if len(text) < self.min_chars or utterance.resolved:
+            return
+        self._stats["partials"] += 1
+        decision = self.router.peek(text)
+        if decision is None or decision.get("action") not in self.preparers:
+            if decision is None and self.warm_llm is not None:
+                with self._lock:
+                    warm, utterance.llm_warmed = not utterance.llm_warmed, True
+                if warm:
+                    self._stats["llm_warmups"] += 1
+                    self._pool.submit(self.warm_llm)
+            return
+
+        key = self.key(decision)
+        with self._lock:
+            if utterance.resolved:
+                return  # a late partial; the final decision is already in
+            if utterance.current is not None and utterance.current.key == key:
+                return  # already preparing this
+            replaced = utterance.current
+            speculation = Speculation(key, decision, None, time.monotonic())
+            speculation.future = self._pool.submit(self._prepare, speculation)
+            utterance.current = speculation
+            self._stats["started"] += 1
+        print(f"🔮 Speculating {key[0]} {key[1]!r} from partial: {text!r}")
+        if replaced is not None:
+            self._rollback(replaced)
+
+    def _prepare(self, speculation):
+        try:
+            return self.preparers[speculation.key[0]](speculation.decision)
+        finally:
+            speculation.finished = time.monotonic()
+
+    def resolve(self, utterance, decision):
+        """
+        The final decision for `utterance` (None: no action, roll back).
+        Returns the matching preparation's handle, or None.
+        """
+        with self._lock:
+            speculation, utterance.current = utterance.current, None
+            utterance.resolved = True
+            self._open.discard(utterance)
+        if speculation is None:
+            return None
+        now = time.monotonic()
+        if decision is None or self.key(decision) != speculation.key:
+            self._stats["misses"] += 1
+            self._rollback(speculation)
+            return None
+
+        self._stats["hits"] += 1
+        # Preparation that finished before the final decision was free; a
+        # still-running one saved the part that had already happened
+        finished = speculation.finished or now
+        saved_ms = (min(finished, now) - speculation.started) * 1000
+        self._stats["saved_ms"] += saved_ms
+        print(f"🔮 Speculation hit: {speculation.key[0]} {speculation.key[1]!r} ({saved_ms:.0f} ms ahead)")
+        try:
+            return speculation.future.result()  # a preparation still running is waited for
+        except Exception as e:
+            print(f"⚠️ Speculative {speculation.key[0]} failed: {e}")
+            return None
+
+    def _rollback(self, speculation):
+        rollback = self.rollbacks.get(speculation.key[0])
+        if speculation.future.cancel() or rollback is None:
+            return
+        self._stats["rolled_back"] += 1
+
+        def undo():
+            handle = speculation.future.result() if speculation.future.exception() is None else None
+            if handle is not None:
+                rollback(speculation.decision, handle)
+        self._pool.submit(undo)
+
+    def stats(self):
+        resolved = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "saved_ms": round(self._stats["saved_ms"], 1),
+            "hit_rate": round(self._stats["hits"] / resolved, 3) if resolved else None,
+            "avg_saved_ms": round(self._stats["saved_ms"] / max(self._stats["hits"], 1), 1),
+        }
+
+
+class PartialTranscriber:
+    """
+    Transcribes the audio captured so far every `interval` seconds while an
+    utterance is being recorded, and hands the text to `on_partial`. At most
+    one decode runs at a time; blocks that arrive meanwhile are just
+    buffered, so a slow engine produces fewer partials rather than a queue.
+
+    Only the first `max_audio` seconds are decoded: a command names its
+    action in its opening words, and a bounded decode can't hold up the
+    final one for long. With a `noise_floor`, blocks before the first one
+    above it are dropped, so the wait for speech to start isn't decoded, and
+    no decode starts on a quiet block, which may be the trailing pause that
+    ends the utterance and is followed by the final decode.
+    """
+
+    def __init__(self, transcribe, on_partial, sample_rate=16000, interval=0.6, min_audio=0.5,
+                 max_audio=4.0, noise_floor=None):
+        self.transcribe = transcribe
+        self.on_partial = on_partial
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.min_audio = min_audio
+        self.max_audio = max_audio
+        self.noise_floor = noise_floor
+        self._blocks = []
+        self._samples = 0
+        self._decoded_at = 0
+        self._busy = threading.Event()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="partial-stt")
+
+    def feed(self, block):
+        """Add a captured block (float32). Never blocks on decoding."""
+        quiet = (self.noise_floor is not None
+                 and np.sqrt(np.mean(np.square(block))) <= self.noise_floor.threshold)
+        if not self._blocks and quiet:
+            return False
+        limit = int(self.max_audio * self.sample_rate)
+        if self._samples < limit:
+            block = block[:limit - self._samples]
+            self._blocks.append(block)
+            self._samples += len(block)
+        pending = self._samples - self._decoded_at
+        due = pending >= self.interval * self.sample_rate or (self._samples >= limit and pending > 0)
+        if (due and not quiet and self._samples >= self.min_audio * self.sample_rate
+                and not self._closed and not self._busy.is_set()):
+            self._busy.set()
+            self._decoded_at = self._samples
+            self._pool.submit(self._decode, np.concatenate(self._blocks))
+        return False  # usable as an on_block callback: never stops the capture
+
+    def _decode(self, audio):
+        try:
+            text = self.transcribe(audio, self.sample_rate)
+            if text and not self._closed:
+                self.on_partial(text)
+        except Exception as e:
+            print(f"⚠️ Partial transcription failed: {e}")
+        finally:
+            self._busy.clear()
+
+    def close(self):
+        """Stop reporting partials (a decode in flight finishes but is dropped)."""
+        self._closed = True
+        self._pool.shutdown(wait=False)
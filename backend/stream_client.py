@@ -0,0 +1,55 @@
+# stream_client.py
+# Streams a WAV fixture to /listen-voice/stream the way the frontend would,
+# so the streaming route can be exercised without a microphone.
+#
+#   python stream_client.py fixtures/open_youtube.wav --realtime
+
+import argparse
+import time
+import wave
+import requests
+
+CHUNK_MS = 100
+
+
+def stream_wav(path, realtime=False):
+    """Yield the raw WAV bytes (header included) in ~100 ms chunks."""
+    with wave.open(path, "rb") as wav_file:
+        if wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+            raise ValueError("Fixture must be 16-bit mono PCM")
+        frames_per_chunk = int(wav_file.getframerate() * CHUNK_MS / 1000)
+
+    chunk_bytes = frames_per_chunk * 2
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+            if realtime:
+                time.sleep(CHUNK_MS / 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a WAV file to the VocalAI backend.")
+    parser.add_argument("wav", help="16-bit mono WAV fixture")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/listen-voice/stream")
+    parser.add_argument("--verify", action="store_true", help="Request speaker verification")
+    parser.add_argument("--realtime", action="store_true", help="Pace chunks at real-time speed")
+    args = parser.parse_args()
+
+    params = {"verify_voice": "true" if args.verify else "false"}
+    started = time.perf_counter()
+    response = requests.post(
+        args.url,
+        params=params,
+        data=stream_wav(args.wav, realtime=args.realtime),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    elapsed = time.perf_counter() - started
+    print(f"HTTP {response.status_code} in {elapsed:.2f}s")
+    print(response.json())
+
+
+if __name__ == "__main__":
+    main()
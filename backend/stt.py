@@ -1,15 +1,18 @@
 import numpy as np
 import sounddevice as sd
 import os
-import pickle
 from resemblyzer import VoiceEncoder, preprocess_wav
 
+from embedding_store import EmbeddingStore
+from incremental_verifier import IncrementalVerifier
+
 class VoiceSignature:
-    def __init__(self, profile_dir="voice_profiles", sample_rate=16000):
+    def __init__(self, profile_dir="voice_profiles", sample_rate=16000, threshold=0.65):
         self.encoder = VoiceEncoder()
         self.profile_dir = profile_dir
         self.sample_rate = sample_rate
         os.makedirs(self.profile_dir, exist_ok=True)
+        self.store = EmbeddingStore(profile_dir, default_threshold=threshold)
 
     def record_audio(self, duration):
         print(f"Recording {duration}s of audio. Speak clearly...")
@@ -21,21 +24,18 @@ class VoiceSignature:
         wav = preprocess_wav(audio_np)
         return self.encoder.embed_utterance(wav)
 
-    def save_embedding(self, username, embedding):
-        path = os.path.join(self.profile_dir, f"{username}.pkl")
-        with open(path, "wb") as f:
-            pickle.dump(embedding, f)
-        print(f"Saved embedding for user '{username}' at: {path}")
+    def save_embedding(self, username, embedding, threshold=None):
+        self.store.add(username, embedding, threshold)
+        print(f"Saved embedding for user '{username}' ({len(self.store)} enrolled).")
 
     def load_embedding(self, username):
-        path = os.path.join(self.profile_dir, f"{username}.pkl")
-        if os.path.exists(path):
-            with open(path, "rb") as f:
-                embedding = pickle.load(f)
-                print(f"Loaded embedding for user '{username}'.")
-                return embedding
-        print(f"No embedding found for user '{username}'.")
-        return None
+        embedding = self.store.get(username)
+        if embedding is None:
+            print(f"No embedding found for user '{username}'.")
+        return embedding
+
+    def remove(self, username):
+        return self.store.remove(username)
 
     def enroll(self, username):
         print(f"Starting enrollment for user '{username}'...")
@@ -52,6 +52,21 @@ class VoiceSignature:
         print(f"Speaker similarity: {similarity:.3f}")
         return similarity > threshold
 
+    def incremental(self, **options):
+        """A streaming verifier to feed with frames as they are captured."""
+        options.setdefault("sample_rate", self.sample_rate)
+        return IncrementalVerifier(self.encoder, self.store, **options)
+
+    def identify(self, audio_np, k=3):
+        """Top-k (username, similarity) over every enrolled speaker."""
+        return self.store.identify(self.get_embedding(audio_np), k)
+
+    def verify_any(self, audio_np):
+        """(username, similarity) if the voice passes that user's threshold, else (None, similarity)."""
+        name, similarity = self.store.best_match(self.get_embedding(audio_np))
+        print(f"Speaker match: {name or 'unknown'} ({similarity:.3f})")
+        return name, similarity
+
 
 
 if __name__ == "__main__":
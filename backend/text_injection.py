@@ -0,0 +1,331 @@
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+# strategy: "paste", "keys" or "per_char"; elapsed_ms: wall time of the injection
+InjectResult = namedtuple("InjectResult", "strategy chars elapsed_ms")
+
+class PasteNotDelivered(Exception):
+    """The focused field's text didn't change after a paste."""
+
+
+# Characters pyautogui can type as plain key presses
+TYPEABLE = set(chr(c) for c in range(32, 127)) | {"\n", "\t"}
+
+
+def split_runs(text):
+    """[(typeable, run), ...]: consecutive characters grouped by whether they're plain keys."""
+    runs = []
+    for ch in text:
+        typeable = ch in TYPEABLE
+        if runs and runs[-1][0] == typeable:
+            runs[-1][1].append(ch)
+        else:
+            runs.append((typeable, [ch]))
+    return [(typeable, "".join(chars)) for typeable, chars in runs]
+
+
+class PyAutoGuiBackend:
+    """
+    Real keyboard/clipboard. Clipboard via pyperclip (installed with
+    pyautogui). Keys: on Windows one SendInput call per chunk with
+    KEYEVENTF_UNICODE events, which also covers non-ASCII text; elsewhere
+    pyautogui for plain keys and xdotool (or a one-off paste) for the rest.
+    The focused field's text length can only be read from classic Win32
+    edit controls; everywhere else it is None.
+    """
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+        self.system = platform.system().lower()
+        self._send_input = _windows_send_input() if self.system == "windows" else None
+        self._text_length = _windows_focused_text_length() if self.system == "windows" else None
+
+    def focused_text_length(self):
+        return self._text_length() if self._text_length is not None else None
+
+    def clipboard_get(self):
+        import pyperclip
+        return pyperclip.paste()
+
+    def clipboard_set(self, text):
+        import pyperclip
+        pyperclip.copy(text)
+
+    def paste(self):
+        self.pyautogui.hotkey("command" if self.system == "darwin" else "ctrl", "v", _pause=False)
+
+    def send_keys(self, text):
+        if self._send_input is not None:
+            return self._send_input(text)
+        for typeable, run in split_runs(text):
+            if typeable:
+                self.pyautogui.write(run, interval=0, _pause=False)
+            elif shutil.which("xdotool"):
+                subprocess.run(["xdotool", "type", "--delay", "0", "--", run], check=True)
+            else:
+                saved = self.clipboard_get()
+                self.clipboard_set(run)
+                self.paste()
+                time.sleep(0.05)
+                self.clipboard_set(saved)
+
+
+def _windows_send_input():
+    """A send(text) function using SendInput with Unicode key events (Windows only)."""
+    import ctypes
+    from ctypes import wintypes
+
+    INPUT_KEYBOARD, KEYEVENTF_KEYUP, KEYEVENTF_UNICODE = 1, 0x2, 0x4
+    VIRTUAL_KEYS = {"\n": 0x0D, "\t": 0x09}  # Enter/Tab as real keys, not characters
+    ULONG_PTR = ctypes.c_size_t
+
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                    ("time", wintypes.DWORD), ("dwExtraInfo", ULONG_PTR)]
+
+    class MOUSEINPUT(ctypes.Structure):
+        _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                    ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD), ("dwExtraInfo", ULONG_PTR)]
+
+    class _INPUT(ctypes.Union):
+        _fields_ = [("ki", KEYBDINPUT), ("mi", MOUSEINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _fields_ = [("type", wintypes.DWORD), ("u", _INPUT)]
+
+    def key(vk=0, scan=0, flags=0):
+        return INPUT(INPUT_KEYBOARD, _INPUT(ki=KEYBDINPUT(vk, scan, flags, 0, 0)))
+
+    def send(text):
+        events = []
+        for ch in text.replace("\r\n", "\n"):
+            if ch in VIRTUAL_KEYS:
+                events += [key(vk=VIRTUAL_KEYS[ch]), key(vk=VIRTUAL_KEYS[ch], flags=KEYEVENTF_KEYUP)]
+                continue
+            # Characters outside the BMP go as two UTF-16 surrogate events
+            units = ch.encode("utf-16-le")
+            for i in range(0, len(units), 2):
+                code = int.from_bytes(units[i:i + 2], "little")
+                events += [key(scan=code, flags=KEYEVENTF_UNICODE),
+                           key(scan=code, flags=KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)]
+        array = (INPUT * len(events))(*events)
+        ctypes.windll.user32.SendInput(len(events), array, ctypes.sizeof(INPUT))
+
+    return send
+
+
+def _windows_focused_text_length():
+    """
+    A length() function: text length of the focused control if it is a
+    Win32 edit/RichEdit control, else None (browsers, Electron and custom
+    controls don't answer WM_GETTEXTLENGTH truthfully).
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    WM_GETTEXTLENGTH, SMTO_ABORTIFHUNG = 0x000E, 0x0002
+    EDIT_CLASSES = {"edit", "richedit20a", "richedit20w", "richedit50w", "richeditd2dpt"}
+    user32 = ctypes.windll.user32
+
+    class GUITHREADINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.DWORD), ("flags", wintypes.DWORD), ("hwndActive", wintypes.HWND),
+                    ("hwndFocus", wintypes.HWND), ("hwndCapture", wintypes.HWND),
+                    ("hwndMenuOwner", wintypes.HWND), ("hwndMoveSize", wintypes.HWND),
+                    ("hwndCaret", wintypes.HWND), ("rcCaret", wintypes.RECT)]
+
+    def length():
+        info = GUITHREADINFO(cbSize=ctypes.sizeof(GUITHREADINFO))
+        if not user32.GetGUIThreadInfo(0, ctypes.byref(info)) or not info.hwndFocus:
+            return None
+        class_name = ctypes.create_unicode_buffer(64)
+        user32.GetClassNameW(info.hwndFocus, class_name, 64)
+        if class_name.value.lower() not in EDIT_CLASSES:
+            return None
+        result = ctypes.c_size_t()
+        if not user32.SendMessageTimeoutW(info.hwndFocus, WM_GETTEXTLENGTH, 0, 0, SMTO_ABORTIFHUNG, 200,
+                                          ctypes.byref(result)):
+            return None
+        return result.value
+
+    return length
+
+
+class FakeInputBackend:
+    """
+    Stand-in for a focused text field, for benchmarks: records what arrives
+    and charges simulated costs (`key_cost` seconds per key event,
+    `paste_cost` per paste). `reject_paste` models fields that ignore
+    pasting.
+    """
+
+    def __init__(self, key_cost=0.0002, paste_cost=0.03, reject_paste=False, clipboard="previous clipboard"):
+        self.key_cost = key_cost
+        self.paste_cost = paste_cost
+        self.reject_paste = reject_paste
+        self.clipboard = clipboard
+        self.received = []
+        self.key_events = 0
+        self.pastes = 0
+
+    @property
+    def text(self):
+        return "".join(self.received)
+
+    def clipboard_get(self):
+        return self.clipboard
+
+    def clipboard_set(self, text):
+        self.clipboard = text
+
+    def paste(self):
+        self.pastes += 1
+        time.sleep(self.paste_cost)
+        if not self.reject_paste:
+            self.received.append(self.clipboard)
+
+    def send_keys(self, text):
+        self.key_events += len(text)
+        time.sleep(self.key_cost * len(text))
+        self.received.append(text)
+
+    def focused_text_length(self):
+        return len(self.text)
+
+
+class TextInjector:
+    """
+    Puts text into the focused window as fast as the target allows.
+
+    - paste: save the clipboard, paste the text, restore the clipboard after
+      `restore_delay` (the app reads it asynchronously). Used for text of
+      `paste_threshold` characters or more.
+    - keys: bulk key events, `chunk_size` characters per call with a short
+      pause so the app's input queue keeps up. Used for short text, apps in
+      `no_paste_apps`, and when pasting fails.
+    - per_char: one character at a time every `char_interval` seconds, for
+      `per_char_apps` (fields that drop fast input) or when bulk keys fail.
+
+    Non-ASCII text is safe in all three: the clipboard carries Unicode and
+    the key backends send Unicode key events.
+
+    A field that ignores a paste raises nothing, so a paste is only known to
+    have failed when the backend can read the focused field's text length
+    (`focused_text_length()`; on Windows, classic edit controls such as
+    Notepad's). If it hasn't changed within `confirm_timeout` the text is
+    typed instead. Elsewhere (browsers, Electron apps, macOS/Linux) an
+    ignored paste loses the text silently: list such apps in
+    `no_paste_apps` or `per_char_apps`.
+    """
+
+    def __init__(self, backend=None, paste_threshold=256, chunk_size=64, chunk_pause=0.005,
+                 char_interval=0.01, restore_delay=0.15, confirm_timeout=0.5,
+                 no_paste_apps=(), per_char_apps=()):
+        self._backend = backend
+        self.paste_threshold = paste_threshold
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self.char_interval = char_interval
+        self.restore_delay = restore_delay
+        self.confirm_timeout = confirm_timeout
+        self.no_paste_apps = {a.lower() for a in no_paste_apps}
+        self.per_char_apps = {a.lower() for a in per_char_apps}
+        self._lock = threading.Lock()  # one injection at a time: they share the keyboard/clipboard
+        self._stats = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = PyAutoGuiBackend()
+        return self._backend
+
+    def choose(self, text, app=""):
+        app = (app or "").lower()
+        if app in self.per_char_apps:
+            return "per_char"
+        if app in self.no_paste_apps or len(text) < self.paste_threshold:
+            return "keys"
+        return "paste"
+
+    def inject(self, text, app="", strategy="auto"):
+        """Type/paste `text` into the focused window. Returns an InjectResult."""
+        strategy = self.choose(text, app) if strategy == "auto" else strategy
+        order = ["paste", "keys", "per_char"]
+        sent = [0]  # characters already delivered; a fallback only sends the rest
+        with self._lock:
+            started = time.perf_counter()
+            for attempt in order[order.index(strategy):]:
+                try:
+                    getattr(self, f"_{attempt}")(text[sent[0]:], sent)
+                    break
+                except Exception as e:
+                    if attempt == order[-1]:
+                        raise
+                    print(f"⚠️ {attempt} injection failed after {sent[0]} chars ({e}); falling back")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(attempt, len(text), elapsed_ms)
+        return InjectResult(attempt, len(text), elapsed_ms)
+
+    def _paste(self, text, sent):
+        backend = self.backend
+        saved = backend.clipboard_get()
+        before = self._text_length()
+        backend.clipboard_set(text)
+        try:
+            backend.paste()
+            time.sleep(self.restore_delay)
+            if text and before is not None and not self._changed(before):
+                raise PasteNotDelivered("the focused field ignored the paste")
+            sent[0] += len(text)
+        finally:
+            backend.clipboard_set(saved)
+
+    def _text_length(self):
+        """Focused field's text length, or None where the backend can't tell."""
+        length = getattr(self.backend, "focused_text_length", None)
+        return length() if length is not None else None
+
+    def _changed(self, before):
+        """Whether the field's length moves off `before` within `confirm_timeout` (slow apps)."""
+        deadline = time.perf_counter() + self.confirm_timeout
+        while True:
+            after = self._text_length()
+            if after is None or after != before:
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def _keys(self, text, sent):
+        for i in range(0, len(text), self.chunk_size):
+            if i:
+                time.sleep(self.chunk_pause)
+            chunk = text[i:i + self.chunk_size]
+            self.backend.send_keys(chunk)
+            sent[0] += len(chunk)
+
+    def _per_char(self, text, sent):
+        for i, ch in enumerate(text):
+            if i:
+                time.sleep(self.char_interval)
+            self.backend.send_keys(ch)
+            sent[0] += 1
+
+    def _record(self, strategy, chars, elapsed_ms):
+        with self._lock:
+            entry = self._stats.setdefault(strategy, {"calls": 0, "chars": 0, "ms": 0.0})
+            entry["calls"] += 1
+            entry["chars"] += chars
+            entry["ms"] += elapsed_ms
+
+    def stats(self):
+        with self._lock:
+            return {
+                strategy: {**entry, "ms": round(entry["ms"], 1),
+                           "chars_per_s": round(entry["chars"] / max(entry["ms"] / 1000, 1e-9))}
+                for strategy, entry in self._stats.items()
+            }
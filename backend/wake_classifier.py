@@ -0,0 +1,136 @@
+import difflib
+import re
+
+DEFAULT_GREETINGS = (
+    "hey", "hi", "hello", "ok", "okay", "yo", "hiya",
+    "good morning", "good afternoon", "good evening", "wake up", "are you there",
+)
+# Generic ways of addressing the assistant besides its configured name
+DEFAULT_ADDRESSES = ("computer", "assistant", "audient")
+
+
+def soundex(word):
+    """Classic American Soundex code (e.g. 'friday' and 'fryday' -> F630)."""
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    codes = {}
+    for letters, digit in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6")):
+        for letter in letters:
+            codes[letter] = digit
+
+    result = word[0].upper()
+    last = codes.get(word[0], "")
+    for letter in word[1:]:
+        digit = codes.get(letter, "")
+        if digit and digit != last:
+            result += digit
+        if letter not in "hw":
+            last = digit
+    return (result + "000")[:4]
+
+
+def syllables(word):
+    """Rough syllable count: runs of vowels (with y), at least 1."""
+    return max(1, len(re.findall(r"[aeiouy]+", word.lower())))
+
+
+class WakePhraseClassifier:
+    """
+    Decides locally whether a transcript is someone waking/greeting the
+    assistant. Combines fuzzy string similarity and Soundex matching against
+    the configured wake word, generic addresses ("hey computer") and a list of
+    greeting variants, and returns a confidence score so callers can send
+    only unclear cases to an LLM.
+    """
+
+    def __init__(self, wake_word, greetings=DEFAULT_GREETINGS, addresses=DEFAULT_ADDRESSES,
+                 wake_threshold=0.75, allow_bare_greeting=True):
+        self.wake_word = wake_word.lower().strip()
+        self.greetings = sorted((g.lower() for g in greetings), key=len, reverse=True)
+        self.addresses = [a.lower() for a in addresses]
+        self.wake_threshold = wake_threshold
+        self.allow_bare_greeting = allow_bare_greeting
+
+    @staticmethod
+    def _words(text):
+        return re.findall(r"[a-z']+", text.lower())
+
+    # Below this spelling similarity a Soundex match is ignored: Soundex keeps
+    # only the first letter and a few consonants, so "forty", "fired" and
+    # "ford" all share F630 with "friday"
+    PHONETIC_MIN_RATIO = 0.6
+
+    @staticmethod
+    def similarity(candidate, target):
+        """
+        0..1 spelling similarity. Soundex only breaks near-ties: a candidate
+        that is already reasonably close, sounds the same and has as many
+        syllables is moved halfway towards 0.8.
+        """
+        score = difflib.SequenceMatcher(None, candidate, target).ratio()
+        if score < WakePhraseClassifier.PHONETIC_MIN_RATIO:
+            return score
+        c_words, t_words = candidate.split(), target.split()
+        if len(c_words) == len(t_words) and all(
+                soundex(a) == soundex(b) and syllables(a) == syllables(b) for a, b in zip(c_words, t_words)):
+            score = max(score, (score + 0.8) / 2)
+        return score
+
+    def _best_match(self, words, target):
+        """Best similarity of `target` against any run of words; returns (score, index)."""
+        size = len(target.split())
+        best, best_index = 0.0, -1
+        for i in range(max(0, len(words) - size + 1)):
+            score = self.similarity(" ".join(words[i:i + size]), target)
+            if score > best:
+                best, best_index = score, i
+        return best, best_index
+
+    def _leading_greeting(self, words):
+        text = " ".join(words)
+        for greeting in self.greetings:
+            if text == greeting or text.startswith(greeting + " "):
+                return greeting
+        return None
+
+    def classify(self, text, anchored=True):
+        """
+        Returns {"wake": bool, "confidence": 0..1, "reason": str}.
+
+        `anchored` says the transcript starts where the speaker started, so a
+        leading name is a stronger signal than one mid-sentence. Pass False
+        for text decoded from an arbitrary window of a stream, whose first
+        word can be anywhere in a sentence.
+        """
+        words = self._words(text)
+        if not words:
+            return {"wake": False, "confidence": 1.0, "reason": "no speech"}
+
+        greeting = self._leading_greeting(words)
+        name_score, name_index = self._best_match(words, self.wake_word)
+
+        if name_score >= self.wake_threshold:
+            # Addressing the assistant by name up front is the strongest signal;
+            # the name buried mid-sentence ("it was friday") is much weaker
+            if not anchored:
+                confidence = name_score
+            elif greeting or name_index == 0:
+                confidence = min(1.0, name_score + 0.1)
+            else:
+                confidence = name_score * 0.7
+            return {"wake": True, "confidence": round(confidence, 3),
+                    "reason": f"wake word '{self.wake_word}' detected"}
+
+        address_score = max((self._best_match(words, a)[0] for a in self.addresses), default=0.0)
+        if greeting and address_score >= self.wake_threshold:
+            return {"wake": True, "confidence": round(0.8 + 0.1 * address_score, 3),
+                    "reason": "greeting detected"}
+
+        if greeting and self.allow_bare_greeting and len(words) <= len(greeting.split()) + 1:
+            return {"wake": True, "confidence": 0.65, "reason": "greeting detected"}
+
+        # Not a wake phrase; the closer it came to one, the less sure we are
+        near_miss = max(name_score, address_score if greeting else 0.0)
+        return {"wake": False, "confidence": round(1.0 - near_miss * 0.6, 3),
+                "reason": "not a wake phrase"}
@@ -0,0 +1,137 @@
+import time
+import numpy as np
+
+from wake_classifier import WakePhraseClassifier
+
+
+class WakeWordSpotter:
+    """
+    Always-on local wake-word detector.
+
+    Fed with a continuous stream of float32 frames. Frames are gated by an
+    energy VAD, so nothing is decoded while the room is quiet. While someone
+    is speaking, the last `window` seconds are decoded with a local STT engine
+    every `hop` seconds and once more `end_pause` after they stop. Decoding
+    overlapping windows means a wake word spanning a hop boundary is still
+    seen whole. Transcripts are scored with WakePhraseClassifier (bare
+    greetings don't count here, and neither does the name's position, since
+    a window can start anywhere). No network access is involved.
+    """
+
+    def __init__(self, wake_word, engine, sample_rate=16000, frame_duration=0.03,
+                 threshold=0.01, window=2.0, hop=0.75, end_pause=0.3,
+                 match_threshold=0.75, cooldown=1.5, on_wake=None, noise_floor=None):
+        self.wake_word = wake_word.lower().strip()
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_duration)
+        self.threshold = threshold
+        self.noise_floor = noise_floor  # adaptive threshold source, overrides `threshold`
+        self.hop_samples = int(hop * sample_rate)
+        self.end_pause_frames = max(1, int(end_pause / frame_duration))
+        self.match_threshold = match_threshold
+        self.classifier = WakePhraseClassifier(self.wake_word, allow_bare_greeting=False)
+        self.cooldown_samples = int(cooldown * sample_rate)
+        self.on_wake = on_wake
+
+        self._ring = np.zeros(int(window * sample_rate), dtype=np.float32)
+        self._ring_pos = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+
+        self.samples_seen = 0           # stream clock, in samples
+        self._speech_active = False
+        self._silent_frames = 0
+        self._since_decode = 0
+        self._muted_until = 0
+
+        self.decodes = 0
+        self.decode_seconds = 0.0
+
+    # --- Streaming ---
+
+    def feed(self, samples):
+        """Add float32 samples. Returns a detection dict when the wake word is heard."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+
+        detection = None
+        n_frames = len(samples) // self.frame_size
+        for i in range(n_frames):
+            frame = samples[i * self.frame_size:(i + 1) * self.frame_size]
+            result = self._process_frame(frame)
+            if result and detection is None:
+                detection = result
+
+        self._pending = samples[n_frames * self.frame_size:].copy()
+        return detection
+
+    def _is_speech(self, frame):
+        threshold = self.noise_floor.threshold if self.noise_floor else self.threshold
+        return np.sqrt(np.mean(frame ** 2)) > threshold
+
+    def _write(self, frame):
+        n = len(frame)
+        end = self._ring_pos + n
+        if end <= len(self._ring):
+            self._ring[self._ring_pos:end] = frame
+        else:
+            split = len(self._ring) - self._ring_pos
+            self._ring[self._ring_pos:] = frame[:split]
+            self._ring[:n - split] = frame[split:]
+        self._ring_pos = end % len(self._ring)
+
+    def _window_audio(self):
+        return np.concatenate((self._ring[self._ring_pos:], self._ring[:self._ring_pos]))
+
+    def _process_frame(self, frame):
+        self.samples_seen += len(frame)
+        self._write(frame)
+        if self.samples_seen < self._muted_until:
+            return None
+
+        if self._is_speech(frame):
+            self._speech_active = True
+            self._silent_frames = 0
+            self._since_decode += len(frame)
+            if self._since_decode >= self.hop_samples:
+                return self._decode()
+            return None
+
+        if self._speech_active:
+            self._silent_frames += 1
+            if self._silent_frames >= self.end_pause_frames:
+                self._speech_active = False
+                return self._decode()
+        return None
+
+    def _decode(self):
+        self._since_decode = 0
+        started = time.perf_counter()
+        text = self.engine.transcribe(
+            self._window_audio(),
+            self.sample_rate,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+        )
+        elapsed = time.perf_counter() - started
+        self.decodes += 1
+        self.decode_seconds += elapsed
+
+        result = self.classifier.classify(text, anchored=False)
+        if not result["wake"] or result["confidence"] < self.match_threshold:
+            return None
+
+        detection = {
+            "text": text,
+            "score": result["confidence"],
+            "stream_time": self.samples_seen / self.sample_rate,
+            "decode_ms": round(elapsed * 1000, 1),
+        }
+        # Forget the audio that contained the wake word so it isn't matched twice
+        self._ring[:] = 0
+        self._speech_active = False
+        self._muted_until = self.samples_seen + self.cooldown_samples
+        if self.on_wake:
+            self.on_wake(detection)
+        return detection
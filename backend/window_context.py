@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import namedtuple
+
+# One open window. `app` is a best guess from the title ("Doc - Notepad" ->
+# "Notepad"); `focused_at` is when the index last saw it active (0 = never).
+WindowInfo = namedtuple("WindowInfo", "title app handle focused_at")
+
+TITLE_SEPARATORS = (" - ", " — ", " – ", " | ")
+
+
+def app_from_title(title):
+    for sep in TITLE_SEPARATORS:
+        if sep in title:
+            return title.rsplit(sep, 1)[-1].strip()
+    return title.strip()
+
+
+def pygetwindow_provider():
+    """(windows, active window) from pygetwindow; ([], None) where it can't enumerate."""
+    try:
+        import pygetwindow as gw
+        windows = [(w.title, getattr(w, "_hWnd", None) or w.title) for w in gw.getAllWindows() if w.title]
+        active = gw.getActiveWindow()
+        return windows, (active.title if active else None)
+    except Exception:
+        return [], None
+
+
+class FakeWindowProvider:
+    """
+    Scripted windows for running the index and waits without a desktop:
+    `open("Untitled - Notepad", after=0.4)` makes the window appear 0.4 s
+    from now; `focus(title, after=...)` makes it the active one.
+    """
+
+    def __init__(self):
+        self._events = []  # (due, kind, title)
+        self._windows = []
+        self._active = None
+        self._next_handle = 1
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def open(self, title, after=0.0, focus=True):
+        with self._lock:
+            self._events.append((time.monotonic() + after, "open", title))
+            if focus:
+                self._events.append((time.monotonic() + after, "focus", title))
+        return self
+
+    def focus(self, title, after=0.0):
+        with self._lock:
+            self._events.append((time.monotonic() + after, "focus", title))
+        return self
+
+    def close(self, title):
+        with self._lock:
+            self._events.append((time.monotonic(), "close", title))
+        return self
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            due = sorted((e for e in self._events if e[0] <= now), key=lambda e: e[0])
+            self._events = [e for e in self._events if e[0] > now]
+            for _, kind, title in due:
+                if kind == "open":
+                    self._windows.append((title, self._next_handle))
+                    self._next_handle += 1
+                elif kind == "close":
+                    self._windows = [w for w in self._windows if w[0] != title]
+                    if self._active == title:
+                        self._active = None
+                elif any(w[0] == title for w in self._windows):
+                    self._active = title
+            return list(self._windows), self._active
+
+
+class WindowIndex:
+    """
+    A periodically refreshed snapshot of the open windows, most recently
+    focused first, so requests read a list instead of enumerating windows.
+
+    A background timer polls `provider` every `refresh_interval` seconds;
+    code that just opened or focused a window calls `refresh()` to update
+    at once. The snapshot is a tuple swapped in one assignment, so readers
+    never lock. `generation` only changes when the windows actually did,
+    which keeps anything keyed on the window list (prompt, decision cache)
+    stable between polls.
+    """
+
+    def __init__(self, provider=pygetwindow_provider, refresh_interval=1.0):
+        self.provider = provider
+        self.refresh_interval = refresh_interval
+        self._snapshot = ()
+        self._signature = None
+        self.generation = 0
+        self._focus = {}  # handle -> last time seen active
+        self.active_title = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stats = {"refreshes": 0, "changes": 0, "refresh_ms": 0.0, "errors": 0}
+
+    def start(self):
+        if self._thread is None:
+            self.refresh()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="window-index")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._wake.set()
+            thread.join(timeout=2.0)
+
+    def _run(self):
+        while self._thread is not None:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._thread is not None:
+                self.refresh()
+
+    def refresh(self):
+        """Re-enumerate now. Returns True if the window list changed."""
+        started = time.perf_counter()
+        try:
+            windows, active = self.provider()
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"⚠️ Window enumeration failed: {e}")
+            return False
+
+        with self._lock:
+            now = time.time()
+            self.active_title = active
+            handles = {handle for _, handle in windows}
+            for title, handle in windows:
+                if title == active:
+                    self._focus[handle] = now
+            self._focus = {h: t for h, t in self._focus.items() if h in handles}
+
+            entries = sorted(
+                (WindowInfo(title, app_from_title(title), handle, self._focus.get(handle, 0.0))
+                 for title, handle in windows),
+                key=lambda w: -w.focused_at,
+            )
+            signature = tuple((w.title, w.handle) for w in entries)
+            changed = signature != self._signature
+            if changed:
+                self._signature = signature
+                self._snapshot = tuple(entries)
+                self.generation += 1
+                self._stats["changes"] += 1
+            self._stats["refreshes"] += 1
+            self._stats["refresh_ms"] += (time.perf_counter() - started) * 1000
+        return changed
+
+    def snapshot(self):
+        """The current windows, most recently focused first."""
+        return self._snapshot
+
+    def titles(self, limit=None):
+        return [w.title for w in self._snapshot[:limit]]
+
+    def find(self, text):
+        """Windows whose title contains `text` (case-insensitive), most recent first."""
+        text = text.lower()
+        return [w for w in self._snapshot if text in w.title.lower()]
+
+    def active(self):
+        """The window that was focused at the last refresh, or None."""
+        title = self.active_title
+        return next((w for w in self._snapshot if w.title == title), None)
+
+    def stats(self):
+        refreshes = self._stats["refreshes"] or 1
+        return {
+            **self._stats,
+            "refresh_ms": round(self._stats["refresh_ms"], 1),
+            "avg_refresh_ms": round(self._stats["refresh_ms"] / refreshes, 2),
+            "windows": len(self._snapshot),
+            "generation": self.generation,
+        }
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import namedtuple
+
+# found: the window (WindowInfo) or None on timeout; waited_ms: how long the
+# wait took; polls: how many times the index was refreshed
+WaitResult = namedtuple("WaitResult", "found waited_ms polls")
+
+
+class WindowWaiter:
+    """
+    Waits for a window to exist or be focused, returning as soon as it is.
+
+    Each poll refreshes the WindowIndex and checks it; the gap between polls
+    starts at `initial_interval` and doubles up to `max_interval`, so an app
+    that is already open costs one enumeration and a slow launch doesn't
+    mean dozens of them. Every wait has a deadline and its duration is kept
+    for /stats.
+    """
+
+    def __init__(self, index, initial_interval=0.02, max_interval=0.25, backoff=2.0):
+        self.index = index
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._stats = {"waits": 0, "timeouts": 0, "waited_ms": 0.0, "polls": 0, "max_ms": 0.0}
+
+    def window(self, target, timeout=5.0):
+        """Wait until a window whose title contains `target` exists."""
+        return self._wait(lambda: next(iter(self.index.find(target)), None), timeout)
+
+    def focus(self, target, timeout=3.0):
+        """Wait until a window whose title contains `target` is the active one."""
+        target = target.lower()
+
+        def focused():
+            active = self.index.active()
+            return active if active and target in active.title.lower() else None
+        return self._wait(focused, timeout)
+
+    def _wait(self, check, timeout):
+        started = time.monotonic()
+        deadline = started + timeout
+        interval = self.initial_interval
+        polls = 0
+        while True:
+            self.index.refresh()
+            polls += 1
+            found = check()
+            now = time.monotonic()
+            if found is not None or now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+            interval = min(self.max_interval, interval * self.backoff)
+        return self._record(WaitResult(found, (time.monotonic() - started) * 1000, polls))
+
+    def _record(self, result):
+        with self._lock:
+            self._stats["waits"] += 1
+            self._stats["timeouts"] += result.found is None
+            self._stats["waited_ms"] += result.waited_ms
+            self._stats["polls"] += result.polls
+            self._stats["max_ms"] = max(self._stats["max_ms"], result.waited_ms)
+        return result
+
+    def stats(self):
+        with self._lock:
+            waits = self._stats["waits"] or 1
+            return {
+                **self._stats,
+                "waited_ms": round(self._stats["waited_ms"], 1),
+                "max_ms": round(self._stats["max_ms"], 1),
+                "avg_ms": round(self._stats["waited_ms"] / waits, 1),
+            }
@@ -1,36 +1,36 @@
 import numpy as np
-import queue
+import os
+import sys
 import threading
-import sounddevice as sd
 from custom_engine import CustomEngine  # your Faster Whisper wrapper
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from audio_hub import get_hub
+
 class StreamingRecognizer:
-    def __init__(self, sample_rate=16000, chunk_size=1024, vad_threshold=0.01, buffer_seconds=3):
+    def __init__(self, sample_rate=16000, chunk_size=1024, vad_threshold=None, buffer_seconds=3, engine_name=None):
         self.sample_rate = sample_rate
         self.chunk_size = chunk_size
+        # None -> follow the capture hub's adaptive noise floor
         self.vad_threshold = vad_threshold
         self.buffer_seconds = buffer_seconds
         self.buffer_size = int(buffer_seconds * sample_rate)
-        self.audio_queue = queue.Queue()
-        self.engine = CustomEngine()
+        self.hub = None
+        self.cursor = None
+        self.engine = CustomEngine(engine_name)
         self.running = False
         self.audio_buffer = []
 
-    def audio_callback(self, indata, frames, time, status):
-        if status:
-            print(f"Audio input status: {status}")
-        self.audio_queue.put(indata.copy())
-
     def is_speech(self, audio_chunk):
-        energy = np.linalg.norm(audio_chunk) / len(audio_chunk)
-        return energy > self.vad_threshold
+        rms = np.sqrt(np.mean(audio_chunk ** 2))
+        threshold = self.vad_threshold if self.vad_threshold is not None else self.hub.noise_floor.threshold
+        return rms > threshold
 
     def recognition_loop(self):
         print("Recognition loop started")
         while self.running:
-            if not self.audio_queue.empty():
-                chunk = self.audio_queue.get()
-                audio_np = np.squeeze(chunk)
+            if self.cursor.wait_for(self.chunk_size, timeout=0.5):
+                audio_np = self.cursor.read(self.chunk_size)
                 if self.is_speech(audio_np):
                     self.audio_buffer.append(audio_np)
                     if sum(len(a) for a in self.audio_buffer) >= self.buffer_size:
@@ -47,12 +47,15 @@ class StreamingRecognizer:
                         self.audio_buffer = []
 
     def start(self):
+        self.engine.load()  # load + warm up before the first utterance arrives
+        self.hub = get_hub(self.sample_rate)
+        self.cursor = self.hub.cursor()
         self.running = True
-        threading.Thread(target=self.recognition_loop, daemon=True).start()
-        with sd.InputStream(channels=1, samplerate=self.sample_rate, blocksize=self.chunk_size, callback=self.audio_callback):
-            print("Listening...")
-            while self.running:
-                pass
+        thread = threading.Thread(target=self.recognition_loop, daemon=True)
+        thread.start()
+        print("Listening...")
+        while self.running:
+            thread.join(timeout=0.5)
 
     def stop(self):
         self.running = False
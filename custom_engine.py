@@ -1,20 +1,23 @@
-from src.stt import load_model, transcribe_audio
+from src.stt import load_model
 
 class CustomEngine:
-    def __init__(self):
+    def __init__(self, engine_name=None):
+        # None -> whatever "stt_engine" config.json selects
+        self.engine_name = engine_name
+        self.engine = None
         self.model_loaded = False
 
     def load(self):
         if not self.model_loaded:
             print("Loading model...")
-            load_model()
+            self.engine = load_model(self.engine_name)
             self.model_loaded = True
             print("Model loaded.")
 
     def recognize(self, audio_data, sample_rate=16000):
         if not self.model_loaded:
             self.load()
-        text = transcribe_audio(audio_data, sample_rate)
+        text = self.engine.transcribe(audio_data, sample_rate)
         return text
 
 # Usage example for testing
@@ -0,0 +1,199 @@
+import threading
+import numpy as np
+
+from segmenter import SpeechSegmenter
+from noise_floor import NoiseFloorEstimator
+
+
+class AudioHub:
+    """
+    One always-open microphone stream shared by every consumer.
+
+    The input callback writes into a preallocated float32 ring buffer. The
+    ring is mirrored (each sample is stored at i and i + capacity), so any
+    window of up to `capacity` samples is a single contiguous slice. Readers
+    get a copy of each block by default; one that uses a block right away
+    (and never holds on to it) can ask for a read-only view instead, which
+    the ring overwrites after one lap. Each consumer owns a HubCursor
+    and can start it in the past (pre-roll) to catch audio from before its
+    trigger. A consumer that falls more than `capacity_seconds` behind skips
+    ahead and the gap is counted as dropped.
+
+    The hub also keeps the shared `noise_floor` estimate up to date from the
+    live stream, so segmenters never need a calibration pause.
+    """
+
+    def __init__(self, sample_rate=16000, capacity_seconds=30.0, blocksize=480, device=None):
+        self.sample_rate = sample_rate
+        self.capacity = int(capacity_seconds * sample_rate)
+        self.blocksize = blocksize
+        self.device = device
+
+        self._buffer = np.zeros(2 * self.capacity, dtype=np.float32)
+        self.total = 0  # samples written since start (monotonic stream clock)
+        self.overflows = 0
+        self.noise_floor = NoiseFloorEstimator(sample_rate)
+        self._cond = threading.Condition()
+        self._stream = None
+        self._closed = False
+
+    # --- Producer side ---
+
+    def start(self):
+        """Open the input stream (idempotent)."""
+        if self._stream is not None:
+            return self
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="float32",
+            blocksize=self.blocksize,
+            device=self.device,
+            callback=self._on_audio,
+        )
+        self._stream.start()
+        print(f"🎙️ Audio hub capturing at {self.sample_rate} Hz "
+              f"({self.capacity / self.sample_rate:.0f}s ring buffer)")
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _on_audio(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        self.write(indata[:, 0])
+
+    def write(self, samples):
+        """Append samples to the ring. Also used to feed the hub from files."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        self.noise_floor.update(samples)
+        skipped = 0
+        if len(samples) > self.capacity:
+            skipped = len(samples) - self.capacity
+            samples = samples[skipped:]
+        n = len(samples)
+        start = (self.total + skipped) % self.capacity
+        first = min(n, self.capacity - start)
+        for offset in (0, self.capacity):
+            self._buffer[offset + start:offset + start + first] = samples[:first]
+            self._buffer[offset:offset + n - first] = samples[first:]
+        with self._cond:
+            self.total += skipped + n
+            self._cond.notify_all()
+
+    # --- Consumer side ---
+
+    def cursor(self, pre_roll=0.0):
+        """A new reader positioned `pre_roll` seconds before now."""
+        with self._cond:
+            position = self.total - int(pre_roll * self.sample_rate)
+            position = max(position, self.total - self.capacity, 0)
+        return HubCursor(self, position)
+
+    def _view(self, position, n):
+        start = position % self.capacity
+        view = self._buffer[start:start + n]
+        view.flags.writeable = False
+        return view
+
+    def record_seconds(self, duration, pre_roll=0.0):
+        """Block until `duration` seconds are captured; returns a copy."""
+        cursor = self.cursor(pre_roll)
+        n = int(duration * self.sample_rate)
+        cursor.wait_for(n)
+        return cursor.read(n)
+
+    def record_utterance(self, pre_roll=0.3, timeout=None, on_block=None, **segmenter_options):
+        """
+        Capture one utterance with SpeechSegmenter. `segmenter_options` are
+        passed through (pause, max_duration, start_timeout...); the hub's
+        noise floor is used unless a `noise_floor` is given. `on_block` sees
+        every block as it is captured; returning True stops the capture.
+        Returns the finished segmenter; check `.speech_started` and `.audio()`.
+        """
+        segmenter_options.setdefault("noise_floor", self.noise_floor)
+        segmenter = SpeechSegmenter(sample_rate=self.sample_rate, pre_roll=pre_roll, **segmenter_options)
+        cursor = self.cursor(pre_roll)
+        while True:
+            block = cursor.read(timeout=timeout if timeout is not None else 1.0)
+            if len(block) == 0:
+                if timeout is not None or self._closed:
+                    segmenter.finish()
+                    return segmenter
+                continue
+            # Before the end-of-speech check, so on_block also sees the last block
+            if on_block is not None and on_block(block):
+                segmenter.finish()
+                return segmenter
+            if segmenter.feed(block):
+                return segmenter
+
+
+class HubCursor:
+    """Independent read position into an AudioHub."""
+
+    def __init__(self, hub, position):
+        self.hub = hub
+        self.position = position
+        self.dropped = 0
+
+    def available(self):
+        return self.hub.total - self.position
+
+    def wait_for(self, n, timeout=None):
+        """Block until at least `n` unread samples exist. Returns False on timeout."""
+        with self.hub._cond:
+            return self.hub._cond.wait_for(
+                lambda: self.hub.total - self.position >= n or self.hub._closed, timeout
+            )
+
+    def read(self, max_samples=None, timeout=None, copy=True):
+        """
+        Return unread samples (at most `max_samples`), waiting up to `timeout`
+        seconds for at least one. Empty on timeout. With copy=False this is a
+        read-only view into the ring: it changes once the ring wraps around,
+        so only use it for blocks that are consumed immediately.
+        """
+        self.wait_for(1, timeout)
+        total = self.hub.total
+        oldest = total - self.hub.capacity
+        if self.position < oldest:
+            self.dropped += oldest - self.position
+            self.position = oldest
+
+        n = total - self.position
+        if max_samples is not None:
+            n = min(n, max_samples)
+        view = self.hub._view(self.position, n)
+        self.position += n
+        return view.copy() if copy else view
+
+    def skip_to_now(self):
+        """Discard everything unread (e.g. audio captured while busy elsewhere)."""
+        self.position = self.hub.total
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub(sample_rate=16000, **options):
+    """Process-wide shared hub, opened on first use."""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = AudioHub(sample_rate=sample_rate, **options)
+        elif _hub.sample_rate != sample_rate:
+            raise ValueError(f"Audio hub already running at {_hub.sample_rate} Hz")
+        elif options.get("device", _hub.device) != _hub.device:
+            raise ValueError(f"Audio hub already running on device {_hub.device!r}")
+    return _hub.start()
@@ -0,0 +1,139 @@
+# bench_realtime.py
+# Replays WAV files at real-time speed through realtime.py and measures
+# how long the user waits for text, incremental vs. one-shot decoding.
+#
+#   python bench_realtime.py speech.wav [more.wav ...] [--step 0.5] [--silence 2.0] [--engine faster_whisper]
+#
+# Each file is fed in BLOCK_DURATION blocks at the pace a microphone would
+# deliver them (followed by enough silence to end the last utterance), so
+# decoding competes with the audio clock exactly as it does live. Reported:
+#   first text  from the start of speech to the first text on screen
+#   word lag    from the moment a word has been spoken to its commit (median / p95)
+#   final       from the end of speech to the finished line
+#   RTF         decode time per second of audio (above 1 it falls behind)
+
+import argparse
+import queue
+import statistics
+import threading
+import time
+import wave
+
+import numpy as np
+
+import realtime
+from config import load_config
+from noise_floor import NoiseFloorEstimator
+from stt_engine import create_engine, resample
+
+
+def load_wav(path):
+    """Mono float32 at realtime.samplerate."""
+    with wave.open(path) as wav_file:
+        width = wav_file.getsampwidth()
+        frames = wav_file.readframes(wav_file.getnframes())
+        channels = wav_file.getnchannels()
+        rate = wav_file.getframerate()
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[width]
+    audio = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+    if width == 1:
+        audio = (audio - 128) / 128
+    else:
+        audio /= np.iinfo(dtype).max
+    audio = audio.reshape(-1, channels).mean(axis=1)
+    return resample(audio, rate, realtime.samplerate)
+
+
+def replay(audio, transcriber, silence, threshold=None):
+    """Feed `audio` block by block at real-time pace; returns (stream start wall time, events)."""
+    block_size = realtime.FRAMES_PER_BLOCK
+    tail = np.zeros(int((silence + 0.5) * realtime.samplerate), dtype=np.float32)
+    audio = np.concatenate([audio, tail])
+    blocks = queue.Queue()
+    started = time.perf_counter()
+
+    def feeder():
+        for i, offset in enumerate(range(0, len(audio), block_size)):
+            # A block is available once all of its audio has "been spoken"
+            delay = started + (i + 1) * realtime.BLOCK_DURATION - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            blocks.put(audio[offset:offset + block_size])
+        blocks.put(None)
+
+    noise_floor = NoiseFloorEstimator(realtime.samplerate)
+
+    def stream():
+        while True:
+            try:
+                block = blocks.get(timeout=realtime.BLOCK_DURATION)
+            except queue.Empty:
+                yield None
+                continue
+            if block is None:
+                return
+            noise_floor.update(block)
+            yield block
+
+    events = []
+    transcriber.on_hypothesis = lambda hypothesis: events.append((time.perf_counter(), hypothesis))
+    threading.Thread(target=feeder, daemon=True).start()
+    realtime.segment_stream(stream(), (lambda: threshold) if threshold else (lambda: noise_floor.threshold),
+                            transcriber, silence=silence)
+    transcriber.finish()
+    return started, events
+
+
+def measure(started, events):
+    first_text, finals, lags = [], [], []
+    waiting_for_text = None
+    for at, hypothesis in events:
+        if waiting_for_text != hypothesis.start and (hypothesis.committed or hypothesis.tentative):
+            waiting_for_text = hypothesis.start
+            first_text.append(at - (started + hypothesis.start))
+        if hypothesis.kind == "final":
+            finals.append(at - (started + hypothesis.end))
+        lags += [at - (started + word.end) for word in hypothesis.words if word.end is not None]
+    return first_text, lags, finals
+
+
+def ms(values, pick=statistics.median):
+    return f"{pick(values) * 1000:7.0f}" if values else "    n/a"
+
+
+def p95(values):
+    return sorted(values)[int(0.95 * (len(values) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay WAV files at real time through realtime.py.")
+    parser.add_argument("wavs", nargs="+")
+    parser.add_argument("--step", type=float, default=realtime.STEP_DURATION)
+    parser.add_argument("--silence", type=float, default=realtime.SILENCE_DURATION)
+    parser.add_argument("--engine", default=None, help="stt engine (default: config.json)")
+    parser.add_argument("--threshold", type=float, default=None, help="fixed RMS threshold (default: adaptive)")
+    args = parser.parse_args()
+
+    engine = create_engine(load_config(), args.engine)
+    engine.load()
+    modes = [
+        ("incremental", lambda: realtime.IncrementalTranscriber(engine, step=args.step)),
+        ("one-shot", lambda: realtime.OneShotTranscriber(engine)),
+    ]
+    print(f"{engine.name}, step {args.step}s, silence {args.silence}s\n")
+    print(f"{'file':<24} {'mode':<12} {'first text':>10} {'word lag':>8} {'p95':>7} {'final':>7} {'RTF':>5}  text")
+    for path in args.wavs:
+        audio = load_wav(path)
+        for mode, make in modes:
+            transcriber = make()
+            started, events = replay(audio, transcriber, args.silence, args.threshold)
+            first_text, lags, finals = measure(started, events)
+            stats = transcriber.stats
+            rtf = stats["decode_ms"] / 1000 / (len(audio) / realtime.samplerate)
+            text = " | ".join(h.committed for _, h in events if h.kind == "final")
+            print(f"{path[-24:]:<24} {mode:<12} {ms(first_text):>10} {ms(lags)} {ms(lags, p95)} "
+                  f"{ms(finals)} {rtf:5.2f}  {text[:60]}")
+
+
+if __name__ == "__main__":
+    main()
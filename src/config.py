@@ -1,7 +1,8 @@
 import json
 import os
 
-CONFIG_FILE = 'config.json'
+# Shared with the backend: always the config.json at the repo root
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
 
 def setup_assistant():
     print("\n" + "=" * 50)
@@ -17,7 +18,17 @@ def setup_assistant():
         'wake_word': name.lower(),
         'wake_pause': 0.7,       # Wake word detection (in seconds)
         'command_pause': 0.7,    # Command execution pause
-        'dictation_pause': 1.2   # Dictation mode pause
+        'dictation_pause': 1.2,  # Dictation mode pause
+        'stt_engine': 'faster_whisper',  # or 'google'
+        'stt_model': 'base.en',
+        'stt_device': 'cpu',
+        'stt_compute_type': 'int8',
+        'stt_cpu_threads': 4,
+        'llm_backend': 'gemini',  # or 'ollama' (local model, no GOOGLE_API_KEY needed)
+        'ollama_model': 'llama3.2:3b',
+        'llm_model': 'gemini-2.0-flash',
+        'llm_deadline': 8.0,   # seconds before falling back to local handling
+        'llm_hedge': True
     }
     
     with open(CONFIG_FILE, 'w') as f:
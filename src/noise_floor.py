@@ -0,0 +1,71 @@
+import collections
+import numpy as np
+
+
+class NoiseFloorEstimator:
+    """
+    Continuously adapted ambient-noise estimate ("minimum statistics").
+
+    Frame RMS values are grouped into short sub-windows; the noise floor
+    follows the smallest frame energy seen over the last `window` seconds,
+    smoothed with an EMA. Speech barely moves it (there are always gaps
+    between words), a fan switching on raises it within a few seconds, and
+    a quieter room lowers it just as fast. `threshold` is what segmenters
+    compare frame RMS against.
+    """
+
+    def __init__(self, sample_rate=16000, frame_duration=0.03, window=3.0, sub_windows=10,
+                 margin=3.0, smoothing=0.2, initial_floor=0.003,
+                 min_threshold=0.004, max_threshold=0.15):
+        self.frame_size = int(sample_rate * frame_duration)
+        self.frames_per_sub_window = max(1, int(window / sub_windows / frame_duration))
+        self.margin = margin
+        self.smoothing = smoothing
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+
+        self.floor = initial_floor
+        self._minima = collections.deque(maxlen=sub_windows)
+        self._current_min = np.inf
+        self._frames_in_sub_window = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._calibrated = False
+
+    @property
+    def threshold(self):
+        return float(min(self.max_threshold, max(self.min_threshold, self.floor * self.margin)))
+
+    def update(self, samples):
+        """Feed raw audio (any block size). Cheap: one vectorised RMS per block."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        n_frames = len(samples) // self.frame_size
+        self._pending = samples[n_frames * self.frame_size:].copy()
+        if n_frames == 0:
+            return self.threshold
+
+        frames = samples[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        for rms in np.sqrt(np.mean(frames ** 2, axis=1)):
+            self._add_frame_energy(rms)
+        return self.threshold
+
+    def _add_frame_energy(self, rms):
+        self._current_min = min(self._current_min, rms)
+        self._frames_in_sub_window += 1
+        if self._frames_in_sub_window < self.frames_per_sub_window:
+            return
+
+        self._minima.append(self._current_min)
+        self._current_min = np.inf
+        self._frames_in_sub_window = 0
+
+        window_min = min(self._minima)
+        if not self._calibrated:
+            self.floor = window_min
+            self._calibrated = True
+        else:
+            self.floor += self.smoothing * (window_min - self.floor)
+
+    def snapshot(self):
+        return {"floor": round(float(self.floor), 5), "threshold": round(self.threshold, 5)}
@@ -1,138 +1,334 @@
-from faster_whisper import WhisperModel
-import sounddevice as sd
+# realtime.py
+# Live transcription from the shared mic.
+#
+#   python realtime.py [--one-shot]
+#
+# By default words appear while you speak: the utterance so far is decoded
+# every STEP_DURATION seconds and words are committed once consecutive
+# decodes agree on them (see IncrementalTranscriber). After
+# SILENCE_DURATION of quiet only the not-yet-committed tail is decoded to
+# finish the line. --one-shot is the old behaviour: nothing is shown until
+# the silence, then the whole utterance is decoded at once.
+
+import argparse
+import re
 import numpy as np
 import queue
 import threading
 import time
+from collections import namedtuple
+from config import load_config
+from stt_engine import get_engine, Word
 
 # --- Settings ---
-model_size = "base.en"      # Model size (e.g., "tiny.en", "base.en")
 samplerate = 16000          # Whisper sample rate
-channels = 1                # Mono audio
 
 # --- VAD Settings ---
 BLOCK_DURATION = 0.1        # How often to check for speech (in seconds).
-SILENCE_DURATION = 2.0      # How long to wait in silence before transcribing (in seconds).
-SILENCE_THRESHOLD = 0.01    # Energy threshold for silence. ** YOU MUST TUNE THIS **
+SILENCE_DURATION = 2.0      # How long to wait in silence before finishing the utterance (in seconds).
 FRAMES_PER_BLOCK = int(samplerate * BLOCK_DURATION)
 SILENT_BLOCKS_TO_WAIT = int(SILENCE_DURATION / BLOCK_DURATION)
 
-# --- Global State ---
-audio_queue = queue.Queue() # This is the only global state we need
+# --- Incremental decoding ---
+STEP_DURATION = 0.5         # New audio between decodes while speaking (in seconds).
+AGREEMENT = 2               # Consecutive decodes that must agree before a word is committed.
 
-def audio_callback(indata, frames, time, status):
-    """This is called by sounddevice for each new audio block."""
-    if status:
-        print(status)
-    audio_queue.put(indata.copy())
+# kind: "partial" or "final"; committed: text that won't change any more;
+# tentative: the rest of the latest decode; words: Words committed by this
+# event (times in seconds from the start of the stream); start/end: the
+# stream time of the utterance's first block and of the audio decoded so far
+Hypothesis = namedtuple("Hypothesis", "kind committed tentative words start end")
+
+
+def _normalize(text):
+    return re.sub(r"[^\w']", "", text.lower())
 
-def recorder():
-    """Continuously records audio and puts it into the queue."""
-    print("Recorder thread started.")
-    with sd.InputStream(samplerate=samplerate, channels=channels,
-                        callback=audio_callback, blocksize=FRAMES_PER_BLOCK):
-        print("Listening... Press Ctrl+C to stop")
-        while True:
-            sd.sleep(100) # Keep the recorder thread alive
 
-def transcriber():
+class LocalAgreement:
     """
-    Runs in the main thread.
-    Pulls audio from the queue, performs VAD, and transcribes.
+    LocalAgreement-n: a word is committed once the last `n` hypotheses all
+    start with the same words up to and including it. Each hypothesis is
+    the decode of the audio after what was already committed, so the
+    committed prefix only grows; a word whisper keeps revising stays
+    tentative until it settles.
     """
-    
-    print("Transcriber waiting for model...")
-    model = WhisperModel(model_size, device="cuda", compute_type="float16")
-    print("Model loaded. Transcriber is active.")
 
-    # --- Local state for VAD ---
-    audio_buffer = []
+    def __init__(self, n=AGREEMENT, dedup_words=5):
+        self.n = n
+        self.dedup_words = dedup_words
+        self.committed = []
+        self.tentative = []
+        self._history = []
+
+    def update(self, words):
+        """Feed a new hypothesis (list of Words). Returns the newly committed Words."""
+        words = self._drop_overlap(words)
+        self._history = (self._history + [words])[-self.n:]
+        if len(self._history) < self.n:
+            self.tentative = words
+            return []
+        agreed = 0
+        for column in zip(*self._history):
+            if len({_normalize(w.text) for w in column}) != 1:
+                break
+            agreed += 1
+        new = words[:agreed]
+        self.committed.extend(new)
+        self._history = [h[agreed:] for h in self._history]
+        self.tentative = words[agreed:]
+        return new
+
+    def finish(self, words):
+        """The final hypothesis: commit all of it. Returns the newly committed Words."""
+        new = self._drop_overlap(words)
+        self.committed.extend(new)
+        self.tentative = []
+        self._history = []
+        return new
+
+    def _drop_overlap(self, words):
+        """Whisper often repeats the last committed word(s) at the start of the next decode."""
+        tail = [_normalize(w.text) for w in self.committed[-self.dedup_words:]]
+        head = [_normalize(w.text) for w in words]
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k]:
+                return words[k:]
+        return words
+
+    @property
+    def committed_text(self):
+        return " ".join(w.text for w in self.committed)
+
+    @property
+    def tentative_text(self):
+        return " ".join(w.text for w in self.tentative)
+
+
+class IncrementalTranscriber:
+    """
+    Decodes an utterance while it is still being spoken.
+
+    `feed()` takes the utterance's blocks; once `step` seconds of new audio
+    have arrived, the buffered audio is decoded and the hypothesis goes
+    through LocalAgreement. With an engine that has word timestamps the
+    buffer is then cut at the end of the last committed word (the committed
+    text is passed as the prompt instead), so each decode only covers the
+    uncommitted tail and stays short however long the utterance gets.
+    `finish()` decodes what's left and emits the final hypothesis.
+
+    Hypotheses go to `on_hypothesis` if given, else onto `self.hypotheses`
+    (a queue). Call it from one thread; decodes run in that thread.
+    """
+
+    def __init__(self, engine, on_hypothesis=None, sample_rate=samplerate, step=STEP_DURATION,
+                 agreement=AGREEMENT, max_buffer=15.0, prompt_chars=200):
+        self.engine = engine
+        self.on_hypothesis = on_hypothesis
+        self.hypotheses = queue.Queue()
+        self.sample_rate = sample_rate
+        self.step = step
+        self.agreement_n = agreement
+        self.max_buffer = max_buffer
+        self.prompt_chars = prompt_chars
+        self.stats = {"utterances": 0, "decodes": 0, "decode_ms": 0.0, "decoded_seconds": 0.0,
+                      "final_decode_ms": 0.0}
+        self._reset(None)
+
+    def _reset(self, start):
+        self.start = start
+        self.agreement = LocalAgreement(self.agreement_n)
+        self._blocks = []
+        self._offset = 0.0        # utterance time of the first buffered sample
+        self._buffered = 0        # samples in the buffer
+        self._undecoded = 0       # samples fed since the last decode
+        self._skip = 0            # committed words still inside the buffer (no timestamps)
+
+    @property
+    def active(self):
+        return self.start is not None
+
+    def begin(self, start=0.0):
+        """A new utterance starting at stream time `start` (seconds)."""
+        self._reset(start)
+
+    def feed(self, block):
+        if not self.active:
+            self.begin()
+        self._blocks.append(block)
+        self._buffered += len(block)
+        self._undecoded += len(block)
+        if self._undecoded >= self.step * self.sample_rate:
+            words = self._decode()
+            if self._buffered > self.max_buffer * self.sample_rate:
+                # Nothing settles (or no timestamps to cut at): commit and start afresh
+                committed = self.agreement.finish(words)
+                self._drop(self._buffered)
+            else:
+                committed = self.agreement.update(words)
+                self._trim(committed)
+            self._emit("partial", committed)
+
+    def finish(self):
+        """End of the utterance: decode the remaining tail and emit the final hypothesis."""
+        if not self.active:
+            return None
+        committed = []
+        if self._buffered:
+            started = time.perf_counter()
+            committed = self.agreement.finish(self._decode())
+            self.stats["final_decode_ms"] += (time.perf_counter() - started) * 1000
+        self.stats["utterances"] += 1
+        hypothesis = self._emit("final", committed)
+        self._reset(None)
+        return hypothesis
+
+    # --- Internals ---
+
+    def _decode(self):
+        audio = np.concatenate(self._blocks).reshape(-1).astype(np.float32)
+        prompt = self.agreement.committed_text[-self.prompt_chars:] if self.engine.word_timestamps else None
+        started = time.perf_counter()
+        words = self.engine.transcribe_words(audio, self.sample_rate, prompt=prompt)
+        self.stats["decodes"] += 1
+        self.stats["decode_ms"] += (time.perf_counter() - started) * 1000
+        self.stats["decoded_seconds"] += len(audio) / self.sample_rate
+        self._undecoded = 0
+        if not self.engine.word_timestamps:
+            return words[self._skip:]
+        return [Word(self._offset + w.start, self._offset + w.end, w.text) for w in words]
+
+    def _trim(self, committed):
+        if not self.engine.word_timestamps:
+            self._skip += len(committed)
+        elif committed:
+            self._drop(int((committed[-1].end - self._offset) * self.sample_rate))
+
+    def _drop(self, samples):
+        """Remove the first `samples` from the buffer."""
+        samples = max(0, min(samples, self._buffered))
+        if not samples:
+            return
+        audio = np.concatenate(self._blocks).reshape(-1)
+        self._blocks = [audio[samples:]] if samples < len(audio) else []
+        self._buffered -= samples
+        self._offset += samples / self.sample_rate
+        self._skip = 0
+
+    def _emit(self, kind, committed):
+        fed = self._offset + self._buffered / self.sample_rate
+        hypothesis = Hypothesis(
+            kind, self.agreement.committed_text, self.agreement.tentative_text,
+            [Word(self.start + w.start, self.start + w.end, w.text) if w.start is not None else w
+             for w in committed],
+            self.start, self.start + fed,
+        )
+        if self.on_hypothesis is not None:
+            self.on_hypothesis(hypothesis)
+        else:
+            self.hypotheses.put(hypothesis)
+        return hypothesis
+
+
+class OneShotTranscriber(IncrementalTranscriber):
+    """The old behaviour: buffer the utterance, decode it once in finish()."""
+
+    def feed(self, block):
+        if not self.active:
+            self.begin()
+        self._blocks.append(block)
+        self._buffered += len(block)
+
+
+def segment_stream(blocks, threshold, transcriber, silence=SILENCE_DURATION, block_duration=BLOCK_DURATION):
+    """
+    Energy VAD over a stream of blocks, driving `transcriber`. `blocks`
+    yields audio blocks, or None when a block's worth of time passed with
+    no audio (counts as silence); `threshold()` is the current RMS
+    threshold. Quiet blocks inside an utterance are held back and only fed
+    once speech resumes, so the transcriber never sees the trailing silence.
+    """
+    silent_blocks_to_wait = int(silence / block_duration)
+    position = 0.0     # stream time of the current block
+    held = []
     silence_counter = 0
+    for block in blocks:
+        if block is not None and np.sqrt(np.mean(block ** 2)) > threshold():
+            # --- SPEECH DETECTED ---
+            if not transcriber.active:
+                transcriber.begin(position)
+            for quiet in held:
+                transcriber.feed(quiet)
+            held = []
+            transcriber.feed(block)
+            silence_counter = 0
+        elif transcriber.active:
+            # We were speaking, but now we're silent
+            if block is not None:
+                held.append(block)
+            silence_counter += 1
+            if silence_counter >= silent_blocks_to_wait:
+                # --- END OF SPEECH ---
+                transcriber.finish()
+                held = []
+                silence_counter = 0
+        position += len(block) / transcriber.sample_rate if block is not None else block_duration
+
+
+def print_hypothesis(hypothesis):
+    # \r moves to the start of the line, \033[K clears the line
+    if hypothesis.kind == "final":
+        if hypothesis.committed:
+            print(f"\r\033[KYOU SAID: {hypothesis.committed}\n")
+        print("[Listening...]", end="", flush=True)
+    else:
+        print(f"\r\033[K{hypothesis.committed} \033[2m{hypothesis.tentative}\033[0m", end="", flush=True)
 
+
+def recorder(hub, audio_queue):
+    """Reads the shared capture hub and queues BLOCK_DURATION blocks (copies, safe to hold)."""
+    print("Recorder thread started.")
+    cursor = hub.cursor()
+    print("Listening... Press Ctrl+C to stop")
+    while True:
+        if cursor.wait_for(FRAMES_PER_BLOCK, timeout=1.0):
+            audio_queue.put(cursor.read(FRAMES_PER_BLOCK))
+
+
+def queued_blocks(audio_queue):
     while True:
         try:
-            # Get a block of audio
-            block = audio_queue.get(timeout=BLOCK_DURATION)
-            
-            # Calculate the energy (RMS) of the block
-            rms = np.sqrt(np.mean(block**2))
-            # print(f"RMS: {rms:.4f}")
-            
-            if rms > SILENCE_THRESHOLD:
-                # --- SPEECH DETECTED ---
-                audio_buffer.append(block)
-                silence_counter = 0 # Reset silence counter
-            
-            else:
-                # --- SILENCE DETECTED ---
-                if len(audio_buffer) > 0:
-                    # We were speaking, but now we're silent
-                    silence_counter += 1
-                    
-                    if silence_counter >= SILENT_BLOCKS_TO_WAIT:
-                        # --- END OF SPEECH ---
-                        print("\n[Transcribing...]", end="", flush=True)
-                        
-                        # Concatenate all blocks from the buffer
-                        audio_data = np.concatenate(audio_buffer)
-                        audio_buffer = [] # Clear the buffer
-                        silence_counter = 0 # Reset the counter
-                        
-                        # Flatten and convert to the correct type
-                        audio_data = audio_data.flatten().astype(np.float32)
-                        
-                        # Transcribe the audio
-                        segments, _ = model.transcribe(
-                            audio_data,
-                            language="en",
-                            beam_size=1
-                        )
-                        
-                        # Join all segments into one string
-                        text = "".join(segment.text for segment in segments).strip()
-                        
-                        if text:
-                            # \r moves to the start of the line, \033[K clears the line
-                            print(f"\r\033[KYOU SAID: {text}\n")
-                        
-                        print("[Listening...]", end="", flush=True)
-
-                else:
-                    # Just continuous silence, do nothing
-                    pass
-        
+            yield audio_queue.get(timeout=BLOCK_DURATION)
         except queue.Empty:
-            # This is NOT an error. It means a block's worth of time passed
-            # with NO new audio, which counts as silence.
-            if len(audio_buffer) > 0:
-                silence_counter += 1
-                if silence_counter >= SILENT_BLOCKS_TO_WAIT:
-                    # This is the same transcription logic as above.
-                    # It handles the case where you stop talking and no
-                    # "low RMS" blocks come in, only empty queue timeouts.
-                    
-                    print("\n[Transcribing (timeout)...]", end="", flush=True)
-                    audio_data = np.concatenate(audio_buffer)
-                    audio_buffer = []
-                    silence_counter = 0
-                    
-                    audio_data = audio_data.flatten().astype(np.float32)
-                    segments, _ = model.transcribe(audio_data, language="en", beam_size=1)
-                    text = "".join(segment.text for segment in segments).strip()
-                    
-                    if text:
-                        print(f"\r\033[KYOU SAID: {text}\n")
-                    
-                    print("[Listening...]", end="", flush=True)
-
-# --- Start Threads ---
-# Start the recorder in a background thread
-threading.Thread(target=recorder, daemon=True).start()
-
-# Run the transcriber in the main thread
-try:
-    transcriber()
-except KeyboardInterrupt:
-    print("\nStopping...")
-except Exception as e:
-    print(f"An error occurred: {e}")
\ No newline at end of file
+            # Not an error: a block's worth of time passed with no audio
+            yield None
+
+
+def main():
+    from audio_hub import get_hub
+
+    parser = argparse.ArgumentParser(description="Live transcription from the microphone.")
+    parser.add_argument("--one-shot", action="store_true", help="decode each utterance only after the silence")
+    args = parser.parse_args()
+
+    print("Transcriber waiting for model...")
+    # Engine, model size, device and threads come from config.json ("stt_*" keys)
+    engine = get_engine(load_config())
+    print("Model loaded. Transcriber is active.")
+
+    hub = get_hub(samplerate)   # shared capture stream + adaptive noise floor
+    audio_queue = queue.Queue()
+    threading.Thread(target=recorder, args=(hub, audio_queue), daemon=True).start()
+
+    transcriber_class = OneShotTranscriber if args.one_shot else IncrementalTranscriber
+    transcriber = transcriber_class(engine, on_hypothesis=print_hypothesis)
+    # Threshold adapts to the room (tracked by the capture hub), no tuning needed
+    segment_stream(queued_blocks(audio_queue), lambda: hub.noise_floor.threshold, transcriber)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    except Exception as e:
+        print(f"An error occurred: {e}")
@@ -0,0 +1,190 @@
+import collections
+import numpy as np
+
+
+def pcm16_to_float32(data):
+    """Convert little-endian 16-bit PCM bytes to float32 samples in [-1, 1]."""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def float32_to_pcm16(audio):
+    """Convert float32 samples in [-1, 1] to little-endian 16-bit PCM bytes."""
+    clipped = np.clip(audio, -1.0, 1.0)
+    return (clipped * 32767.0).astype("<i2").tobytes()
+
+
+class SpeechSegmenter:
+    """
+    Incremental end-of-speech detector.
+
+    Feed it audio as it arrives (any block size). It splits the stream into
+    fixed frames, tracks speech by frame energy and reports when the speaker
+    has paused for `pause` seconds after talking, or `max_duration` is reached.
+    The utterance (plus a short pre-roll) is kept in a preallocated buffer.
+
+    Pass a shared NoiseFloorEstimator as `noise_floor` to use its adaptive
+    threshold instead of the fixed `threshold`.
+    """
+
+    def __init__(self, sample_rate=16000, frame_duration=0.03, threshold=0.01,
+                 pause=0.7, max_duration=10.0, pre_roll=0.3, start_timeout=None,
+                 noise_floor=None):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_duration)
+        self.threshold = threshold
+        self.noise_floor = noise_floor
+        self.pause_frames = max(1, int(pause / frame_duration))
+        self.start_timeout_frames = int(start_timeout / frame_duration) if start_timeout else None
+
+        self._buffer = np.zeros(int((max_duration + pre_roll) * sample_rate), dtype=np.float32)
+        self._length = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll = collections.deque(maxlen=max(1, int(pre_roll / frame_duration)))
+
+        self.frames_seen = 0
+        self.speech_started = False
+        self.done = False
+        self.timed_out = False
+        self._silent_frames = 0
+
+    def feed(self, samples):
+        """Add float32 samples. Returns True once the utterance is complete."""
+        if self.done:
+            return True
+
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+
+        n_frames = len(samples) // self.frame_size
+        for i in range(n_frames):
+            frame = samples[i * self.frame_size:(i + 1) * self.frame_size]
+            if self._process_frame(frame):
+                self._pending = np.zeros(0, dtype=np.float32)
+                return True
+
+        self._pending = samples[n_frames * self.frame_size:].copy()
+        return False
+
+    def feed_pcm16(self, data):
+        return self.feed(pcm16_to_float32(data))
+
+    def finish(self):
+        """Mark the stream as ended (e.g. client closed the upload)."""
+        if self.speech_started and len(self._pending):
+            self._append(self._pending)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.done = True
+
+    def audio(self):
+        """The captured utterance including pre-roll, as float32 samples."""
+        return self._buffer[:self._length]
+
+    @property
+    def duration(self):
+        return self._length / self.sample_rate
+
+    def _is_speech(self, frame):
+        rms = np.sqrt(np.mean(frame ** 2))
+        threshold = self.noise_floor.threshold if self.noise_floor else self.threshold
+        return rms > threshold
+
+    def _process_frame(self, frame):
+        self.frames_seen += 1
+        speech = self._is_speech(frame)
+
+        if not self.speech_started:
+            if speech:
+                self.speech_started = True
+                for past in self._pre_roll:
+                    self._append(past)
+                self._pre_roll.clear()
+                self._append(frame)
+            else:
+                self._pre_roll.append(frame.copy())
+                if self.start_timeout_frames and self.frames_seen >= self.start_timeout_frames:
+                    self.timed_out = True
+                    self.done = True
+            return self.done
+
+        if not self._append(frame):
+            self.done = True
+            return True
+
+        if speech:
+            self._silent_frames = 0
+        else:
+            self._silent_frames += 1
+            if self._silent_frames >= self.pause_frames:
+                self.done = True
+        return self.done
+
+    def _append(self, samples):
+        space = len(self._buffer) - self._length
+        n = min(space, len(samples))
+        self._buffer[self._length:self._length + n] = samples[:n]
+        self._length += n
+        return self._length < len(self._buffer)
+
+
+class PCMStreamReader:
+    """
+    Reads a PCM16 mono stream (raw, or WAV with a RIFF header) from a
+    file-like object in blocks and yields float32 samples. Call
+    `read_header()` first so `sample_rate` reflects a WAV header if present.
+    """
+
+    def __init__(self, stream, sample_rate=16000, block_size=4096):
+        self.stream = stream
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.bytes_read = 0
+        self._head = b""
+
+    def _read(self, n):
+        data = self.stream.read(n)
+        self.bytes_read += len(data)
+        return data
+
+    def _read_exact(self, n):
+        data = b""
+        while len(data) < n:
+            chunk = self._read(n - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def read_header(self):
+        head = self._read_exact(12)
+        if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+            self._head = head
+            return
+
+        while True:
+            chunk_header = self._read_exact(8)
+            if len(chunk_header) < 8:
+                raise ValueError("WAV stream ended before the data chunk")
+            chunk_id = chunk_header[:4]
+            chunk_size = int.from_bytes(chunk_header[4:], "little")
+            if chunk_id == b"data":
+                return
+            body = self._read_exact(chunk_size + (chunk_size & 1))
+            if chunk_id == b"fmt ":
+                channels = int.from_bytes(body[2:4], "little")
+                bits = int.from_bytes(body[14:16], "little")
+                if channels != 1 or bits != 16:
+                    raise ValueError(f"Expected 16-bit mono WAV, got {channels} channel(s) at {bits} bits")
+                self.sample_rate = int.from_bytes(body[4:8], "little")
+
+    def blocks(self):
+        leftover = self._head
+        while True:
+            data = self._read(self.block_size)
+            if not data:
+                break
+            data = leftover + data
+            usable = len(data) - (len(data) % 2)
+            leftover = data[usable:]
+            if usable:
+                yield pcm16_to_float32(data[:usable])
@@ -1,11 +1,35 @@
-from RealtimeSTT import AudioToTextRecorder
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import load_config
+from stt_engine import get_engine
+
+engine = None
+
+
+def load_model(engine_name=None):
+    """Load (once) the STT engine selected in config.json, or `engine_name`."""
+    global engine
+    engine = get_engine(load_config(), name=engine_name)
+    return engine
+
+
+def transcribe_audio(audio_data, sample_rate=16000):
+    if engine is None:
+        load_model()
+    return engine.transcribe(audio_data, sample_rate)
+
 
 def process_text(text):
     print(text)
 
 if __name__ == '__main__':
+    from RealtimeSTT import AudioToTextRecorder
+
     print("Wait until it says 'speak now'")
     recorder = AudioToTextRecorder()
 
     while True:
-        recorder.text(process_text)
\ No newline at end of file
+        recorder.text(process_text)
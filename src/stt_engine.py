@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+DEFAULT_SAMPLE_RATE = 16000
+
+
+# One transcribed word; start/end in seconds from the start of the audio (None if unknown)
+Word = namedtuple("Word", "start end text")
+
+
+class TranscriptionError(Exception):
+    """The STT backend could not be reached or failed to decode."""
+
+
+class STTEngine:
+    """
+    Common interface for speech-to-text backends.
+
+    `load()` is called once up front (model download, warm-up); `transcribe()`
+    takes float32 mono samples in [-1, 1] and returns the text ("" for no
+    speech). Backend failures are raised as TranscriptionError.
+
+    `transcribe_words()` returns the transcript as Words; backends that set
+    `word_timestamps` fill in their times, the rest leave them None.
+    """
+
+    name = "base"
+    word_timestamps = False
+
+    def load(self):
+        pass
+
+    def transcribe(self, audio, sample_rate=DEFAULT_SAMPLE_RATE):
+        raise NotImplementedError
+
+    def transcribe_words(self, audio, sample_rate=DEFAULT_SAMPLE_RATE, prompt=None):
+        return [Word(None, None, text) for text in self.transcribe(audio, sample_rate).split()]
+
+
+def resample(audio, orig_rate, target_rate=DEFAULT_SAMPLE_RATE):
+    """Linear resampling; good enough for speech going into Whisper."""
+    if orig_rate == target_rate or len(audio) == 0:
+        return audio
+    duration = len(audio) / orig_rate
+    target_len = int(round(duration * target_rate))
+    old_times = np.linspace(0.0, duration, num=len(audio), endpoint=False)
+    new_times = np.linspace(0.0, duration, num=target_len, endpoint=False)
+    return np.interp(new_times, old_times, audio).astype(np.float32)
+
+
+class FasterWhisperEngine(STTEngine):
+    """Local faster-whisper (CTranslate2). Defaults suit CPU-only machines."""
+
+    name = "faster_whisper"
+    word_timestamps = True
+
+    def __init__(self, model_size="base.en", device="cpu", compute_type="int8",
+                 cpu_threads=4, beam_size=1, language="en"):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.language = language
+        self.model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.model is not None:
+                return
+            from faster_whisper import WhisperModel
+
+            print(f"Loading faster-whisper '{self.model_size}' on {self.device} "
+                  f"({self.compute_type}, {self.cpu_threads} threads)...")
+            started = time.perf_counter()
+            self.model = WhisperModel(
+                self.model_size,
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+            )
+            loaded = time.perf_counter()
+
+            # Warm-up decode so the first real command doesn't pay for lazy init
+            segments, _ = self.model.transcribe(
+                np.zeros(DEFAULT_SAMPLE_RATE, dtype=np.float32),
+                language=self.language,
+                beam_size=self.beam_size,
+            )
+            list(segments)
+            print(f"Model loaded in {loaded - started:.2f}s, "
+                  f"warm-up decode {time.perf_counter() - loaded:.2f}s.")
+
+    def transcribe(self, audio, sample_rate=DEFAULT_SAMPLE_RATE, **options):
+        if self.model is None:
+            self.load()
+        audio = resample(np.asarray(audio, dtype=np.float32).reshape(-1), sample_rate)
+        try:
+            segments, _ = self.model.transcribe(
+                audio,
+                language=self.language,
+                beam_size=self.beam_size,
+                **options,
+            )
+            return "".join(segment.text for segment in segments).strip()
+        except Exception as e:
+            raise TranscriptionError(str(e)) from e
+
+    def transcribe_words(self, audio, sample_rate=DEFAULT_SAMPLE_RATE, prompt=None):
+        """Words with timestamps; `prompt` is text that came just before this audio."""
+        if self.model is None:
+            self.load()
+        audio = resample(np.asarray(audio, dtype=np.float32).reshape(-1), sample_rate)
+        try:
+            segments, _ = self.model.transcribe(
+                audio,
+                language=self.language,
+                beam_size=self.beam_size,
+                word_timestamps=True,
+                initial_prompt=prompt or None,
+            )
+            return [Word(word.start, word.end, word.word.strip())
+                    for segment in segments for word in segment.words]
+        except Exception as e:
+            raise TranscriptionError(str(e)) from e
+
+
+class GoogleEngine(STTEngine):
+    """The speech_recognition Google Web Speech API (network round trip)."""
+
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        self.language = language
+        self.recognizer = None
+
+    def load(self):
+        if self.recognizer is None:
+            import speech_recognition as sr
+            self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio, sample_rate=DEFAULT_SAMPLE_RATE):
+        import speech_recognition as sr
+
+        self.load()
+        pcm = (np.clip(np.asarray(audio, dtype=np.float32).reshape(-1), -1.0, 1.0) * 32767).astype("<i2")
+        audio_data = sr.AudioData(pcm.tobytes(), sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio_data, language=self.language)
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            raise TranscriptionError(str(e)) from e
+
+
+ENGINES = {
+    FasterWhisperEngine.name: FasterWhisperEngine,
+    GoogleEngine.name: GoogleEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def create_engine(config=None, name=None):
+    """
+    Build an engine from config.json-style settings:
+    stt_engine, stt_model, stt_device, stt_compute_type, stt_cpu_threads.
+    """
+    config = config or {}
+    name = name or config.get("stt_engine", FasterWhisperEngine.name)
+    if name == FasterWhisperEngine.name:
+        return FasterWhisperEngine(
+            model_size=config.get("stt_model", "base.en"),
+            device=config.get("stt_device", "cpu"),
+            compute_type=config.get("stt_compute_type", "int8"),
+            cpu_threads=config.get("stt_cpu_threads", 4),
+        )
+    if name == GoogleEngine.name:
+        return GoogleEngine()
+    raise ValueError(f"Unknown STT engine '{name}'. Available: {', '.join(ENGINES)}")
+
+
+def get_engine(config=None, name=None):
+    """Process-wide shared engine, created and loaded on first use."""
+    config = config or {}
+    name = name or config.get("stt_engine", FasterWhisperEngine.name)
+    with _engines_lock:
+        engine = _engines.get(name)
+        if engine is None:
+            engine = create_engine(config, name)
+            _engines[name] = engine
+    engine.load()
+    return engine
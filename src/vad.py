@@ -1,6 +1,6 @@
 import torch
 import numpy as np
-import sounddevice as sd
+from audio_hub import get_hub
 
 model = None
 utils = None
@@ -31,14 +31,16 @@ def record_with_vad(sample_rate=16000, device=None, silence_duration=None, min_d
     min_chunks = int(min_duration * sample_rate / 512)
     recording = False
     
-    def audio_callback(indata, frames, time, status):
-        nonlocal silence_chunks, recording
-        
-        audio_chunk = indata.copy().flatten()
+    # Read 512-sample blocks from the shared capture hub instead of opening a stream
+    cursor = get_hub(sample_rate, device=device).cursor()
+    while True:
+        if not cursor.wait_for(512, timeout=1.0):
+            continue
+        audio_chunk = cursor.read(512)
         audio_tensor = torch.from_numpy(audio_chunk)
-        
+
         speech_prob = model(audio_tensor, sample_rate).item()
-        
+
         if speech_prob > 0.5:
             if not recording:
                 print("Recording...")
@@ -48,15 +50,11 @@ def record_with_vad(sample_rate=16000, device=None, silence_duration=None, min_d
         elif recording:
             chunks.append(audio_chunk)
             silence_chunks += 1
-    
-    with sd.InputStream(callback=audio_callback, channels=1, samplerate=sample_rate, blocksize=512, device=device):
-        while True:
-            sd.sleep(100)
-            
-            if recording and silence_chunks > max_silence_chunks and len(chunks) > min_chunks:
-                print("Silence detected. Stopping...")
-                break
-    
+
+        if recording and silence_chunks > max_silence_chunks and len(chunks) > min_chunks:
+            print("Silence detected. Stopping...")
+            break
+
     if len(chunks) == 0:
         return None, sample_rate
     
@@ -1,28 +1,62 @@
 import numpy as np
-import sounddevice as sd
 import os
 import pickle
+import queue
+import threading
+import time
+import torch
 from resemblyzer import VoiceEncoder, preprocess_wav
-from RealtimeSTT import AudioToTextRecorder
+from resemblyzer.audio import wav_to_mel_spectrogram
+
+from audio_hub import get_hub
+from config import load_config
+from stt_engine import get_engine, TranscriptionError
 
 # Configuration
 VOICE_PROFILE_DIR = "voice_profiles"
 ENROLLMENT_DURATION = 10       # seconds for initial voice registration
 CHECK_DURATION = 3             # seconds per diarization check audio chunk
+SAMPLE_RATE = 16000
+VERIFY_BATCH = 4               # chunks embedded per encoder call, at most
+QUEUE_SECONDS = 30             # audio allowed to wait for verification before it is dropped
+METRICS_INTERVAL = 15          # seconds between metric reports
 
 encoder = VoiceEncoder()
 os.makedirs(VOICE_PROFILE_DIR, exist_ok=True)
 
-def record_audio(duration, fs=16000):
+def record_audio(duration, fs=SAMPLE_RATE):
     print(f"Recording for {duration} seconds. Speak clearly...")
-    recording = sd.rec(int(duration * fs), samplerate=fs, channels=1)
-    sd.wait()
-    return np.squeeze(recording)
+    return get_hub(fs).record_seconds(duration)
 
 def get_embedding(audio):
     wav = preprocess_wav(audio)
     return encoder.embed_utterance(wav)
 
+def get_embeddings(chunks):
+    """
+    Embeddings for several chunks with one encoder forward pass: the
+    partial windows of every chunk are stacked into a single batch and
+    averaged back per chunk, as embed_utterance does for one.
+    """
+    mels, owners = [], []
+    for i, chunk in enumerate(chunks):
+        wav = preprocess_wav(chunk)
+        wav_slices, mel_slices = encoder.compute_partial_slices(len(wav), rate=1.3, min_coverage=0.75)
+        if wav_slices[-1].stop >= len(wav):
+            wav = np.pad(wav, (0, wav_slices[-1].stop - len(wav)))
+        mel = wav_to_mel_spectrogram(wav)
+        mels.extend(mel[s] for s in mel_slices)
+        owners.extend([i] * len(mel_slices))
+
+    with torch.no_grad():
+        partials = encoder(torch.from_numpy(np.array(mels)).to(encoder.device)).cpu().numpy()
+    owners = np.array(owners)
+    embeddings = []
+    for i in range(len(chunks)):
+        mean = partials[owners == i].mean(axis=0)
+        embeddings.append(mean / np.linalg.norm(mean))
+    return embeddings
+
 def register_voice_profile():
     username = input("Enter name for new voice profile: ").strip()
     if not username:
@@ -45,17 +79,125 @@ def load_single_profile():
             return profiles[0][:-4], pickle.load(f)
     return None, None
 
+def similarity(embedding, test_emb):
+    return np.dot(embedding, test_emb) / (np.linalg.norm(embedding) * np.linalg.norm(test_emb))
+
 def is_speaker(audio, embedding, threshold=0.65):
-    test_emb = get_embedding(audio)
-    similarity = np.dot(embedding, test_emb) / (np.linalg.norm(embedding) * np.linalg.norm(test_emb))
-    print(f"Speaker similarity: {similarity:.3f}")
-    return similarity > threshold
+    score = similarity(embedding, get_embedding(audio))
+    print(f"Speaker similarity: {score:.3f}")
+    return score > threshold
 
 def process_transcription(text):
     print(f"Transcribed: {text}")
 
+
+class PipelineMetrics:
+    """Counters shared by the pipeline stages (seconds are audio seconds)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.captured = 0.0
+        self.silent = 0.0
+        self.verified = 0.0
+        self.rejected = 0.0
+        self.transcribed = 0.0
+        self.dropped = 0.0
+        self.verify_batches = 0
+        self.verify_time = 0.0
+        self.transcribe_time = 0.0
+
+    def add(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def report(self, verify_queue, transcribe_queue):
+        with self.lock:
+            elapsed = time.time() - self.started
+            processed = self.verified + self.rejected
+            batch = processed / CHECK_DURATION / max(self.verify_batches, 1)
+            print(
+                f"📊 {elapsed:.0f}s: captured {self.captured:.0f}s, silent {self.silent:.0f}s, "
+                f"verified {self.verified:.0f}s, rejected {self.rejected:.0f}s, "
+                f"transcribed {self.transcribed:.0f}s, dropped {self.dropped:.1f}s | "
+                f"verify {processed / max(self.verify_time, 1e-6):.1f}x realtime "
+                f"(avg batch {batch:.1f}), "
+                f"transcribe {self.transcribed / max(self.transcribe_time, 1e-6):.1f}x realtime | "
+                f"queued {verify_queue.qsize()} to verify, {transcribe_queue.qsize()} to transcribe"
+            )
+
+
+def capture_loop(hub, verify_queue, metrics, stop):
+    """Cut the never-interrupted hub stream into CHECK_DURATION chunks."""
+    cursor = hub.cursor()
+    chunk_samples = int(CHECK_DURATION * hub.sample_rate)
+    frame = int(0.03 * hub.sample_rate)
+    while not stop.is_set():
+        if not cursor.wait_for(chunk_samples, timeout=1.0):
+            continue
+        dropped_before = cursor.dropped
+        chunk = cursor.read(chunk_samples)
+        metrics.add(captured=CHECK_DURATION, dropped=(cursor.dropped - dropped_before) / hub.sample_rate)
+
+        # Skip chunks with (almost) nobody talking; they'd only cost encoder time
+        frames = chunk[:len(chunk) // frame * frame].reshape(-1, frame)
+        voiced = np.mean(np.sqrt(np.mean(frames ** 2, axis=1)) > hub.noise_floor.threshold)
+        if voiced < 0.1:
+            metrics.add(silent=CHECK_DURATION)
+            continue
+        try:
+            verify_queue.put_nowait(chunk)
+        except queue.Full:
+            metrics.add(dropped=CHECK_DURATION)
+
+
+def verify_loop(embedding, verify_queue, transcribe_queue, metrics, stop, threshold=0.65):
+    """Verify queued chunks in batches; pass exactly the accepted ones on."""
+    while not stop.is_set():
+        try:
+            batch = [verify_queue.get(timeout=1.0)]
+        except queue.Empty:
+            continue
+        while len(batch) < VERIFY_BATCH:
+            try:
+                batch.append(verify_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        started = time.perf_counter()
+        scores = [similarity(embedding, e) for e in get_embeddings(batch)]
+        metrics.add(verify_time=time.perf_counter() - started, verify_batches=1)
+        for chunk, score in zip(batch, scores):
+            if score > threshold:
+                metrics.add(verified=CHECK_DURATION)
+                transcribe_queue.put(chunk)
+            else:
+                print(f"Unknown speaker ({score:.3f}), skipping chunk.")
+                metrics.add(rejected=CHECK_DURATION)
+
+
+def transcribe_loop(engine, transcribe_queue, metrics, stop):
+    while not stop.is_set():
+        try:
+            chunk = transcribe_queue.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        started = time.perf_counter()
+        try:
+            text = engine.transcribe(chunk, SAMPLE_RATE)
+        except TranscriptionError as e:
+            print(f"Transcription failed: {e}")
+            continue
+        finally:
+            metrics.add(transcribe_time=time.perf_counter() - started)
+        metrics.add(transcribed=CHECK_DURATION)
+        if text:
+            process_transcription(text)
+
+
 def main():
-    recorder = AudioToTextRecorder()
+    engine = get_engine(load_config())
 
     username, embedding = load_single_profile()
     if embedding is None:
@@ -77,15 +219,29 @@ def main():
         return
     print("Voice verified! Starting secure transcription loop.")
 
-    while True:
-        audio_chunk = record_audio(CHECK_DURATION)
-        if is_speaker(audio_chunk, embedding):
-            print("Speaker verified, transcribing chunk...")
-            # Pass chunk audio data to transcription method
-            # This may vary depending on your transcription API. Here, assuming recorder.text reads audio
-            recorder.text(process_transcription)
-        else:
-            print("Unknown speaker, skipping transcription.")
+    # capture -> verify (batched) -> transcribe, each stage on its own thread
+    hub = get_hub(SAMPLE_RATE)
+    verify_queue = queue.Queue(maxsize=max(1, QUEUE_SECONDS // CHECK_DURATION))
+    transcribe_queue = queue.Queue()
+    metrics = PipelineMetrics()
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=capture_loop, args=(hub, verify_queue, metrics, stop), daemon=True),
+        threading.Thread(target=verify_loop, args=(embedding, verify_queue, transcribe_queue, metrics, stop), daemon=True),
+        threading.Thread(target=transcribe_loop, args=(engine, transcribe_queue, metrics, stop), daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        while True:
+            time.sleep(METRICS_INTERVAL)
+            metrics.report(verify_queue, transcribe_queue)
+    except KeyboardInterrupt:
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=5)
+        metrics.report(verify_queue, transcribe_queue)
 
 if __name__ == "__main__":
     main()